@@ -810,7 +810,9 @@ SELECT
         WHEN usage_type = 'paid' AND amenity_category = 'wifi' THEN usage_duration_minutes * 0.10
         WHEN usage_type = 'paid' AND amenity_category = 'smart_tv' THEN usage_duration_minutes * 0.08
         ELSE 0
-    END as estimated_session_value
+    END as estimated_session_value,
+    
+    CURRENT_TIMESTAMP() as processed_at
     
 FROM BRONZE.amenity_usage au;
 
@@ -1026,7 +1028,7 @@ SELECT
     -- Infrastructure engagement score
     gve.infrastructure_engagement_score,
     
-    CURRENT_TIMESTAMP() as calculated_at
+    CURRENT_TIMESTAMP() as processed_at
     
 FROM guest_360_view_enhanced gve;
 
@@ -357,7 +357,9 @@ SELECT
         WHEN usage_type = 'paid' AND amenity_category = 'wifi' THEN usage_duration_minutes * 0.10
         WHEN usage_type = 'paid' AND amenity_category = 'smart_tv' THEN usage_duration_minutes * 0.08
         ELSE 0
-    END as estimated_session_value
+    END as estimated_session_value,
+    
+    CURRENT_TIMESTAMP() as processed_at
     
 FROM BRONZE.amenity_usage au;
 
@@ -0,0 +1,147 @@
+"""
+Cold-start import profile per page
+Starts a fresh interpreter per page with -X importtime, renders the app
+directly on that page and reports the import time spent during the render,
+grouped by top-level package
+
+Packages the harness itself loads before the render (streamlit, pandas,
+duckdb, snowpark) are not counted; in Snowflake the container pays for
+those on every page alike.
+
+Usage:
+    python import_profile.py --guests 10000
+    python import_profile.py --apps hotel_personalization --top 5
+"""
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from run_benchmarks import APPS, BENCHMARKS_DIR, RENDER_TIMEOUT, STREAMLIT_DIR, _database_path
+
+# Written to stderr around the measured render, to delimit its importtime lines
+RENDER_START = '# import-profile: render start'
+RENDER_END = '# import-profile: render end'
+
+
+def run_worker(app, database, page_index):
+    """
+    Render one app in this process, opening directly on the page at page_index
+
+    Returns:
+        dict with the page labels and any exceptions raised by the render
+    """
+    from streamlit.testing.v1 import AppTest
+    from local_engine import LocalSession
+
+    spec = APPS[app]
+    app_dir = os.path.join(STREAMLIT_DIR, app)
+    os.chdir(app_dir)
+    sys.path[:0] = [app_dir, os.path.join(app_dir, 'shared')]
+
+    session = LocalSession(database)
+    importlib.import_module(spec['provider']).set_session_factory(lambda: session)
+
+    # Warm up the Streamlit script runner so only the app's own imports are measured
+    AppTest.from_string('import streamlit as st').run()
+
+    # Open on the requested page, as a fresh container would after navigation
+    with open(spec['main'], encoding='utf-8') as f:
+        source = f.read().replace('index=0', f'index={page_index}', 1)
+    at = AppTest.from_string(source, default_timeout=RENDER_TIMEOUT)
+
+    sys.stderr.write(f"{RENDER_START}\n")
+    sys.stderr.flush()
+    at.run()
+    sys.stderr.write(f"{RENDER_END}\n")
+    sys.stderr.flush()
+
+    session.close()
+    return {
+        'labels': list(at.sidebar.radio[0].options),
+        'exceptions': [str(e.value) for e in at.exception],
+    }
+
+
+def parse_importtime(stderr):
+    """
+    Import time spent between the render markers, per top-level package
+
+    Returns:
+        (total_ms, {package: ms}) from the modules' self times
+    """
+    lines = stderr.splitlines()
+    start, end = lines.index(RENDER_START), lines.index(RENDER_END)
+    packages = defaultdict(float)
+    for line in lines[start + 1:end]:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us) / 1000
+    return sum(packages.values()), dict(packages)
+
+
+def profile_page(app, database, page_index):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__),
+         '--worker', app, '--database', database, '--page-index', str(page_index)],
+        cwd=BENCHMARKS_DIR, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-4000:])
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    total_ms, packages = parse_importtime(completed.stderr)
+    result.update({
+        'import_ms': round(total_ms, 1),
+        'packages': {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda p: -p[1])},
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--guests', type=int, default=10_000, help='Synthetic database to render against')
+    parser.add_argument('--apps', nargs='+', choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARKS_DIR, '.data'))
+    parser.add_argument('--top', type=int, default=3, help='Packages listed per page')
+    parser.add_argument('--output', default='import_profile.json')
+    parser.add_argument('--worker', choices=sorted(APPS), help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--page-index', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.database, args.page_index)))
+        return
+
+    database = _database_path(args.data_dir, args.guests)
+    if not os.path.exists(database):
+        from synthetic_data import build_database
+        os.makedirs(args.data_dir, exist_ok=True)
+        print(f"Building {args.guests:,} guest database...")
+        build_database(database, args.guests, log=lambda m: print(f"  {m}"))
+
+    results = {}
+    print(f"\n{'page':<50} {'import ms':>10}  top packages")
+    for app in args.apps:
+        first = profile_page(app, database, 0)
+        pages = {first['labels'][0]: first}
+        for index, label in enumerate(first['labels'][1:], start=1):
+            pages[label] = profile_page(app, database, index)
+        results[app] = pages
+        for label, page in pages.items():
+            top = ', '.join(f"{name} {ms:.0f}" for name, ms in list(page['packages'].items())[:args.top])
+            errors = f"  ({len(page['exceptions'])} errors)" if page['exceptions'] else ''
+            print(f"{app + ' / ' + label:<50} {page['import_ms']:>10.0f}  {top}{errors}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+"""
+Local stand-in for the Snowpark session
+Runs the dashboards' SQL, and the SQL Snowpark generates for DataFrame-API
+loaders, on an in-process DuckDB database holding the Bronze/Silver/Gold schemas
+"""
+
+import itertools
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import duckdb
+import pandas as pd
+from snowflake.snowpark import Row, Session
+from snowflake.snowpark._internal.analyzer.analyzer import Analyzer
+from snowflake.snowpark.column import Column
+
+# Catalog name the DuckDB database is attached under, so three-part
+# HOTEL_PERSONALIZATION.GOLD.X names resolve as they do in Snowflake
+DATABASE = 'hotel_personalization'
+
+# Rows per pandas batch returned by to_pandas_batches()
+BATCH_ROWS = 100_000
+
+# Values returned for Snowflake context functions
+CONTEXT_FUNCTIONS = {
+    'CURRENT_ACCOUNT_NAME': "'LOCAL'",
+    'CURRENT_REGION': "'LOCAL'",
+    'CURRENT_ROLE': "'LOCAL_ROLE'",
+    'CURRENT_DATABASE': "'HOTEL_PERSONALIZATION'",
+    'CURRENT_SCHEMA': "'GOLD'",
+    'CURRENT_WAREHOUSE': "'LOCAL_WH'",
+}
+
+# Aliases used by the refresh scripts that DuckDB reserves
+_RESERVED_ALIASES = 'at|do'
+
+_DATE_PARTS = {
+    'year': 'to_years', 'month': 'to_months', 'week': 'to_weeks', 'day': 'to_days',
+    'hour': 'to_hours', 'minute': 'to_minutes', 'second': 'to_seconds',
+}
+
+# ----------------------------------------------------------------------------
+# Snowflake -> DuckDB SQL translation
+# ----------------------------------------------------------------------------
+
+def _mask_literals(sql):
+    """Copy of sql with the contents of '...' literals blanked, same length"""
+    return re.sub(r"'(?:[^']|'')*'", lambda m: "'" + '_' * (len(m.group()) - 2) + "'", sql)
+
+
+def _sub_outside_literals(pattern, repl, sql, flags=re.IGNORECASE):
+    """re.sub applied only to the text outside string literals"""
+    parts = re.split(r"('(?:[^']|'')*')", sql)
+    return ''.join(
+        part if i % 2 else re.sub(pattern, repl, part, flags=flags)
+        for i, part in enumerate(parts)
+    )
+
+
+def _split_args(text):
+    """Split a call's argument text on top-level commas"""
+    masked = _mask_literals(text)
+    args, depth, start = [], 0, 0
+    for i, ch in enumerate(masked):
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            args.append(text[start:i].strip())
+            start = i + 1
+    args.append(text[start:].strip())
+    return args
+
+
+def _rewrite_calls(sql, name, rewrite):
+    """
+    Replace every call NAME(args...) with rewrite(args)
+
+    Calls nested inside the arguments are rewritten first.
+    """
+    pattern = re.compile(r'\b' + name + r'\s*\(', re.IGNORECASE)
+    pos = 0
+    while True:
+        match = pattern.search(_mask_literals(sql), pos)
+        if match is None:
+            return sql
+        masked = _mask_literals(sql)
+        depth = 0
+        for end in range(match.end() - 1, len(masked)):
+            if masked[end] == '(':
+                depth += 1
+            elif masked[end] == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+        inner = _rewrite_calls(sql[match.end():end], name, rewrite)
+        replacement = rewrite(_split_args(inner))
+        sql = sql[:match.start()] + replacement + sql[end + 1:]
+        pos = match.start() + len(replacement)
+
+
+def _dateadd(args):
+    part, amount, value = args
+    interval = f"{_DATE_PARTS[part.strip().lower()]}(CAST({amount} AS INTEGER))"
+    if value.upper() == 'CURRENT_DATE' and part.strip().lower() in ('year', 'month', 'week', 'day'):
+        return f"CAST(CURRENT_DATE + {interval} AS DATE)"
+    return f"(CAST({value} AS TIMESTAMP) + {interval})"
+
+
+def _datediff(args):
+    part, start, end = args
+    return f"date_diff('{part.strip().lower()}', CAST({start} AS TIMESTAMP), CAST({end} AS TIMESTAMP))"
+
+
+def _shift_index(match):
+    return f"{match.group(1)}[{int(match.group(2)) + 1}]"
+
+
+def translate_sql(sql):
+    """
+    Rewrite Snowflake SQL used by the dashboards and refresh scripts for DuckDB
+
+    Covers the dialect this repository uses (DATEADD/DATEDIFF, VARIANT paths,
+    GENERATOR, ARRAY_AGG ... WITHIN GROUP, context functions), not Snowflake
+    SQL in general.
+    """
+    for function, value in CONTEXT_FUNCTIONS.items():
+        sql = _sub_outside_literals(rf'\b{function}\s*\(\s*\)', value, sql)
+    sql = _sub_outside_literals(r'\bCURRENT_(DATE|TIMESTAMP)\s*\(\s*\)', r'CURRENT_\1', sql)
+    sql = _sub_outside_literals(r'^\s*USE\s+DATABASE\s+\w+', f'USE {DATABASE}', sql, flags=re.IGNORECASE | re.MULTILINE)
+    sql = _sub_outside_literals(r'^\s*USE\s+SCHEMA\s+(\w+)', rf'USE {DATABASE}.\1', sql, flags=re.IGNORECASE | re.MULTILINE)
+    sql = _sub_outside_literals(r'::\s*STRING\b', '::VARCHAR', sql)
+    # Table aliases that are reserved words in DuckDB
+    sql = _sub_outside_literals(rf'(?<![\w."])({_RESERVED_ALIASES})(?=\.)', r'"\1"', sql)
+    sql = _sub_outside_literals(rf'\b(FROM|JOIN)(\s+[\w.]+\s+)({_RESERVED_ALIASES})\b', r'\1\2"\3"', sql)
+    sql = _sub_outside_literals(r'\bTABLE\s*\(\s*GENERATOR\s*\(\s*ROWCOUNT\s*=>\s*(\d+)\s*\)\s*\)', r'range(\1) AS _generator(seq4)', sql)
+    sql = _sub_outside_literals(r'\bSEQ4\s*\(\s*\)', 'seq4', sql)
+    sql = _sub_outside_literals(r'\bTABLE\s*\(\s*[\w.]*QUERY_HISTORY_BY_SESSION\s*\([^)]*\)\s*\)', '_query_history', sql)
+    sql = _sub_outside_literals(
+        r'\bARRAY_AGG\s*\(([^()]*)\)\s*WITHIN\s+GROUP\s*\(\s*ORDER\s+BY\s+([^()]*)\)',
+        r'ARRAY_AGG(\1 ORDER BY \2)', sql
+    )
+    # VARIANT paths: col:key[0] -> json_extract_string(col, '$.key[0]')
+    sql = _sub_outside_literals(
+        r'(?<![:\w.])([A-Za-z_][\w.]*)(?<!:):(?!:)([A-Za-z_]\w*)((?:\[\d+\])*)',
+        lambda m: f"json_extract_string({m.group(1)}, '$.{m.group(2)}{m.group(3)}')", sql
+    )
+    # Snowflake arrays are 0-based, DuckDB lists 1-based
+    sql = _sub_outside_literals(r'(?<!\$)\b([A-Za-z_][\w.]*)\[(\d+)\]', _shift_index, sql)
+    sql = _sub_outside_literals(r'\bapprox_percentile\s*\(', 'approx_quantile(', sql)
+    sql = _sub_outside_literals(r'\bTO_TIMESTAMP_LTZ\s*\(', 'CAST_TIMESTAMPTZ(', sql)
+    sql = _rewrite_calls(sql, 'CAST_TIMESTAMPTZ', lambda a: f"CAST({a[0]} AS TIMESTAMPTZ)")
+    sql = _rewrite_calls(sql, 'DATEADD', _dateadd)
+    sql = _rewrite_calls(sql, 'DATEDIFF', _datediff)
+    sql = _rewrite_calls(sql, 'DATE', lambda a: f"CAST({a[0]} AS DATE)")
+    sql = _rewrite_calls(sql, 'IFF', lambda a: f"(CASE WHEN {a[0]} THEN {a[1]} ELSE {a[2]} END)")
+    return sql
+
+
+def split_statements(script):
+    """Split a SQL script on top-level semicolons, dropping comments and blanks"""
+    script = '\n'.join(line for line in script.splitlines() if not line.strip().startswith('--'))
+    masked = _mask_literals(script)
+    statements, start = [], 0
+    for i, ch in enumerate(masked):
+        if ch == ';':
+            statements.append(script[start:i].strip())
+            start = i + 1
+    statements.append(script[start:].strip())
+    return [s for s in statements if s]
+
+
+# ----------------------------------------------------------------------------
+# Session and DataFrame stand-ins
+# ----------------------------------------------------------------------------
+
+class QueryRecord:
+    """Mirrors snowflake.snowpark.QueryRecord"""
+
+    def __init__(self, query_id, sql_text):
+        self.query_id = query_id
+        self.sql_text = sql_text
+
+
+class QueryHistory:
+    """Mirrors the object yielded by Session.query_history()"""
+
+    def __init__(self):
+        self.queries = []
+
+
+class LocalDataFrame:
+    """
+    Lazily composed query over the local database
+
+    Supports the subset of the Snowpark DataFrame API the loaders use.
+    Column expressions are rendered to Snowflake SQL by Snowpark's own
+    analyzer, then translated like any other query.
+    """
+
+    def __init__(self, session, sql, params=None, ordered=False):
+        self._session = session
+        self._sql = sql
+        self._params = params
+        self._ordered = ordered
+
+    def _derive(self, sql, ordered=False):
+        return LocalDataFrame(self._session, sql, self._params, ordered)
+
+    def _expr(self, column):
+        if isinstance(column, str):
+            return f'"{column.strip(chr(34)).upper()}"'
+        return self._session._render(column)
+
+    def filter(self, condition):
+        return self._derive(f"SELECT * FROM ({self._sql}) WHERE {self._expr(condition)}")
+
+    where = filter
+
+    def select(self, *columns):
+        if len(columns) == 1 and isinstance(columns[0], (list, tuple)):
+            columns = columns[0]
+        return self._derive(
+            f"SELECT {', '.join(self._expr(c) for c in columns)} FROM ({self._sql})", self._ordered
+        )
+
+    def sort(self, *columns, ascending=None):
+        if len(columns) == 1 and isinstance(columns[0], (list, tuple)):
+            columns = columns[0]
+        return self._derive(
+            f"SELECT * FROM ({self._sql}) ORDER BY {', '.join(self._expr(c) for c in columns)}", True
+        )
+
+    order_by = sort
+
+    def limit(self, n):
+        if self._ordered:
+            return self._derive(f"{self._sql} LIMIT {int(n)}", True)
+        return self._derive(f"SELECT * FROM ({self._sql}) LIMIT {int(n)}")
+
+    def group_by(self, *columns):
+        if len(columns) == 1 and isinstance(columns[0], (list, tuple)):
+            columns = columns[0]
+        return _LocalGroupBy(self, [self._expr(c) for c in columns])
+
+    groupBy = group_by
+
+    def agg(self, *exprs):
+        return _LocalGroupBy(self, []).agg(*exprs)
+
+    @property
+    def queries(self):
+        return {'queries': [self._sql], 'post_actions': []}
+
+    @property
+    def columns(self):
+        return list(self._session._execute(f"SELECT * FROM ({self._sql}) LIMIT 0", self._params, record=False).columns)
+
+    def to_pandas_batches(self):
+        frame = self._session._execute(self._sql, self._params)
+        if frame.empty:
+            return
+        for start in range(0, len(frame), BATCH_ROWS):
+            yield frame.iloc[start:start + BATCH_ROWS].reset_index(drop=True)
+
+    def to_pandas(self):
+        return self._session._execute(self._sql, self._params)
+
+    toPandas = to_pandas
+
+    def collect(self):
+        frame = self._session._execute(self._sql, self._params)
+        return [Row(**record) for record in frame.astype(object).where(frame.notna(), None).to_dict('records')]
+
+    def count(self):
+        return int(self._session._execute(f"SELECT COUNT(*) AS N FROM ({self._sql})", self._params)['N'].iloc[0])
+
+
+class _LocalGroupBy:
+    def __init__(self, df, keys):
+        self._df = df
+        self._keys = keys
+
+    def agg(self, *exprs):
+        if len(exprs) == 1 and isinstance(exprs[0], (list, tuple)):
+            exprs = exprs[0]
+        select = self._keys + [self._df._expr(e) for e in exprs]
+        sql = f"SELECT {', '.join(select)} FROM ({self._df._sql})"
+        if self._keys:
+            sql += f" GROUP BY {', '.join(self._keys)}"
+        return self._df._derive(sql)
+
+
+class LocalSession:
+    """
+    Session stand-in backed by DuckDB
+
+    Pass `lambda: session` to set_session_factory() in either app's
+    shared/session_provider.py. Every executed query is timed and kept in
+    `executions` as (sql_text, elapsed_ms, rows).
+    """
+
+    def __init__(self, database_path):
+        self._connection = duckdb.connect()
+        self._connection.execute(f"ATTACH '{database_path}' AS {DATABASE} (READ_ONLY)")
+        self._connection.execute(f"USE {DATABASE}.gold")
+        self._analyzer = Analyzer(Session.builder.config('local_testing', True).create())
+        self._history_listeners = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.executions = []
+
+    def _render(self, column):
+        if not isinstance(column, Column):
+            raise TypeError(f"Unsupported column expression: {column!r}")
+        return self._analyzer.analyze(column._expression, defaultdict(dict))
+
+    def _execute(self, sql, params=None, record=True):
+        started = time.perf_counter()
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(f"USE {DATABASE}.gold")
+            if '_query_history' in translate_sql(sql):
+                cursor.register('_query_history', self._query_history_frame())
+            result = cursor.execute(translate_sql(sql), params or None)
+            frame = result.fetch_df() if result.description else pd.DataFrame()
+        finally:
+            cursor.close()
+        frame.columns = [str(c).upper() for c in frame.columns]
+        if record:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                query_id = f"LOCAL-{next(self._ids)}"
+                self.executions.append((sql, elapsed_ms, len(frame), query_id))
+                for history in self._history_listeners:
+                    history.queries.append(QueryRecord(query_id, sql))
+        return frame
+
+    def _query_history_frame(self):
+        with self._lock:
+            rows = [
+                {'QUERY_ID': query_id, 'QUERY_TEXT': sql, 'COMPILATION_TIME': 0,
+                 'EXECUTION_TIME': elapsed_ms, 'BYTES_SCANNED': 1}
+                for sql, elapsed_ms, _, query_id in self.executions
+            ]
+        return pd.DataFrame(rows, columns=['QUERY_ID', 'QUERY_TEXT', 'COMPILATION_TIME', 'EXECUTION_TIME', 'BYTES_SCANNED'])
+
+    def table(self, name):
+        return LocalDataFrame(self, f"SELECT * FROM {name}")
+
+    def sql(self, query, params=None):
+        return LocalDataFrame(self, query, list(params) if params else None)
+
+    @contextmanager
+    def query_history(self):
+        history = QueryHistory()
+        with self._lock:
+            self._history_listeners.append(history)
+        try:
+            yield history
+        finally:
+            with self._lock:
+                self._history_listeners.remove(history)
+
+    def get_current_database(self):
+        return '"HOTEL_PERSONALIZATION"'
+
+    def get_current_schema(self):
+        return '"GOLD"'
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,544 @@
+"""
+Micro-benchmarks for formatters and page transforms
+Times every formatter in the shared modules, applied per cell as the pages
+do, and the pandas pipeline of each page on synthetic frames of 10K, 100K
+and 1M rows. Medians are compared against a JSON baseline with a
+regression threshold per case
+
+Usage:
+    python micro_benchmarks.py --save-baseline           # record micro_baseline.json
+    python micro_benchmarks.py                            # compare; exit code 1 on regression
+    python micro_benchmarks.py --rows 10000 --cases portfolio/ formatters/
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+STREAMLIT_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# The intelligence hub's modules import as the `shared` package, the
+# personalization app's as top-level modules from its shared directory
+sys.path[:0] = [
+    os.path.join(STREAMLIT_DIR, 'intelligence_hub'),
+    os.path.join(STREAMLIT_DIR, 'hotel_personalization', 'shared'),
+]
+
+import page_transforms as hp_pages  # noqa: E402
+import viz_components as hp_viz  # noqa: E402
+from guest_filter import GuestFilterIndex  # noqa: E402
+from shared import formatters as intel_fmt  # noqa: E402
+from shared import page_transforms as intel_pages  # noqa: E402
+from shared.outlier_engine import OutlierEngine  # noqa: E402
+from shared.viz_components_intel import OUTLIER_BANDS, band_styles, style_bands  # noqa: E402
+
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'micro_baseline.json')
+
+# A case regresses when its median exceeds the baseline median by this fraction...
+DEFAULT_THRESHOLD = 0.25
+
+# ...and by at least this many milliseconds, so timer noise on fast cases is ignored
+MIN_REGRESSION_MS = 2.0
+
+# Name -> {'func', 'frame', 'max_rows'}, in registration order
+CASES = {}
+
+
+def case(name, frame, max_rows=None):
+    """Register func(df) as a benchmark case run on the named synthetic frame"""
+    def decorator(func):
+        CASES[name] = {'func': func, 'frame': frame, 'max_rows': max_rows}
+        return func
+    return decorator
+
+
+# =====================================================================
+# Synthetic frames
+# =====================================================================
+
+TIERS = ['Blue', 'Silver', 'Gold', 'Diamond', 'Non-Member']
+SEGMENTS = ['Leisure', 'Business', 'Family', 'Luxury', 'Budget']
+CHURN_RISKS = ['Low Risk', 'Medium Risk', 'High Risk']
+BRANDS = ['Summit Peak Reserve', 'The Grand Pinnacle', 'Urban Nest', 'Harbor Lights', 'Cedar Lodge']
+REGIONS = ['AMER', 'EMEA', 'APAC']
+AMENITY_CATEGORIES = ['Spa', 'Restaurant', 'Bar', 'Room Service', 'WiFi', 'Smart TV', 'Pool']
+ISSUES = ['Room cleanliness', 'Check-in delay', 'Noise', 'WiFi', 'Billing', 'AC/heating', 'Amenity closed']
+
+
+def _categorical(rng, values, rows):
+    return pd.Categorical(rng.choice(values, rows), categories=values)
+
+
+def values_frame(rows, rng):
+    """Numbers spanning the ranges the formatters branch on, with NaN and zeros"""
+    amount = rng.lognormal(mean=7, sigma=3, size=rows)
+    amount[rng.random(rows) < 0.02] = np.nan
+    amount[rng.random(rows) < 0.02] = 0
+    return pd.DataFrame({
+        'AMOUNT': amount,
+        'PCT': rng.uniform(0, 100, rows),
+        'DELTA': rng.normal(0, 15, rows),
+        'RATING': rng.uniform(1, 5, rows),
+        'HOURS': rng.exponential(12, rows),
+    })
+
+
+def guests_frame(rows, rng):
+    """GUEST_360_VIEW_ENHANCED joined with personalization scores"""
+    return pd.DataFrame({
+        'GUEST_ID': [f"GUEST_{i:07d}" for i in range(rows)],
+        'FIRST_NAME': rng.choice(['Ava', 'Liam', 'Mia', 'Noah', 'Zoe', 'Kai'], rows),
+        'LAST_NAME': rng.choice(['Smith', 'Garcia', 'Chen', 'Okafor', 'Novak', 'Rossi'], rows),
+        'EMAIL': [f"guest{i}@example.com" for i in range(rows)],
+        'LOYALTY_TIER': _categorical(rng, TIERS, rows),
+        'CUSTOMER_SEGMENT': _categorical(rng, SEGMENTS, rows),
+        'CHURN_RISK': _categorical(rng, CHURN_RISKS, rows),
+        'TOTAL_BOOKINGS': rng.integers(1, 40, rows),
+        'TOTAL_REVENUE': rng.lognormal(8, 1.2, rows),
+        'AVG_BOOKING_VALUE': rng.lognormal(6, 0.6, rows),
+        'LOYALTY_POINTS': rng.integers(0, 250_000, rows),
+        'TOTAL_AMENITY_SPEND': rng.lognormal(6, 1, rows),
+        'AVG_AMENITY_SATISFACTION': rng.uniform(1, 5, rows),
+        'PERSONALIZATION_READINESS_SCORE': rng.uniform(0, 100, rows),
+        'UPSELL_PROPENSITY_SCORE': rng.uniform(0, 100, rows),
+        'LOYALTY_PROPENSITY_SCORE': rng.uniform(0, 100, rows),
+        'SPA_UPSELL_PROPENSITY': rng.uniform(0, 100, rows),
+        'DINING_UPSELL_PROPENSITY': rng.uniform(0, 100, rows),
+        'TECH_UPSELL_PROPENSITY': rng.uniform(0, 100, rows),
+        'POOL_SERVICES_UPSELL_PROPENSITY': rng.uniform(0, 100, rows),
+    })
+
+
+def spending_frame(rows, rng):
+    """Amenity transactions, with the usage session columns"""
+    return pd.DataFrame({
+        'AMENITY_CATEGORY': rng.choice(AMENITY_CATEGORIES, rows),
+        'AMENITY_TYPE': rng.choice([f"Service {i}" for i in range(40)], rows),
+        'AMOUNT': rng.lognormal(4, 1, rows),
+        'GUEST_SATISFACTION': rng.integers(1, 6, rows),
+        'USAGE_DURATION_MINUTES': rng.exponential(45, rows),
+        'TECH_PROFILE': rng.choice(['Early Adopter', 'Mainstream', 'Traditional'], rows),
+    })
+
+
+def portfolio_frame(rows, rng):
+    """PORTFOLIO_PERFORMANCE_KPIS: one row per hotel per day over 90 days"""
+    hotels = max(1, rows // 90)
+    hotel = np.arange(rows) % hotels
+    day = np.arange(rows) // hotels
+    brand = np.array(BRANDS)[hotel % len(BRANDS)]
+    region = np.array(REGIONS)[hotel % len(REGIONS)]
+    rooms = rng.integers(80, 600, rows)
+    occupied = np.floor(rooms * rng.uniform(0.4, 0.95, rows))
+    adr = rng.uniform(90, 600, rows)
+    occupancy = occupied * 100 / rooms
+    return pd.DataFrame({
+        'PERFORMANCE_DATE': pd.Timestamp('2026-01-01') + pd.to_timedelta(day % 90, unit='D'),
+        'HOTEL_ID': pd.Series(hotel).map(lambda h: f"H{h:05d}"),
+        'HOTEL_NAME': pd.Series(hotel).map(lambda h: f"Hotel {h}"),
+        'BRAND': pd.Categorical(brand, categories=BRANDS),
+        'REGION': pd.Categorical(region, categories=REGIONS),
+        'OCCUPANCY_PCT': occupancy,
+        'ADR': adr,
+        'REVPAR': adr * occupancy / 100,
+        'TOTAL_ROOMS': rooms,
+        'ROOMS_OCCUPIED': occupied,
+        'TOTAL_REVENUE': adr * occupied,
+        'REPEAT_STAY_RATE_PCT': rng.uniform(10, 60, rows),
+        'SATISFACTION_INDEX': rng.normal(85, 4, rows),
+        'SERVICE_CASE_RATE_PER_1000_STAYS': rng.exponential(60, rows),
+        'PERSONALIZATION_COVERAGE_PCT': rng.uniform(5, 80, rows),
+    })
+
+
+def segments_frame(rows, rng):
+    """LOYALTY_SEGMENT_INTELLIGENCE, scaled up from its one row per tier x segment"""
+    tier = rng.choice(TIERS, rows)
+    return pd.DataFrame({
+        'SEGMENT': pd.Series(tier) + ' - ' + rng.choice(SEGMENTS, rows),
+        'LOYALTY_TIER': tier,
+        'ACTIVE_MEMBERS': rng.integers(10, 50_000, rows),
+        'REPEAT_RATE_PCT': rng.uniform(5, 80, rows),
+        'AVG_SPEND_PER_STAY': rng.uniform(150, 1200, rows),
+        'TOTAL_REVENUE': rng.lognormal(13, 1, rows),
+        'ROOM_REVENUE_PCT': rng.uniform(70, 80, rows),
+        'FB_REVENUE_PCT': rng.uniform(10, 15, rows),
+        'SPA_REVENUE_PCT': rng.uniform(3, 8, rows),
+        'OTHER_REVENUE_PCT': rng.uniform(1, 5, rows),
+        'TOP_FRICTION_DRIVER': rng.choice(ISSUES, rows),
+        'RECOMMENDED_FOCUS': rng.choice(['Recognition', 'Recovery', 'Upsell'], rows),
+        'EXPERIENCE_AFFINITY': rng.choice(AMENITY_CATEGORIES, rows),
+        'UNDERUTILIZED_OPPORTUNITY': rng.choice(AMENITY_CATEGORIES, rows),
+    })
+
+
+def cx_frame(rows, rng):
+    """EXPERIENCE_SERVICE_SIGNALS joined with the VIP arrivals columns"""
+    issues = lambda: np.where(rng.random(rows) < 0.1, None, rng.choice(ISSUES, rows))
+    return pd.DataFrame({
+        'BRAND': _categorical(rng, BRANDS, rows),
+        'SERVICE_CASE_RATE': rng.exponential(60, rows),
+        'SERVICE_RECOVERY_SUCCESS_PCT': rng.uniform(40, 100, rows),
+        'TOP_ISSUE_DRIVER_1': issues(),
+        'TOP_ISSUE_DRIVER_2': issues(),
+        'TOP_ISSUE_DRIVER_3': issues(),
+        'GUEST_ID': [f"GUEST_{i:07d}" for i in range(rows)],
+        'TIER_LEVEL': _categorical(rng, TIERS[:4], rows),
+        'CHECK_IN_DATE': pd.Timestamp('2026-04-01') + pd.to_timedelta(rng.integers(0, 7, rows), unit='D'),
+        'CITY': rng.choice(['Denver', 'Lisbon', 'Osaka', 'Austin', 'Cape Town'], rows),
+        'PRIOR_ISSUE_COUNT': rng.integers(0, 5, rows),
+        'ROOM_PREFERENCE': np.where(rng.random(rows) < 0.3, None, rng.choice(['High floor', 'Quiet', 'King bed'], rows)),
+        'CHURN_RISK_SCORE': rng.uniform(0, 100, rows),
+        'LIFETIME_VALUE': rng.lognormal(9, 1, rows),
+    })
+
+
+FRAMES = {
+    'values': values_frame,
+    'guests': guests_frame,
+    'spending': spending_frame,
+    'portfolio': portfolio_frame,
+    'segments': segments_frame,
+    'cx': cx_frame,
+}
+
+
+# =====================================================================
+# Formatters, applied per cell with Series.apply as the pages do
+# =====================================================================
+
+FORMATTER_INPUTS = {
+    'intel.format_currency': (intel_fmt.format_currency, 'AMOUNT'),
+    'intel.format_percent': (intel_fmt.format_percent, 'PCT'),
+    'intel.format_number': (intel_fmt.format_number, 'AMOUNT'),
+    'intel.format_delta': (intel_fmt.format_delta, 'DELTA'),
+    'intel.format_rating': (intel_fmt.format_rating, 'RATING'),
+    'intel.format_large_number': (intel_fmt.format_large_number, 'AMOUNT'),
+    'intel.format_duration': (intel_fmt.format_duration, 'HOURS'),
+    'hp.format_currency': (hp_viz.format_currency, 'AMOUNT'),
+    'hp.format_number': (hp_viz.format_number, 'AMOUNT'),
+    'hp.format_percentage': (hp_viz.format_percentage, 'PCT'),
+}
+
+for _name, (_formatter, _column) in FORMATTER_INPUTS.items():
+    case(f"formatters/{_name}", 'values')(
+        lambda df, formatter=_formatter, column=_column: df[column].apply(formatter)
+    )
+
+
+# =====================================================================
+# Page pipelines - each page's transformations from its page_transforms
+# module, minus rendering. Executive Overview and Revenue Analytics
+# aggregate in the warehouse and only format tens of rows, which the
+# formatter cases cover
+# =====================================================================
+
+# Filter indexes by frame, built once per data version as in the page
+_guest_indexes = {}
+
+
+def _guest_index(df):
+    if id(df) not in _guest_indexes:
+        _guest_indexes.clear()
+        _guest_indexes[id(df)] = GuestFilterIndex(df)
+    return _guest_indexes[id(df)]
+
+
+@case('guest_360/filter_index_build', 'guests')
+def guest_360_filter_index_build(df):
+    return GuestFilterIndex(df)
+
+
+@case('guest_360/filters', 'guests')
+def guest_360_filters(df):
+    index = _guest_index(df)
+    return index.rows(index.select(
+        equals={'LOYALTY_TIER': 'Gold', 'CUSTOMER_SEGMENT': 'Leisure', 'CHURN_RISK': None},
+        ranges={'TOTAL_REVENUE': (1000, 50_000)}
+    ))
+
+
+@case('guest_360/analytics', 'guests')
+def guest_360_analytics(df):
+    index = _guest_index(df)
+    return hp_pages.guest_analytics(df, index, index.rows(index.select(ranges={'TOTAL_REVENUE': (0, None)})))
+
+
+@case('guest_360/profile_picker', 'guests')
+def guest_360_profile_picker(df, limit=50):
+    index = _guest_index(df)
+    return hp_pages.guest_picker_labels(df.take(index.top_rows('TOTAL_REVENUE', index.rows(index.select()), limit)))
+
+
+@case('guest_360/full_download', 'guests')
+def guest_360_full_download(df):
+    index = _guest_index(df)
+    return hp_pages.guest_list_csv(
+        df, index.rows(index.select()), 'TOTAL_REVENUE', True, list(hp_pages.GUEST_TABLE_COLUMNS)
+    )
+
+
+@case('personalization_hub/filters', 'guests')
+def personalization_hub_filters(df):
+    return hp_pages.filter_guests(df, SEGMENTS[:4], TIERS[:4])
+
+
+@case('personalization_hub/propensity', 'guests')
+def personalization_hub_propensity(df):
+    return hp_pages.propensity_scores(df, hp_pages.PRIORITY_PROPENSITY_SCORE)
+
+
+@case('personalization_hub/opportunity_matrix', 'guests')
+def personalization_hub_opportunity_matrix(df):
+    display, targets = hp_pages.priority_targets(df)
+    return display, targets.to_csv(index=False)
+
+
+@case('personalization_hub/segmentation', 'guests')
+def personalization_hub_segmentation(df):
+    return hp_pages.segment_summary(df)
+
+
+@case('personalization_hub/churn', 'guests')
+def personalization_hub_churn(df):
+    churn_counts, revenue_at_risk, high_risk_display, high_risk = hp_pages.churn_summary(df)
+    return churn_counts, revenue_at_risk, high_risk_display, high_risk.to_csv(index=False)
+
+
+@case('amenity_performance/revenue_satisfaction_usage', 'spending')
+def amenity_performance_aggregates(df):
+    return (
+        hp_pages.category_revenue(df),
+        hp_pages.category_volume(df),
+        hp_pages.top_services(df),
+        hp_pages.satisfaction_by_category(df),
+        hp_pages.usage_sessions(df),
+        hp_pages.usage_duration(df),
+        hp_pages.tech_profile_counts(df),
+    )
+
+
+# derived_frame transformations are timed unmemoized, as on a cache miss
+@case('portfolio/kpis', 'portfolio')
+def portfolio_kpis(df):
+    return intel_pages.period_kpis.__wrapped__(df)
+
+
+def _portfolio_outliers(df):
+    engine = OutlierEngine()
+    engine.update(df, 1)
+    return intel_pages.outlier_table(engine.exceptions(df['PERFORMANCE_DATE'].max() - pd.Timedelta(days=30)))
+
+
+@case('portfolio/outliers', 'portfolio')
+def portfolio_outliers(df):
+    return _portfolio_outliers(df)
+
+
+@case('portfolio/outlier_band_styles', 'portfolio')
+def portfolio_outlier_band_styles(df):
+    return band_styles(_portfolio_outliers(df), OUTLIER_BANDS)
+
+
+@case('portfolio/outlier_styling', 'portfolio', max_rows=100_000)
+def portfolio_outlier_styling(df):
+    return style_bands(_portfolio_outliers(df), OUTLIER_BANDS, formats=intel_pages.OUTLIER_FORMATS).to_html()
+
+
+@case('loyalty/kpis', 'segments')
+def loyalty_kpis(df):
+    return intel_pages.member_kpis.__wrapped__(df)
+
+
+@case('loyalty/tier_tables', 'segments')
+def loyalty_tier_tables(df):
+    return intel_pages.tier_ordered.__wrapped__(df), intel_pages.opportunity_table.__wrapped__(df)
+
+
+@case('loyalty/drivers', 'segments')
+def loyalty_drivers(df):
+    return intel_pages.driver_tables.__wrapped__(df)
+
+
+@case('cx/issue_drivers', 'cx')
+def cx_issue_drivers(df):
+    return (
+        intel_pages.issue_drivers(df),
+        intel_pages.brand_means(df, 'SERVICE_CASE_RATE'),
+        intel_pages.brand_means(df, 'SERVICE_RECOVERY_SUCCESS_PCT'),
+    )
+
+
+@case('cx/vip_watchlist', 'cx')
+def cx_vip_watchlist(df):
+    return intel_pages.vip_watchlist(df).to_csv(index=False)
+
+
+# =====================================================================
+# Running and comparing
+# =====================================================================
+
+def _time_case(func, df, repeat):
+    func(df)  # warm-up: first-call import and allocation costs are not the subject
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(df)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'repeat': repeat,
+    }
+
+
+def run(rows_list, selected, repeat, seed=42):
+    """
+    Time the selected cases at every row count
+
+    Returns:
+        dict of "case@rows" -> timing summary
+    """
+    results = {}
+    for rows in rows_list:
+        frames = {}
+        for name, spec in selected.items():
+            if spec['max_rows'] is not None and rows > spec['max_rows']:
+                continue
+            if spec['frame'] not in frames:
+                frames[spec['frame']] = FRAMES[spec['frame']](rows, np.random.default_rng(seed))
+            results[f"{name}@{rows}"] = _time_case(spec['func'], frames[spec['frame']], repeat)
+            print(f"  {name + '@' + str(rows):<60} {results[f'{name}@{rows}']['median_ms']:>12.2f} ms")
+    return results
+
+
+def compare(results, baseline):
+    """
+    Cases slower than their baseline median by more than their threshold
+
+    Returns:
+        list of dicts with case, baseline_ms, median_ms, change and threshold
+    """
+    regressions = []
+    for key, current in results.items():
+        recorded = baseline['cases'].get(key)
+        if recorded is None:
+            continue
+        threshold = recorded.get('threshold', DEFAULT_THRESHOLD)
+        limit = recorded['median_ms'] * (1 + threshold)
+        if current['median_ms'] > limit and current['median_ms'] - recorded['median_ms'] >= MIN_REGRESSION_MS:
+            regressions.append({
+                'case': key,
+                'baseline_ms': recorded['median_ms'],
+                'median_ms': current['median_ms'],
+                'change': current['median_ms'] / recorded['median_ms'] - 1,
+                'threshold': threshold,
+            })
+    return regressions
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+    }
+
+
+def _save_baseline(path, results, threshold, previous):
+    """Write results as the baseline, keeping thresholds tuned by hand in the previous file"""
+    cases = {}
+    for key, current in results.items():
+        kept = (previous or {}).get('cases', {}).get(key, {}).get('threshold')
+        cases[key] = {'median_ms': current['median_ms'], 'threshold': kept if kept is not None else threshold}
+    if previous:
+        # Cases not re-run this time stay as recorded
+        cases = {**previous['cases'], **cases}
+    with open(path, 'w') as f:
+        json.dump({
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': _environment(),
+            'cases': dict(sorted(cases.items())),
+        }, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS))
+    parser.add_argument('--cases', nargs='+', default=[],
+                        help='Only run cases whose name starts with one of these prefixes')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case, after one warm-up')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Record these results as the baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Regression threshold stored for new baseline cases')
+    parser.add_argument('--output', help='Also write the raw results here')
+    parser.add_argument('--list', action='store_true', help='List the cases and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, spec in CASES.items():
+            limit = f" (up to {spec['max_rows']:,} rows)" if spec['max_rows'] else ''
+            print(f"{name:<50} {spec['frame']}{limit}")
+        return
+
+    selected = {
+        name: spec for name, spec in CASES.items()
+        if not args.cases or name.startswith(tuple(args.cases))
+    }
+    if not selected:
+        parser.error(f"No cases match {args.cases}; see --list")
+
+    print(f"Timing {len(selected)} cases at {', '.join(f'{r:,}' for r in args.rows)} rows...")
+    results = run(args.rows, selected, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': _environment(), 'cases': results}, f, indent=2)
+
+    previous = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            previous = json.load(f)
+
+    if args.save_baseline:
+        _save_baseline(args.baseline, results, args.threshold, previous)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if previous is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+
+    if previous.get('environment') != _environment():
+        print(f"\nNote: baseline was recorded on {previous.get('environment')}, now {_environment()}")
+
+    regressions = compare(results, previous)
+    compared = sum(1 for key in results if key in previous['cases'])
+    if not regressions:
+        print(f"\nNo regressions in {compared} cases compared against {args.baseline}")
+        return
+    print(f"\n{'regressed case':<60} {'baseline ms':>12} {'now ms':>12} {'change':>8} {'limit':>7}")
+    for r in regressions:
+        print(
+            f"{r['case']:<60} {r['baseline_ms']:>12.2f} {r['median_ms']:>12.2f} "
+            f"{r['change']:>+8.0%} {r['threshold']:>+7.0%}"
+        )
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
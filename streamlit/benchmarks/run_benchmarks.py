@@ -0,0 +1,226 @@
+"""
+Headless page benchmarks on the local engine
+Builds a synthetic database per guest count, renders every page of both
+apps with streamlit.testing (cold, then warm from cache) and records
+per-loader and per-page timings as JSON
+
+Usage:
+    python run_benchmarks.py                       # 10K, 100K and 1M guests
+    python run_benchmarks.py --guests 10000 --apps intelligence_hub
+"""
+
+import argparse
+import functools
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+STREAMLIT_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+DEFAULT_GUESTS = (10_000, 100_000, 1_000_000)
+
+# Per app: main script (pages are picked from its sidebar radio), session
+# provider, loader and page registry modules
+APPS = {
+    'hotel_personalization': {
+        'main': 'hotel_personalization_app.py',
+        'provider': 'session_provider',
+        'loaders': 'data_loader',
+        'registry': 'page_registry',
+    },
+    'intelligence_hub': {
+        'main': 'hotel_intelligence_hub.py',
+        'provider': 'shared.session_provider',
+        'loaders': 'shared.data_loader_intel',
+        'registry': 'shared.page_registry',
+    },
+}
+
+# Loader functions are the public module functions with these prefixes
+LOADER_PREFIXES = ('get_', 'load_', 'search_')
+
+# Seconds a single page render may take before AppTest gives up
+RENDER_TIMEOUT = 1800
+
+
+def _summarize(timings):
+    return {
+        'calls': len(timings),
+        'total_ms': round(sum(timings), 1),
+        'max_ms': round(max(timings), 1),
+    }
+
+
+def _instrument_loaders(module, timings):
+    """Wrap the module's loader functions so every call is timed into timings[name]"""
+    lock = threading.Lock()
+
+    def timed(name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with lock:
+                    timings[name].append((time.perf_counter() - started) * 1000)
+        if hasattr(func, 'clear'):
+            wrapper.clear = func.clear
+        return wrapper
+
+    for name in dir(module):
+        func = getattr(module, name)
+        if name.startswith(LOADER_PREFIXES) and callable(func) and getattr(func, '__module__', None) == module.__name__:
+            setattr(module, name, timed(name, func))
+
+
+def run_worker(app, database):
+    """
+    Render every page of one app against database
+
+    Pages are rendered through the app's main script, exactly as the sidebar
+    navigation does. Each page is rendered cold (all st.cache_data and
+    st.cache_resource entries cleared first) and then warm (a rerun).
+
+    Returns:
+        dict with 'pages' (page label -> {'cold': ..., 'warm': ...} timings),
+        'page_registry' (compile cost and reruns served from cached code) and
+        'session' (session manager counters)
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    from local_engine import LocalSession
+
+    spec = APPS[app]
+    app_dir = os.path.join(STREAMLIT_DIR, app)
+    os.chdir(app_dir)
+    sys.path[:0] = [app_dir, os.path.join(app_dir, 'shared')]
+
+    session = LocalSession(database)
+    provider = importlib.import_module(spec['provider'])
+    provider.set_session_factory(lambda: session)
+    timings = defaultdict(list)
+    _instrument_loaders(importlib.import_module(spec['loaders']), timings)
+
+    at = AppTest.from_file(os.path.join(app_dir, spec['main']), default_timeout=RENDER_TIMEOUT)
+    at.run()
+    labels = list(at.sidebar.radio[0].options)
+
+    pages = {}
+    for label in labels:
+        page_result = {}
+        for run in ('cold', 'warm'):
+            if run == 'cold':
+                st.cache_data.clear()
+                st.cache_resource.clear()
+            timings.clear()
+            queries_before = len(session.executions)
+            at.sidebar.radio[0].set_value(label)
+            started = time.perf_counter()
+            at.run()
+            wall_ms = (time.perf_counter() - started) * 1000
+            executions = session.executions[queries_before:]
+            page_result[run] = {
+                'wall_ms': round(wall_ms, 1),
+                'queries': len(executions),
+                'query_ms': round(sum(e[1] for e in executions), 1),
+                'rows_fetched': sum(e[2] for e in executions),
+                'loaders': {name: _summarize(values) for name, values in sorted(timings.items())},
+                'exceptions': [str(e.value) for e in at.exception],
+            }
+        pages[label] = page_result
+    session.close()
+    return {
+        'pages': pages,
+        'page_registry': importlib.import_module(spec['registry']).get_page_stats(),
+        'session': provider.get_session_stats(),
+    }
+
+
+def _database_path(data_dir, guests):
+    return os.path.join(data_dir, f"hotel_personalization_{guests}.duckdb")
+
+
+def _print_summary(results):
+    print(f"\n{'guests':>9}  {'page':<50} {'cold ms':>10} {'warm ms':>10} {'queries':>8}  errors")
+    for scale in results['scales']:
+        for app, result in scale['apps'].items():
+            if 'error' in result:
+                print(f"{scale['guests']:>9}  {app:<50} failed (exit code {result['returncode']})")
+                continue
+            for page, runs in result['pages'].items():
+                errors = len(runs['cold']['exceptions']) + len(runs['warm']['exceptions'])
+                print(
+                    f"{scale['guests']:>9}  {app + ' / ' + page:<50} {runs['cold']['wall_ms']:>10.0f} "
+                    f"{runs['warm']['wall_ms']:>10.0f} {runs['cold']['queries']:>8}  {errors or ''}"
+                )
+
+    print(f"\n{'guests':>9}  {'page script':<50} {'compile ms':>10} {'reruns':>8} {'saved ms':>10}")
+    for scale in results['scales']:
+        for app, result in scale['apps'].items():
+            for stats in result.get('page_registry', []):
+                print(
+                    f"{scale['guests']:>9}  {app + ' / ' + stats['page']:<50} {stats['compile_ms']:>10.2f} "
+                    f"{stats['cached_runs']:>8} {stats['saved_ms']:>10.1f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--guests', type=int, nargs='+', default=list(DEFAULT_GUESTS))
+    parser.add_argument('--apps', nargs='+', choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARKS_DIR, '.data'),
+                        help='Where synthetic databases are kept between runs')
+    parser.add_argument('--rebuild', action='store_true', help='Regenerate databases that already exist')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--worker', choices=sorted(APPS), help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.database)))
+        return
+
+    from synthetic_data import build_database
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'scales': []}
+    for guests in args.guests:
+        database = _database_path(args.data_dir, guests)
+        scale = {'guests': guests, 'apps': {}}
+        if args.rebuild or not os.path.exists(database):
+            print(f"Building {guests:,} guest database...")
+            started = time.perf_counter()
+            scale['tables'] = build_database(database, guests, log=lambda m: print(f"  {m}"))
+            scale['build_s'] = round(time.perf_counter() - started, 1)
+
+        # One process per app: each app has its own shared modules and caches
+        for app in args.apps:
+            print(f"Rendering {app} at {guests:,} guests...")
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', app, '--database', database],
+                cwd=BENCHMARKS_DIR, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                # A negative code is the signal that ended the worker (-9: usually out of memory)
+                scale['apps'][app] = {'error': completed.stderr[-4000:], 'returncode': completed.returncode}
+                print(completed.stderr[-4000:], file=sys.stderr)
+                print(f"{app} worker exited with code {completed.returncode}", file=sys.stderr)
+                continue
+            scale['apps'][app] = json.loads(completed.stdout.strip().splitlines()[-1])
+        results['scales'].append(scale)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    _print_summary(results)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
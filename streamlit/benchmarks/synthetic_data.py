@@ -0,0 +1,417 @@
+"""
+Synthetic Bronze data for the local engine
+Bronze tables are created from the DDL in scripts/02_schema_setup.sql and
+filled with generated guests, bookings, stays and service signals; Silver and
+Gold are then built by running scripts/03b_refresh_silver_gold.sql unchanged
+"""
+
+import os
+import re
+import time
+
+import duckdb
+
+from local_engine import DATABASE, split_statements, translate_sql
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts')
+SCHEMA_SCRIPT = os.path.join(SCRIPTS_DIR, '02_schema_setup.sql')
+REFRESH_SCRIPT = os.path.join(SCRIPTS_DIR, '03b_refresh_silver_gold.sql')
+
+# Properties in the portfolio (scripts/01b_expand_to_100_properties.sql)
+HOTEL_COUNT = 100
+
+# Deterministic uniform [0, 1) per (row, salt), so a scale always produces the same data
+_MACROS = """
+CREATE OR REPLACE MACRO u(i, salt) AS (hash(i, salt) % 1000000) / 1000000.0;
+CREATE OR REPLACE MACRO pick(options, i, salt) AS options[1 + CAST(floor(u(i, salt) * len(options)) AS INTEGER)];
+"""
+
+_FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Christopher', 'Nancy', 'Daniel', 'Lisa', 'Matthew', 'Betty', 'Anthony', 'Margaret', 'Mark', 'Sandra',
+    'Donald', 'Ashley', 'Steven', 'Kimberly', 'Paul', 'Emily', 'Andrew', 'Donna', 'Joshua', 'Michelle',
+]
+_LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores',
+    'Green', 'Adams', 'Nelson', 'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell', 'Carter', 'Roberts',
+]
+
+
+def _list(values):
+    return '[' + ', '.join("'" + v.replace("'", "''") + "'" for v in values) + ']'
+
+
+# Bronze row generators, run in order; {guests} and {hotels} are substituted
+_BRONZE_INSERTS = [
+    ('hotel_properties', """
+    SELECT
+        'HOTEL_' || lpad(i::VARCHAR, 3, '0') AS hotel_id,
+        CASE WHEN i % 50 < 10 THEN 'Summit Peak Reserve' WHEN i % 50 < 30 THEN 'Summit Ice'
+             WHEN i % 50 < 40 THEN 'Summit Permafrost' ELSE 'The Snowline by Summit' END AS brand,
+        CASE WHEN i % 50 < 10 THEN 'Luxury' WHEN i % 50 < 30 THEN 'Select Service'
+             WHEN i % 50 < 40 THEN 'Extended Stay' ELSE 'Urban/Modern' END AS category,
+        CASE WHEN i < {hotels} / 2 THEN 'AMER' WHEN i < {hotels} * 3 / 4 THEN 'EMEA' ELSE 'APAC' END AS region,
+        CASE region WHEN 'AMER' THEN pick(['US East', 'US West', 'Canada'], i, 1)
+                    WHEN 'EMEA' THEN pick(['Western Europe', 'Middle East', 'UK'], i, 1)
+                    ELSE pick(['East Asia', 'Southeast Asia', 'Oceania'], i, 1) END AS sub_region,
+        CASE region WHEN 'AMER' THEN pick(['New York', 'Chicago', 'Seattle', 'Austin', 'Toronto'], i, 2)
+                    WHEN 'EMEA' THEN pick(['London', 'Paris', 'Dubai', 'Berlin', 'Rome'], i, 2)
+                    ELSE pick(['Tokyo', 'Singapore', 'Sydney', 'Seoul', 'Bangkok'], i, 2) END AS city,
+        brand || ' ' || city AS hotel_name,
+        CASE region WHEN 'AMER' THEN 'USA' WHEN 'EMEA' THEN 'United Kingdom' ELSE 'Japan' END AS country,
+        3 + CAST(u(i, 3) * 3 AS INTEGER) AS star_rating,
+        120 + 60 * (i % 5) AS total_rooms,
+        'UTC' AS timezone,
+        CURRENT_DATE - CAST(3650 * u(i, 4) AS INTEGER) AS opened_date,
+        CURRENT_TIMESTAMP AS created_at,
+        CURRENT_TIMESTAMP AS updated_at
+    FROM range({hotels}) t(i)
+    """),
+    ('guest_profiles', f"""
+    SELECT
+        'GUEST_' || lpad(i::VARCHAR, 7, '0') AS guest_id,
+        pick({_list(_FIRST_NAMES)}, i, 1) AS first_name,
+        pick({_list(_LAST_NAMES)}, i, 2) AS last_name,
+        lower(first_name) || '.' || lower(last_name) || (i % 997)::VARCHAR || '@example.com' AS email,
+        '+1' || lpad((hash(i, 3) % 10000000000)::VARCHAR, 10, '0') AS phone,
+        CURRENT_DATE - CAST(365 * (18 + 60 * u(i, 4)) AS INTEGER) AS date_of_birth,
+        CASE WHEN i % 2 = 0 THEN 'Male' ELSE 'Female' END AS gender,
+        pick(['USA', 'Canada', 'UK', 'Germany', 'France', 'Japan', 'Australia', 'Mexico', 'Brazil', 'India'], i, 5) AS nationality,
+        pick(['English', 'Spanish', 'French', 'German', 'Mandarin', 'Japanese'], i, 6) AS language_preference,
+        pick(['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia'], i, 7) AS city,
+        'USA' AS country,
+        CURRENT_TIMESTAMP - to_days(CAST(1500 * u(i, 8) AS INTEGER)) AS registration_date,
+        CURRENT_TIMESTAMP AS last_updated,
+        u(i, 9) < 0.67 AS marketing_opt_in,
+        '{{"email": true, "sms": false, "phone": false}}' AS communication_preferences
+    FROM range({{guests}}) t(i)
+    """),
+    ('loyalty_program', """
+    SELECT
+        'LOYALTY_' || lpad(i::VARCHAR, 7, '0') AS loyalty_id,
+        'GUEST_' || lpad(i::VARCHAR, 7, '0') AS guest_id,
+        'Hotel Rewards Program' AS program_name,
+        'HRP' || lpad(i::VARCHAR, 10, '0') AS member_number,
+        CASE WHEN i % 100 < 10 THEN 'Diamond' WHEN i % 100 < 30 THEN 'Gold'
+             WHEN i % 100 < 60 THEN 'Silver' ELSE 'Blue' END AS tier_level,
+        1000 + CAST(50000 * u(i, 1) AS INTEGER) AS points_balance,
+        5000 + CAST(200000 * u(i, 2) AS INTEGER) AS lifetime_points,
+        CURRENT_DATE - CAST(1095 * u(i, 3) AS INTEGER) AS tier_qualification_date,
+        i % 10 AS referral_count,
+        'Active' AS status,
+        CURRENT_DATE - CAST(i % 30 AS INTEGER) AS last_activity_date,
+        CURRENT_TIMESTAMP AS created_at,
+        CURRENT_TIMESTAMP AS updated_at
+    FROM range({guests} // 2) t(i)
+    """),
+    # 1-5 bookings per guest, from two years back to 90 days ahead
+    ('booking_history', """
+    SELECT
+        'BK_' || i::VARCHAR || '_' || j::VARCHAR AS booking_id,
+        'GUEST_' || lpad(i::VARCHAR, 7, '0') AS guest_id,
+        'HOTEL_' || lpad((hash(i, j, 1) % {hotels})::VARCHAR, 3, '0') AS hotel_id,
+        CURRENT_DATE + 90 - CAST(820 * u(i * 8 + j, 2) AS INTEGER) AS check_in_date,
+        1 + CAST(6 * u(i * 8 + j, 3) AS INTEGER) AS num_nights,
+        check_in_date + num_nights AS check_out_date,
+        CAST(120 * u(i * 8 + j, 4) AS INTEGER) AS advance_booking_days,
+        CAST(check_in_date AS TIMESTAMP) - to_days(advance_booking_days) AS booking_date,
+        1 + CAST(2 * u(i * 8 + j, 5) AS INTEGER) AS num_adults,
+        CAST(3 * u(i * 8 + j, 6) AS INTEGER) % 3 AS num_children,
+        pick(['Standard King', 'Standard Queen', 'Deluxe King', 'Junior Suite', 'Suite'], i * 8 + j, 7) AS room_type,
+        pick(['BAR', 'AAA', 'CORP', 'PROMO'], i * 8 + j, 8) AS rate_code,
+        CAST(num_nights * (110 + 320 * u(i * 8 + j, 9)) AS DECIMAL(10, 2)) AS total_amount,
+        'USD' AS currency,
+        pick(['Direct', 'OTA', 'Mobile App', 'Phone', 'Travel Agent'], i * 8 + j, 10) AS booking_channel,
+        CASE WHEN u(i * 8 + j, 11) < 0.05 THEN 'Cancelled' WHEN u(i * 8 + j, 11) < 0.06 THEN 'No-show'
+             ELSE 'Confirmed' END AS booking_status,
+        pick(['Credit Card', 'Debit Card', 'Points'], i * 8 + j, 12) AS payment_method,
+        booking_date AS created_at,
+        booking_date AS updated_at
+    FROM range({guests}) g(i), range(5) b(j)
+    WHERE j <= CAST(floor(u(i, 0) * 5) AS INTEGER)
+    """),
+    ('stay_history', """
+    SELECT
+        'ST' || substr(booking_id, 3) AS stay_id,
+        booking_id,
+        guest_id,
+        hotel_id,
+        (100 + hash(booking_id) % 900)::VARCHAR AS room_number,
+        CAST(check_in_date AS TIMESTAMP) + to_hours(14 + CAST(6 * u(hash(booking_id), 1) AS INTEGER)) AS actual_check_in,
+        CAST(check_out_date AS TIMESTAMP) + to_hours(8 + CAST(4 * u(hash(booking_id), 2) AS INTEGER)) AS actual_check_out,
+        room_type,
+        1 + hash(booking_id) % 12 AS floor_number,
+        pick(['City', 'Ocean', 'Garden', 'Courtyard'], hash(booking_id), 3) AS view_type,
+        pick(['King', 'Queen', 'Double'], hash(booking_id), 4) AS bed_type,
+        CAST(250 * u(hash(booking_id), 5) AS DECIMAL(10, 2)) AS incidental_charges,
+        total_amount AS room_charges,
+        CAST(total_amount * 0.1 AS DECIMAL(10, 2)) AS tax_amount,
+        CAST(total_amount * 1.1 + incidental_charges AS DECIMAL(10, 2)) AS total_charges,
+        FALSE AS no_show,
+        u(hash(booking_id), 6) < 0.03 AS early_departure,
+        u(hash(booking_id), 7) < 0.15 AS late_checkout,
+        CASE WHEN u(hash(booking_id), 8) < 0.05 THEN 2 WHEN u(hash(booking_id), 8) < 0.2 THEN 3
+             WHEN u(hash(booking_id), 8) < 0.6 THEN 4 ELSE 5 END AS guest_satisfaction_score,
+        CASE WHEN u(hash(booking_id), 9) < 0.02 THEN '{"notes": ["Complained about noise"]}' END AS staff_notes,
+        CAST(check_in_date AS TIMESTAMP) AS created_at
+    FROM bronze.booking_history
+    WHERE booking_status = 'Confirmed' AND check_in_date < CURRENT_DATE
+    """),
+    ('room_preferences', """
+    SELECT
+        'RP_' || i::VARCHAR AS preference_id,
+        'GUEST_' || lpad(i::VARCHAR, 7, '0') AS guest_id,
+        pick(['Standard King', 'Deluxe King', 'Suite'], i, 1) AS room_type_preference,
+        pick(['high', 'low', 'no_preference'], i, 2) AS floor_preference,
+        pick(['ocean', 'city', 'no_preference'], i, 3) AS view_preference,
+        pick(['king', 'queen', 'no_preference'], i, 4) AS bed_type_preference,
+        FALSE AS smoking_preference,
+        u(i, 5) < 0.05 AS accessibility_needs,
+        66 + CAST(12 * u(i, 6) AS INTEGER) AS temperature_preference,
+        pick(['dim', 'bright', 'natural'], i, 7) AS lighting_preference,
+        pick(['soft', 'firm', 'memory_foam'], i, 8) AS pillow_type_preference,
+        pick(['quiet', 'moderate'], i, 9) AS noise_level_preference,
+        CURRENT_TIMESTAMP AS last_updated,
+        CURRENT_TIMESTAMP AS created_at
+    FROM range({guests}) t(i)
+    WHERE u(i, 0) < 0.6
+    """),
+    ('service_preferences', """
+    SELECT
+        'SP_' || i::VARCHAR AS preference_id,
+        'GUEST_' || lpad(i::VARCHAR, 7, '0') AS guest_id,
+        '{"cuisine": ["italian"]}' AS dining_preferences,
+        CASE WHEN u(i, 1) < 0.4 THEN '{"massage": true}' END AS spa_services,
+        CASE WHEN u(i, 2) < 0.5 THEN '{"gym": true}' END AS fitness_preferences,
+        pick(['email', 'sms', 'app'], i, 3) AS preferred_communication_method,
+        CURRENT_TIMESTAMP AS last_updated,
+        CURRENT_TIMESTAMP AS created_at
+    FROM range({guests}) t(i)
+    WHERE u(i, 0) < 0.5
+    """),
+    ('social_media_activity', """
+    SELECT
+        'SM_' || i::VARCHAR || '_' || j::VARCHAR AS activity_id,
+        'GUEST_' || lpad(i::VARCHAR, 7, '0') AS guest_id,
+        pick(['Instagram', 'Facebook', 'Twitter', 'TripAdvisor'], i * 4 + j, 1) AS platform,
+        pick(['Post', 'Review', 'Check-in'], i * 4 + j, 2) AS activity_type,
+        CAST(2 * u(i * 4 + j, 3) - 0.6 AS DECIMAL(3, 2)) AS sentiment_score,
+        '{"likes": ' || (hash(i, j) % 200)::VARCHAR || ', "shares": ' || (hash(i, j, 1) % 20)::VARCHAR
+            || ', "comments": ' || (hash(i, j, 2) % 30)::VARCHAR || '}' AS engagement_metrics,
+        u(i * 4 + j, 4) < 0.5 AS hotel_mention,
+        u(i * 4 + j, 5) < 0.3 AS brand_mention,
+        CURRENT_TIMESTAMP - to_days(CAST(365 * u(i * 4 + j, 6) AS INTEGER)) AS activity_date,
+        CURRENT_TIMESTAMP AS created_at
+    FROM range({guests}) g(i), range(3) a(j)
+    WHERE u(i, 0) < 0.4 AND j <= CAST(floor(u(i, 10) * 3) AS INTEGER)
+    """),
+    # 0-3 paid amenity transactions per stay
+    ('amenity_transactions', """
+    SELECT
+        'TX_' || substr(stay_id, 4) || '_' || k::VARCHAR AS transaction_id,
+        stay_id,
+        guest_id,
+        pick(['spa', 'restaurant', 'bar', 'room_service', 'wifi', 'smart_tv', 'pool_services'], hash(stay_id, k), 1) AS amenity_category,
+        amenity_category || ' service' AS service_name,
+        actual_check_in + to_hours(CAST(40 * u(hash(stay_id, k), 2) AS INTEGER)) AS transaction_date,
+        CAST(CASE amenity_category WHEN 'spa' THEN 90 + 160 * u(hash(stay_id, k), 3)
+                                   WHEN 'wifi' THEN 10 + 10 * u(hash(stay_id, k), 3)
+                                   WHEN 'smart_tv' THEN 8 + 12 * u(hash(stay_id, k), 3)
+                                   ELSE 15 + 85 * u(hash(stay_id, k), 3) END AS DECIMAL(10, 2)) AS amount,
+        1 AS quantity,
+        1 + CAST(5 * u(hash(stay_id, k), 4) AS INTEGER) % 5 + 1 AS guest_satisfaction,
+        'paid' AS service_type,
+        u(hash(stay_id, k), 5) < 0.2 AS is_premium_service,
+        u(hash(stay_id, k), 6) < 0.3 AS is_repeat_service,
+        10 + CAST(110 * u(hash(stay_id, k), 7) AS INTEGER) AS duration_minutes,
+        hotel_id,
+        booking_id
+    FROM bronze.stay_history, range(3) a(k)
+    WHERE k < CAST(floor(u(hash(stay_id), 20) * 4) AS INTEGER)
+    """),
+    ('amenity_usage', """
+    SELECT
+        'AU_' || substr(stay_id, 4) || '_' || k::VARCHAR AS usage_id,
+        stay_id,
+        guest_id,
+        pick(['wifi', 'smart_tv', 'pool'], hash(stay_id, k), 1) AS amenity_category,
+        amenity_category AS amenity_name,
+        actual_check_in + to_hours(CAST(40 * u(hash(stay_id, k), 2) AS INTEGER)) AS usage_start_time,
+        10 + CAST(170 * u(hash(stay_id, k), 3) AS INTEGER) AS usage_duration_minutes,
+        usage_start_time + to_minutes(usage_duration_minutes) AS usage_end_time,
+        CASE WHEN u(hash(stay_id, k), 4) < 0.3 THEN 'paid' ELSE 'free' END AS usage_type,
+        1 + CAST(5 * u(hash(stay_id, k), 5) AS INTEGER) % 5 + 1 AS guest_satisfaction,
+        1 + CAST(3 * u(hash(stay_id, k), 6) AS INTEGER) AS usage_frequency,
+        CASE WHEN amenity_category = 'wifi' THEN CAST(800 * u(hash(stay_id, k), 7) AS INTEGER) ELSE 0 END AS data_consumed_mb,
+        usage_start_time AS created_at
+    FROM bronze.stay_history, range(3) a(k)
+    WHERE k < CAST(floor(u(hash(stay_id), 21) * 4) AS INTEGER)
+    """),
+    ('feedback_reviews', """
+    SELECT
+        'RV' || substr(stay_id, 3) AS review_id,
+        guest_id,
+        stay_id,
+        hotel_id,
+        guest_satisfaction_score AS overall_rating,
+        guest_satisfaction_score AS service_rating,
+        actual_check_out + to_days(2) AS review_date,
+        pick(['TripAdvisor', 'Google', 'Booking.com'], hash(stay_id), 1) AS platform,
+        TRUE AS verified_stay,
+        actual_check_out AS created_at
+    FROM bronze.stay_history
+    WHERE u(hash(stay_id), 22) < 0.3
+    """),
+    ('service_cases', """
+    SELECT
+        'CASE_' || substr(stay_id, 4) AS case_id,
+        stay_id,
+        guest_id,
+        hotel_id,
+        CASE WHEN u(hash(stay_id), 30) < 0.40 THEN 'billing' WHEN u(hash(stay_id), 30) < 0.65 THEN 'room_readiness'
+             WHEN u(hash(stay_id), 30) < 0.80 THEN 'noise' WHEN u(hash(stay_id), 30) < 0.90 THEN 'amenity'
+             ELSE pick(['staff', 'cleanliness', 'tech'], hash(stay_id), 31) END AS case_type,
+        CASE WHEN u(hash(stay_id), 32) < 0.60 THEN 'low' WHEN u(hash(stay_id), 32) < 0.90 THEN 'medium'
+             WHEN u(hash(stay_id), 32) < 0.98 THEN 'high' ELSE 'critical' END AS severity,
+        actual_check_in + to_hours(CAST(20 * u(hash(stay_id), 33) AS INTEGER)) AS reported_at,
+        15 + CAST(300 * u(hash(stay_id), 34) AS INTEGER) AS resolution_time_minutes,
+        reported_at + to_minutes(resolution_time_minutes) AS resolved_at,
+        pick(['front_desk', 'phone', 'app', 'email'], hash(stay_id), 35) AS channel,
+        'resolved' AS status,
+        1 + CAST(4 * u(hash(stay_id), 36) AS INTEGER) AS guest_impact_score,
+        reported_at AS created_at,
+        reported_at AS updated_at
+    FROM bronze.stay_history
+    WHERE u(hash(stay_id), 23) < 0.08
+    """),
+    ('issue_tracking', """
+    SELECT
+        'ISSUE' || substr(sc.case_id, 5) AS issue_id,
+        sc.case_id,
+        sc.hotel_id,
+        hp.brand,
+        hp.region,
+        sc.case_type AS issue_category,
+        pick(['housekeeping delay', 'rate mismatch', 'HVAC noise', 'WiFi not working', 'slow check-in'], hash(sc.case_id), 1) AS issue_driver,
+        -1 - CAST(4 * u(hash(sc.case_id), 2) AS INTEGER) AS impact_on_satisfaction,
+        u(hash(sc.case_id), 3) < 0.3 AS requires_followup,
+        u(hash(sc.case_id), 4) < 0.2 AS recurring_issue_flag,
+        pick(['front_desk', 'housekeeping', 'management', 'facilities'], hash(sc.case_id), 5) AS responsible_department,
+        sc.severity AS priority,
+        sc.reported_at AS created_at,
+        sc.reported_at AS updated_at
+    FROM bronze.service_cases sc
+    JOIN bronze.hotel_properties hp ON sc.hotel_id = hp.hotel_id
+    """),
+    ('sentiment_data', """
+    SELECT
+        'SENT' || substr(stay_id, 3) AS sentiment_id,
+        guest_id,
+        stay_id,
+        hotel_id,
+        pick(['review', 'survey', 'social', 'feedback', 'app_rating'], hash(stay_id), 1) AS source,
+        CAST(200 * u(hash(stay_id), 2) - 70 AS INTEGER) AS sentiment_score,
+        CASE WHEN sentiment_score < -20 THEN 'negative' WHEN sentiment_score < 40 THEN 'neutral'
+             ELSE 'positive' END AS sentiment_label,
+        'en' AS language,
+        pick(['TripAdvisor', 'Google', 'App'], hash(stay_id), 3) AS platform,
+        actual_check_out + to_hours(6) AS posted_at,
+        TRUE AS verified,
+        u(hash(stay_id), 4) < 0.5 AS response_provided,
+        actual_check_out AS created_at,
+        actual_check_out AS updated_at
+    FROM bronze.stay_history
+    WHERE u(hash(stay_id), 24) < 0.3
+    """),
+    ('service_recovery_actions', """
+    SELECT
+        'REC' || substr(case_id, 5) AS recovery_id,
+        case_id,
+        guest_id,
+        hotel_id,
+        stay_id,
+        CASE WHEN u(hash(case_id), 1) < 0.35 THEN 'points_credit' WHEN u(hash(case_id), 1) < 0.60 THEN 'room_upgrade'
+             WHEN u(hash(case_id), 1) < 0.80 THEN 'comp_service' WHEN u(hash(case_id), 1) < 0.95 THEN 'discount'
+             ELSE 'apology' END AS recovery_type,
+        CAST(20 + 180 * u(hash(case_id), 2) AS DECIMAL(10, 2)) AS recovery_value_usd,
+        resolved_at AS offered_at,
+        CASE WHEN u(hash(case_id), 3) < 0.60 THEN 'accepted' WHEN u(hash(case_id), 3) < 0.85 THEN 'no_response'
+             ELSE 'declined' END AS guest_response,
+        resolved_at AS created_at,
+        resolved_at AS updated_at
+    FROM bronze.service_cases
+    WHERE u(hash(case_id), 0) < 0.5
+    """),
+]
+
+
+def _bronze_ddl():
+    """CREATE TABLE statements of the BRONZE schema in 02_schema_setup.sql"""
+    with open(SCHEMA_SCRIPT) as f:
+        script = f.read()
+    bronze = re.search(r'USE SCHEMA BRONZE;(.*?)USE SCHEMA', script, re.DOTALL | re.IGNORECASE).group(1)
+    statements = []
+    for statement in split_statements(bronze):
+        if not statement.upper().startswith('CREATE'):
+            continue
+        statement = re.sub(r'\bPRIMARY KEY\b', '', statement, flags=re.IGNORECASE)
+        statement = re.sub(r'\b(VARIANT|TEXT)\b', 'VARCHAR', statement, flags=re.IGNORECASE)
+        statement = re.sub(r'\bTIMESTAMP_NTZ\b', 'TIMESTAMP', statement, flags=re.IGNORECASE)
+        statement = re.sub(r'CREATE OR REPLACE TABLE\s+', 'CREATE OR REPLACE TABLE bronze.', statement, flags=re.IGNORECASE)
+        statements.append(translate_sql(statement))
+    return statements
+
+
+def build_database(path, guests, log=print):
+    """
+    Create a local HOTEL_PERSONALIZATION database for the given guest count
+
+    Args:
+        path: DuckDB file to (re)create
+        guests: Number of guest profiles; bookings, stays and signals scale with it
+        log: Progress callback
+
+    Returns:
+        dict of table name -> row count
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    connection = duckdb.connect()
+    connection.execute(f"ATTACH '{path}' AS {DATABASE}")
+    connection.execute(f"USE {DATABASE}")
+    for schema in ('bronze', 'silver', 'gold'):
+        connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    connection.execute(_MACROS)
+
+    started = time.perf_counter()
+    for statement in _bronze_ddl():
+        connection.execute(statement)
+    for table, select in _BRONZE_INSERTS:
+        connection.execute(
+            f"INSERT INTO bronze.{table} BY NAME "
+            + select.replace('{guests}', str(int(guests))).replace('{hotels}', str(HOTEL_COUNT))
+        )
+    log(f"bronze: {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    with open(REFRESH_SCRIPT) as f:
+        refresh = f.read()
+    for statement in split_statements(refresh):
+        if statement.upper().startswith('SELECT'):
+            continue
+        connection.execute(translate_sql(statement))
+    log(f"silver/gold: {time.perf_counter() - started:.1f}s")
+
+    counts = {
+        f"{schema}.{table}".upper(): connection.execute(f"SELECT COUNT(*) FROM {DATABASE}.{schema}.{table}").fetchone()[0]
+        for schema, table in connection.execute(
+            "SELECT schema_name, table_name FROM duckdb_tables() WHERE database_name = ? AND NOT temporary ORDER BY 1, 2",
+            [DATABASE]
+        ).fetchall()
+    }
+    connection.close()
+    return counts
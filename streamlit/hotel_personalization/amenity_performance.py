@@ -4,12 +4,17 @@ Target Users: Operations Managers, Amenity Service Managers, F&B Directors
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
+from lazy_imports import lazy_import
+px = lazy_import('plotly.express')
 from data_loader import get_amenity_analytics, get_amenity_spending, get_amenity_usage
+from page_transforms import (
+    category_revenue, category_volume, top_services, satisfaction_by_category,
+    usage_sessions, usage_duration, tech_profile_counts
+)
 from viz_components import (
     create_kpi_card, format_currency, format_number, format_percentage,
     create_pie_chart, create_bar_chart, create_gauge_chart, create_treemap,
@@ -63,38 +68,29 @@ with tab1:
         
         with col1:
             # Revenue by category
-            category_revenue = spending_df.groupby('AMENITY_CATEGORY')['AMOUNT'].sum().reset_index()
-            category_revenue.columns = ['Category', 'Revenue']
-            category_revenue = category_revenue.sort_values('Revenue', ascending=False)
+            revenue_by_category = category_revenue(spending_df)
             
-            fig = create_pie_chart(category_revenue, 'Revenue', 'Category',
+            fig = create_pie_chart(revenue_by_category, 'Revenue', 'Category',
                                   'Revenue Distribution by Amenity Category')
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            fig = create_bar_chart(category_revenue, 'Category', 'Revenue',
+            fig = create_bar_chart(revenue_by_category, 'Category', 'Revenue',
                                   'Revenue by Category (Bar Chart)')
             st.plotly_chart(fig, use_container_width=True)
         
         # Transaction volume by category
         st.markdown("### Transaction Volume Analysis")
-        category_volume = spending_df.groupby('AMENITY_CATEGORY').size().reset_index()
-        category_volume.columns = ['Category', 'Transactions']
-        category_volume = category_volume.sort_values('Transactions', ascending=False)
+        volume_by_category = category_volume(spending_df)
         
-        fig = create_bar_chart(category_volume, 'Category', 'Transactions',
+        fig = create_bar_chart(volume_by_category, 'Category', 'Transactions',
                               'Transaction Volume by Category')
         st.plotly_chart(fig, use_container_width=True)
         
         # Top services
         if 'AMENITY_TYPE' in spending_df.columns:
             st.markdown("### Top 10 Revenue-Generating Services")
-            top_services = spending_df.groupby('AMENITY_TYPE')['AMOUNT'].sum().reset_index()
-            top_services.columns = ['Service', 'Revenue']
-            top_services = top_services.sort_values('Revenue', ascending=False).head(10)
-            top_services_display = top_services.copy()
-            top_services_display['Revenue'] = top_services_display['Revenue'].apply(format_currency)
-            st.dataframe(top_services_display, use_container_width=True)
+            st.dataframe(top_services(spending_df), use_container_width=True)
     else:
         st.info("Detailed amenity spending data not available")
 
@@ -106,18 +102,16 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            satisfaction_by_category = spending_df.groupby('AMENITY_CATEGORY')['GUEST_SATISFACTION'].mean().reset_index()
-            satisfaction_by_category.columns = ['Category', 'Avg Satisfaction']
-            satisfaction_by_category = satisfaction_by_category.sort_values('Avg Satisfaction', ascending=False)
+            category_satisfaction = satisfaction_by_category(spending_df)
             
-            fig = create_bar_chart(satisfaction_by_category, 'Category', 'Avg Satisfaction',
+            fig = create_bar_chart(category_satisfaction, 'Category', 'Avg Satisfaction',
                                   'Average Satisfaction by Category')
             fig.update_yaxes(range=[0, 5])
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Gauge charts for top categories
-            for _, row in satisfaction_by_category.head(3).iterrows():
+            for _, row in category_satisfaction.head(3).iterrows():
                 fig = create_gauge_chart(row['Avg Satisfaction'], row['Category'], 5)
                 st.plotly_chart(fig, use_container_width=True)
         
@@ -139,8 +133,7 @@ with tab3:
         with col1:
             if 'AMENITY_CATEGORY' in usage_df.columns:
                 # Usage by category
-                usage_counts = usage_df.groupby('AMENITY_CATEGORY').size().reset_index()
-                usage_counts.columns = ['Category', 'Sessions']
+                usage_counts = usage_sessions(usage_df)
                 
                 fig = create_pie_chart(usage_counts, 'Sessions', 'Category',
                                       'Infrastructure Usage Sessions by Category')
@@ -149,8 +142,7 @@ with tab3:
         with col2:
             if 'USAGE_DURATION_MINUTES' in usage_df.columns and 'AMENITY_CATEGORY' in usage_df.columns:
                 # Average duration
-                avg_duration = usage_df.groupby('AMENITY_CATEGORY')['USAGE_DURATION_MINUTES'].mean().reset_index()
-                avg_duration.columns = ['Category', 'Avg Duration (min)']
+                avg_duration = usage_duration(usage_df)
                 
                 fig = create_bar_chart(avg_duration, 'Category', 'Avg Duration (min)',
                                       'Average Session Duration by Category')
@@ -159,11 +151,10 @@ with tab3:
         # Tech adoption insights
         st.markdown("### Technology Adoption Insights")
         if 'TECH_PROFILE' in usage_df.columns:
-            tech_profile_counts = usage_df.groupby('TECH_PROFILE').size().reset_index()
-            tech_profile_counts.columns = ['Tech Profile', 'Users']
+            tech_profiles = tech_profile_counts(usage_df)
             
             col1, col2, col3 = st.columns(3)
-            for idx, row in tech_profile_counts.iterrows():
+            for idx, row in tech_profiles.iterrows():
                 with [col1, col2, col3][idx % 3]:
                     create_kpi_card(row['Tech Profile'], format_number(row['Users']))
     else:
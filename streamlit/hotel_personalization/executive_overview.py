@@ -4,15 +4,16 @@ Target Users: C-Suite Executives, Board Members, Property Owners
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
+from lazy_imports import lazy_import
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 from data_loader import (
-    get_guest_360_data, get_summary_metrics, get_personalization_scores,
-    get_amenity_analytics
+    get_guest_aggregates, get_top_guests, get_guest_value_histogram,
+    get_summary_metrics, get_personalization_scores, get_amenity_analytics
 )
 from viz_components import (
     create_kpi_card, format_currency, format_number, format_percentage,
@@ -27,47 +28,68 @@ st.title("📊 Executive Overview Dashboard")
 st.markdown("**Strategic Business Intelligence & KPIs**")
 st.markdown("---")
 
-# Load data
-guests_df = get_guest_360_data()
+# Load data - guest metrics are aggregated in the warehouse, only results come back
 scores_df = get_personalization_scores()
 metrics = get_summary_metrics()
 
+# Every ungrouped card comes from one conditional-aggregate query
+guest_totals = get_guest_aggregates((
+    ('TOTAL_GUESTS', 'count', 'GUEST_ID'),
+    ('TOTAL_REVENUE', 'sum', 'TOTAL_REVENUE'),
+    ('AVG_REVENUE', 'avg', 'TOTAL_REVENUE'),
+    ('AVG_SATISFACTION', 'avg', 'AVG_AMENITY_SATISFACTION'),
+    ('LOYALTY_ENROLLED', 'count', 'LOYALTY_TIER'),
+    ('TOTAL_BOOKINGS', 'sum', 'TOTAL_BOOKINGS'),
+    ('AVG_BOOKINGS', 'avg', 'TOTAL_BOOKINGS'),
+    ('REPEAT_GUESTS', 'count', 'GUEST_ID', (('TOTAL_BOOKINGS', '>', 1),)),
+    ('HIGH_CHURN', 'count', 'GUEST_ID', (('CHURN_RISK', '==', 'High Risk'),)),
+    ('ZERO_REVENUE', 'count', 'GUEST_ID', (('TOTAL_REVENUE', '==', 0),)),
+    ('ACTIVE_GUESTS', 'count', 'GUEST_ID', (('TOTAL_REVENUE', '>', 0),)),
+    ('AVG_ACTIVE_REVENUE', 'avg', 'TOTAL_REVENUE', (('TOTAL_REVENUE', '>', 0),)),
+    ('LOW_SATISFACTION', 'count', 'GUEST_ID', (('AVG_AMENITY_SATISFACTION', '<', 3),)),
+    ('VIP_GUESTS', 'count', 'GUEST_ID', (('CUSTOMER_SEGMENT', '==', 'VIP'),)),
+    ('VIP_REVENUE', 'sum', 'TOTAL_REVENUE', (('CUSTOMER_SEGMENT', '==', 'VIP'),)),
+    ('VIP_AVG_REVENUE', 'avg', 'TOTAL_REVENUE', (('CUSTOMER_SEGMENT', '==', 'VIP'),)),
+)).iloc[0]
+total_guests = int(guest_totals['TOTAL_GUESTS'])
+has_guests = total_guests > 0
+
+repeat_guests = int(guest_totals['REPEAT_GUESTS'])
+high_churn = int(guest_totals['HIGH_CHURN'])
+
 # Business Health Scorecard
 st.markdown("## 🎯 Business Health Scorecard")
 
 col1, col2, col3, col4, col5, col6 = st.columns(6)
 
 with col1:
-    total_guests = len(guests_df) if not guests_df.empty else 0
     create_kpi_card("Total Guests", format_number(total_guests))
 
 with col2:
-    total_revenue = guests_df['TOTAL_REVENUE'].sum() if not guests_df.empty else 0
+    total_revenue = guest_totals['TOTAL_REVENUE'] if has_guests else 0
     create_kpi_card("Total Revenue", format_currency(total_revenue))
 
 with col3:
-    avg_satisfaction = guests_df['AVG_AMENITY_SATISFACTION'].mean() if not guests_df.empty else 0
+    avg_satisfaction = guest_totals['AVG_SATISFACTION'] if has_guests else 0
     create_kpi_card("Avg Satisfaction", f"{avg_satisfaction:.2f}/5.0")
 
 with col4:
-    if not guests_df.empty and 'LOYALTY_TIER' in guests_df.columns:
-        loyalty_enrolled = len(guests_df[guests_df['LOYALTY_TIER'].notna()])
+    if has_guests:
+        loyalty_enrolled = int(guest_totals['LOYALTY_ENROLLED'])
         loyalty_rate = (loyalty_enrolled / total_guests * 100) if total_guests > 0 else 0
         create_kpi_card("Loyalty Rate", format_percentage(loyalty_rate))
     else:
         create_kpi_card("Loyalty Rate", "N/A")
 
 with col5:
-    if not guests_df.empty and 'TOTAL_BOOKINGS' in guests_df.columns:
-        repeat_guests = len(guests_df[guests_df['TOTAL_BOOKINGS'] > 1])
+    if has_guests:
         repeat_rate = (repeat_guests / total_guests * 100) if total_guests > 0 else 0
         create_kpi_card("Repeat Rate", format_percentage(repeat_rate))
     else:
         create_kpi_card("Repeat Rate", "N/A")
 
 with col6:
-    if not guests_df.empty and 'CHURN_RISK' in guests_df.columns:
-        high_churn = len(guests_df[guests_df['CHURN_RISK'] == 'High Risk'])
+    if has_guests:
         churn_rate = (high_churn / total_guests * 100) if total_guests > 0 else 0
         create_kpi_card("High Churn Risk", format_percentage(churn_rate))
     else:
@@ -87,19 +109,18 @@ with tab1:
     st.markdown("## 💼 Strategic Business Metrics")
     
     # Summary metrics row at top
-    if not guests_df.empty:
-        revenue_data = guests_df['TOTAL_REVENUE'].dropna()
-        zero_rev = len(revenue_data[revenue_data == 0])
-        non_zero_data = revenue_data[revenue_data > 0]
+    if has_guests:
+        zero_rev = int(guest_totals['ZERO_REVENUE'])
+        active_guests = int(guest_totals['ACTIVE_GUESTS'])
         
         col_a, col_b, col_c = st.columns(3)
         with col_a:
             create_kpi_card("Zero Revenue Guests", format_number(zero_rev))
         with col_b:
-            create_kpi_card("Active Revenue Guests", format_number(len(non_zero_data)))
+            create_kpi_card("Active Revenue Guests", format_number(active_guests))
         with col_c:
-            if len(non_zero_data) > 0:
-                create_kpi_card("Avg Active Guest Value", format_currency(non_zero_data.mean()))
+            if active_guests > 0:
+                create_kpi_card("Avg Active Guest Value", format_currency(guest_totals['AVG_ACTIVE_REVENUE']))
             else:
                 create_kpi_card("Avg Active Guest Value", "$0")
         
@@ -111,37 +132,30 @@ with tab1:
         # Customer lifetime value metrics
         st.markdown("### Customer Value Distribution")
         
-        if not guests_df.empty:
-            avg_ltv = guests_df['TOTAL_REVENUE'].mean()
-            median_ltv = guests_df['TOTAL_REVENUE'].median()
-            max_ltv = guests_df['TOTAL_REVENUE'].max()
-            
+        if has_guests:
             # LTV distribution
             st.markdown("#### Customer Lifetime Value Distribution")
-            revenue_data = guests_df['TOTAL_REVENUE'].dropna()
             
-            if len(revenue_data) > 0:
+            if zero_rev + active_guests > 0:
                 import numpy as np
                 
-                # Separate zero revenue guests for clearer visualization
-                zero_rev = len(revenue_data[revenue_data == 0])
-                non_zero_data = revenue_data[revenue_data > 0]
-                
-                if len(non_zero_data) > 0:
-                    # Create meaningful bins for non-zero revenue
-                    # Use fixed bins that make business sense
-                    bins = [0, 500, 1000, 1500, 2000, 2500, 3000, 3500, 4000, 4500, 5000, non_zero_data.max() + 1]
-                    hist_data, bin_edges = np.histogram(non_zero_data, bins=bins)
+                if active_guests > 0:
+                    # Fixed bins that make business sense; the last bin is open-ended.
+                    # Binning runs in the warehouse over guests with non-zero revenue.
+                    bin_edges = [0, 500, 1000, 1500, 2000, 2500, 3000, 3500, 4000, 4500, 5000]
+                    binned = get_guest_value_histogram(
+                        'TOTAL_REVENUE', bin_edges, filters=(('TOTAL_REVENUE', '>', 0),)
+                    )
+                    hist_data = np.zeros(len(bin_edges), dtype=int)
+                    hist_data[binned['BIN'].astype(int).values] = binned['GUESTS'].values
                     
                     # Create readable labels
                     bin_labels = []
-                    for i in range(len(bin_edges) - 1):
-                        start = int(bin_edges[i])
-                        end = int(bin_edges[i + 1])
-                        if end > 5000:
+                    for i, start in enumerate(bin_edges):
+                        if i == len(bin_edges) - 1:
                             label = f"${start:,}+"
                         else:
-                            label = f"${start:,}-${end:,}"
+                            label = f"${start:,}-${bin_edges[i + 1]:,}"
                         bin_labels.append(label)
                     
                     # Add zero revenue as first bar
@@ -174,9 +188,9 @@ with tab1:
         # Booking and revenue metrics
         st.markdown("### Revenue & Engagement Metrics")
         
-        if not guests_df.empty:
-            avg_bookings = guests_df['TOTAL_BOOKINGS'].mean()
-            total_bookings = guests_df['TOTAL_BOOKINGS'].sum()
+        if has_guests:
+            avg_bookings = guest_totals['AVG_BOOKINGS']
+            total_bookings = guest_totals['TOTAL_BOOKINGS']
             revenue_per_booking = (total_revenue / total_bookings) if total_bookings > 0 else 0
             
             create_kpi_card("Avg Bookings/Guest", f"{avg_bookings:.1f}")
@@ -190,12 +204,21 @@ with tab1:
 with tab2:
     st.markdown("## 👥 Customer Segment Performance")
     
-    if not guests_df.empty and 'CUSTOMER_SEGMENT' in guests_df.columns:
+    if has_guests:
+        segment_stats = get_guest_aggregates((
+            ('GUEST_COUNT', 'count', 'GUEST_ID'),
+            ('TOTAL_REVENUE', 'sum', 'TOTAL_REVENUE'),
+            ('AVG_REVENUE', 'avg', 'TOTAL_REVENUE'),
+            ('AVG_BOOKINGS', 'avg', 'TOTAL_BOOKINGS'),
+            ('AVG_SATISFACTION', 'avg', 'AVG_AMENITY_SATISFACTION'),
+            ('AVG_LOYALTY_POINTS', 'avg', 'LOYALTY_POINTS'),
+        ), group_by='CUSTOMER_SEGMENT').dropna(subset=['CUSTOMER_SEGMENT'])
+        
         col1, col2 = st.columns(2)
         
         with col1:
             # Segment distribution
-            segment_counts = guests_df['CUSTOMER_SEGMENT'].value_counts().reset_index()
+            segment_counts = segment_stats[['CUSTOMER_SEGMENT', 'GUEST_COUNT']].copy()
             segment_counts.columns = ['Segment', 'Count']
             
             fig = create_pie_chart(segment_counts, 'Count', 'Segment',
@@ -204,7 +227,7 @@ with tab2:
         
         with col2:
             # Revenue by segment
-            segment_revenue = guests_df.groupby('CUSTOMER_SEGMENT')['TOTAL_REVENUE'].sum().reset_index()
+            segment_revenue = segment_stats[['CUSTOMER_SEGMENT', 'TOTAL_REVENUE']].copy()
             segment_revenue.columns = ['Segment', 'Revenue']
             segment_revenue = segment_revenue.sort_values('Revenue', ascending=False)
             
@@ -214,13 +237,7 @@ with tab2:
         
         # Segment performance matrix
         st.markdown("### Segment Performance Matrix")
-        segment_matrix = guests_df.groupby('CUSTOMER_SEGMENT').agg({
-            'GUEST_ID': 'count',
-            'TOTAL_REVENUE': ['sum', 'mean'],
-            'TOTAL_BOOKINGS': 'mean',
-            'AVG_AMENITY_SATISFACTION': 'mean',
-            'LOYALTY_POINTS': 'mean'
-        }).round(2)
+        segment_matrix = segment_stats.set_index('CUSTOMER_SEGMENT').round(2)
         segment_matrix.columns = ['Guest Count', 'Total Revenue', 'Avg Revenue', 'Avg Bookings', 'Avg Satisfaction', 'Avg Loyalty Points']
         segment_matrix_display = segment_matrix.copy()
         segment_matrix_display['Guest Count'] = segment_matrix_display['Guest Count'].apply(format_number)
@@ -230,14 +247,15 @@ with tab2:
         st.dataframe(segment_matrix_display, use_container_width=True)
         
         # Loyalty tier distribution
-        if 'LOYALTY_TIER' in guests_df.columns:
-            st.markdown("### Loyalty Program Performance")
-            tier_counts = guests_df['LOYALTY_TIER'].value_counts().reset_index()
-            tier_counts.columns = ['Tier', 'Count']
-            
-            fig = create_bar_chart(tier_counts, 'Tier', 'Count',
-                                  'Guest Distribution by Loyalty Tier')
-            st.plotly_chart(fig, use_container_width=True)
+        st.markdown("### Loyalty Program Performance")
+        tier_counts = get_guest_aggregates(
+            (('GUESTS', 'count', 'GUEST_ID'),), group_by='LOYALTY_TIER'
+        ).dropna(subset=['LOYALTY_TIER']).sort_values('GUESTS', ascending=False)
+        tier_counts.columns = ['Tier', 'Count']
+        
+        fig = create_bar_chart(tier_counts, 'Tier', 'Count',
+                              'Guest Distribution by Loyalty Tier')
+        st.plotly_chart(fig, use_container_width=True)
 
 with tab3:
     st.markdown("## 🚀 AI-Powered Business Insights")
@@ -290,8 +308,8 @@ with tab3:
         # Generate recommendations based on data
         recommendations = []
         
-        if not guests_df.empty:
-            high_churn_pct = (len(guests_df[guests_df['CHURN_RISK'] == 'High Risk']) / len(guests_df) * 100)
+        if has_guests:
+            high_churn_pct = (high_churn / total_guests * 100)
             if high_churn_pct > 20:
                 recommendations.append(f"⚠️ **ALERT**: {high_churn_pct:.1f}% of guests at high churn risk - implement retention program")
         
@@ -304,8 +322,8 @@ with tab3:
             if avg_loyalty > 70:
                 recommendations.append(f"⭐ **LOYALTY**: Strong loyalty propensity ({avg_loyalty:.1f}) - enhance loyalty program benefits")
         
-        if not guests_df.empty:
-            low_satisfaction = len(guests_df[guests_df['AVG_AMENITY_SATISFACTION'] < 3])
+        if has_guests:
+            low_satisfaction = int(guest_totals['LOW_SATISFACTION'])
             if low_satisfaction > 0:
                 recommendations.append(f"📉 **SATISFACTION**: {low_satisfaction} guests with low satisfaction - immediate follow-up needed")
         
@@ -318,46 +336,43 @@ with tab3:
 with tab4:
     st.markdown("## 🏆 Top Performers & Recognition")
     
-    if not guests_df.empty:
+    if has_guests:
         col1, col2 = st.columns(2)
         
         with col1:
             # Top revenue guests
             st.markdown("### 🥇 Top 10 Revenue-Generating Guests")
-            top_revenue = guests_df.nlargest(10, 'TOTAL_REVENUE')[[
+            top_revenue = get_top_guests('TOTAL_REVENUE', n=10, columns=(
                 'FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_REVENUE', 'TOTAL_BOOKINGS'
-            ]].copy()
+            ))
             top_revenue['TOTAL_REVENUE'] = top_revenue['TOTAL_REVENUE'].apply(format_currency)
             st.dataframe(top_revenue, use_container_width=True)
         
         with col2:
             # Most loyal guests (by bookings)
             st.markdown("### ⭐ Most Loyal Guests (By Bookings)")
-            if 'TOTAL_BOOKINGS' in guests_df.columns:
-                top_loyal = guests_df.nlargest(10, 'TOTAL_BOOKINGS')[[
-                    'FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_BOOKINGS', 'TOTAL_REVENUE'
-                ]].copy()
-                top_loyal['TOTAL_REVENUE'] = top_loyal['TOTAL_REVENUE'].apply(format_currency)
-                st.dataframe(top_loyal, use_container_width=True)
+            top_loyal = get_top_guests('TOTAL_BOOKINGS', n=10, columns=(
+                'FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_BOOKINGS', 'TOTAL_REVENUE'
+            ))
+            top_loyal['TOTAL_REVENUE'] = top_loyal['TOTAL_REVENUE'].apply(format_currency)
+            st.dataframe(top_loyal, use_container_width=True)
         
         # VIP guests summary
         st.markdown("### 💎 VIP Guest Summary")
-        if 'CUSTOMER_SEGMENT' in guests_df.columns:
-            vip_guests = guests_df[guests_df['CUSTOMER_SEGMENT'] == 'VIP']
-            if not vip_guests.empty:
-                col_a, col_b, col_c, col_d = st.columns(4)
-                
-                with col_a:
-                    create_kpi_card("VIP Count", format_number(len(vip_guests)))
-                with col_b:
-                    vip_revenue = vip_guests['TOTAL_REVENUE'].sum()
-                    create_kpi_card("VIP Revenue", format_currency(vip_revenue))
-                with col_c:
-                    vip_pct = (vip_revenue / total_revenue * 100) if total_revenue > 0 else 0
-                    create_kpi_card("VIP % of Revenue", format_percentage(vip_pct))
-                with col_d:
-                    vip_avg = vip_guests['TOTAL_REVENUE'].mean()
-                    create_kpi_card("Avg VIP Value", format_currency(vip_avg))
+        if guest_totals['VIP_GUESTS'] > 0:
+            col_a, col_b, col_c, col_d = st.columns(4)
+            
+            with col_a:
+                create_kpi_card("VIP Count", format_number(guest_totals['VIP_GUESTS']))
+            with col_b:
+                vip_revenue = guest_totals['VIP_REVENUE']
+                create_kpi_card("VIP Revenue", format_currency(vip_revenue))
+            with col_c:
+                vip_pct = (vip_revenue / total_revenue * 100) if total_revenue > 0 else 0
+                create_kpi_card("VIP % of Revenue", format_percentage(vip_pct))
+            with col_d:
+                vip_avg = guest_totals['VIP_AVG_REVENUE']
+                create_kpi_card("Avg VIP Value", format_currency(vip_avg))
 
 # Footer
 st.markdown("---")
@@ -4,24 +4,34 @@ Target Users: Guest Service Managers, Concierge Teams, Front Desk Staff
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import sys
 import os
 
 # Add shared modules to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
+from lazy_imports import lazy_import
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 from data_loader import (
-    get_guest_360_data, get_guest_by_id, search_guests,
-    get_amenity_spending, get_amenity_usage, get_stays_processed
+    get_guest_360_data, get_guest_by_id, get_guest_filter_index, search_guest_ids,
+    get_amenity_spending, get_amenity_usage, get_stays_processed,
+    get_guest_page, guest_page_cursor, GUEST_PAGE_SORT_COLUMNS
 )
+from page_registry import page_fragment
+from page_transforms import guest_analytics, guest_picker_labels, guest_list_csv, GUEST_TABLE_COLUMNS
 from viz_components import (
     create_kpi_card, format_currency, format_number, format_percentage,
     create_gauge_chart, create_pie_chart, create_bar_chart, create_line_chart,
     display_risk_badge, display_loyalty_badge, apply_custom_css
 )
 
+# Cap on search matches paged through in the Guest Table (sent as an IN list)
+SEARCH_TABLE_LIMIT = 1000
+
+# Guests offered at once by the Guest Profile picker
+PICKER_LIMIT = 50
+
 # Note: set_page_config() is handled by main app
 # Apply custom styling
 apply_custom_css()
@@ -31,8 +41,9 @@ st.title("🎯 Guest 360 Analytics")
 st.markdown("**Comprehensive Guest Analytics & Profile Viewer**")
 st.markdown("---")
 
-# Load all guest data
+# Load all guest data; filters are answered by the shared index over its rows
 guests_df = get_guest_360_data()
+guest_index = get_guest_filter_index()
 
 if guests_df.empty:
     st.error("No guest data available")
@@ -51,11 +62,11 @@ with col3:
     create_kpi_card("Avg Booking Value", format_currency(guests_df['AVG_BOOKING_VALUE'].mean()))
 
 with col4:
-    diamond_count = len(guests_df[guests_df['LOYALTY_TIER'] == 'Diamond'])
+    diamond_count = guest_index.count(guest_index.select(equals={'LOYALTY_TIER': 'Diamond'}))
     create_kpi_card("Diamond Members", format_number(diamond_count))
 
 with col5:
-    high_risk = len(guests_df[guests_df['CHURN_RISK'] == 'High Risk'])
+    high_risk = guest_index.count(guest_index.select(equals={'CHURN_RISK': 'High Risk'}))
     create_kpi_card("High Churn Risk", format_number(high_risk))
 
 st.markdown("---")
@@ -65,83 +76,99 @@ with st.sidebar:
     st.header("🔍 Filters")
     
     # Loyalty Tier filter
-    loyalty_tiers = ['All'] + sorted(guests_df['LOYALTY_TIER'].dropna().unique().tolist())
+    loyalty_tiers = ['All'] + guest_index.options('LOYALTY_TIER')
     selected_tier = st.selectbox("Loyalty Tier", loyalty_tiers)
     
     # Customer Segment filter
-    segments = ['All'] + sorted(guests_df['CUSTOMER_SEGMENT'].dropna().unique().tolist())
+    segments = ['All'] + guest_index.options('CUSTOMER_SEGMENT')
     selected_segment = st.selectbox("Customer Segment", segments)
     
     # Churn Risk filter
-    churn_risks = ['All'] + sorted(guests_df['CHURN_RISK'].dropna().unique().tolist())
+    churn_risks = ['All'] + guest_index.options('CHURN_RISK')
     selected_risk = st.selectbox("Churn Risk", churn_risks)
     
     # Revenue range filter
     st.subheader("Revenue Range")
     min_revenue = st.number_input("Min Revenue ($)", value=0, step=1000)
-    max_revenue = st.number_input("Max Revenue ($)", value=int(guests_df['TOTAL_REVENUE'].max()), step=1000)
+    max_revenue = st.number_input("Max Revenue ($)", value=int(guest_index.max_value('TOTAL_REVENUE')), step=1000)
     
     # Search
     st.subheader("Search")
     search_term = st.text_input("Name or Email", "")
 
-# Apply filters
-filtered_df = guests_df.copy()
-
+# Filters as (column, op, value) predicates, pushed into the Guest Table query
+guest_filters = []
 if selected_tier != 'All':
-    filtered_df = filtered_df[filtered_df['LOYALTY_TIER'] == selected_tier]
-
+    guest_filters.append(('LOYALTY_TIER', '==', selected_tier))
 if selected_segment != 'All':
-    filtered_df = filtered_df[filtered_df['CUSTOMER_SEGMENT'] == selected_segment]
-
+    guest_filters.append(('CUSTOMER_SEGMENT', '==', selected_segment))
 if selected_risk != 'All':
-    filtered_df = filtered_df[filtered_df['CHURN_RISK'] == selected_risk]
+    guest_filters.append(('CHURN_RISK', '==', selected_risk))
+guest_filters.append(('TOTAL_REVENUE', '>=', min_revenue))
+guest_filters.append(('TOTAL_REVENUE', '<=', max_revenue))
 
-filtered_df = filtered_df[
-    (filtered_df['TOTAL_REVENUE'] >= min_revenue) &
-    (filtered_df['TOTAL_REVENUE'] <= max_revenue)
-]
+# Search runs against the shared in-memory index, never a table scan
+search_ids = search_guest_ids(search_term) if search_term else None
 
-if search_term:
-    mask = (
-        filtered_df['FIRST_NAME'].str.contains(search_term, case=False, na=False) |
-        filtered_df['LAST_NAME'].str.contains(search_term, case=False, na=False) |
-        filtered_df['EMAIL'].str.contains(search_term, case=False, na=False)
-    )
-    filtered_df = filtered_df[mask]
+# Apply filters: one AND of precomputed bitmaps, no intermediate frames
+selection = guest_index.select(
+    equals={
+        'LOYALTY_TIER': None if selected_tier == 'All' else selected_tier,
+        'CUSTOMER_SEGMENT': None if selected_segment == 'All' else selected_segment,
+        'CHURN_RISK': None if selected_risk == 'All' else selected_risk,
+    },
+    ranges={'TOTAL_REVENUE': (min_revenue, max_revenue)},
+    guest_ids=search_ids
+)
+filtered_rows = guest_index.rows(selection)
 
-st.markdown(f"### 📋 Guest List ({len(filtered_df)} guests)")
+# The Guest Table pages through the best matches that pass every other
+# filter too, so the IN list is cut only after the sidebar filters apply
+table_search_ids = None
+if search_ids is not None:
+    search_rows = guest_index.positions(search_ids)
+    search_rows = search_rows[guest_index.contains(selection, search_rows)]
+    table_search_ids = guests_df['GUEST_ID'].to_numpy()[search_rows]
+    guest_filters.append(('GUEST_ID', 'in', tuple(table_search_ids[:SEARCH_TABLE_LIMIT].tolist())))
+guest_filters = tuple(guest_filters)
+
+st.markdown(f"### 📋 Guest List ({len(filtered_rows)} guests)")
 
 # Tabs for different views
 tab1, tab2, tab3 = st.tabs(["📊 Guest Table", "📈 Analytics", "👤 Guest Profile"])
 
-with tab1:
+# Sorting, paging and picking a guest rerun only their own tab
+@page_fragment("Guest Table")
+def guest_table():
     st.markdown("#### All Guests Overview")
     
     # Sort options
     sort_col1, sort_col2 = st.columns(2)
     with sort_col1:
-        sort_by = st.selectbox("Sort by", [
-            'TOTAL_REVENUE', 'TOTAL_BOOKINGS', 'LOYALTY_POINTS', 
-            'AVG_AMENITY_SATISFACTION', 'TOTAL_AMENITY_SPEND'
-        ])
+        sort_by = st.selectbox("Sort by", list(GUEST_PAGE_SORT_COLUMNS))
     with sort_col2:
         sort_order = st.radio("Order", ['Descending', 'Ascending'], horizontal=True)
-    
-    # Sort dataframe
-    ascending = (sort_order == 'Ascending')
-    display_df = filtered_df.sort_values(by=sort_by, ascending=ascending)
+    descending = (sort_order == 'Descending')
     
     # Select columns to display
-    display_columns = [
-        'GUEST_ID', 'FIRST_NAME', 'LAST_NAME', 'EMAIL', 
-        'LOYALTY_TIER', 'CUSTOMER_SEGMENT', 'CHURN_RISK',
-        'TOTAL_BOOKINGS', 'TOTAL_REVENUE', 'AVG_BOOKING_VALUE',
-        'LOYALTY_POINTS', 'TOTAL_AMENITY_SPEND', 'AVG_AMENITY_SATISFACTION'
-    ]
+    display_columns = list(GUEST_TABLE_COLUMNS)
+    page_size = 50
+    
+    # Keyset pagination: keep the cursor of every page visited so Previous is a
+    # cache hit; any sort or filter change starts again from the first page
+    table_query = (sort_by, descending, guest_filters)
+    if st.session_state.get('guest_table_query') != table_query:
+        st.session_state['guest_table_query'] = table_query
+        st.session_state['guest_table_cursors'] = [None]
+    cursors = st.session_state['guest_table_cursors']
     
-    # Format display dataframe
-    formatted_df = display_df[display_columns].copy()
+    page_df = get_guest_page(
+        sort_by, descending=descending, after=cursors[-1], page_size=page_size,
+        columns=tuple(display_columns), filters=guest_filters
+    )
+    
+    # Format only the rows on this page
+    formatted_df = page_df[display_columns].copy()
     formatted_df['TOTAL_REVENUE'] = formatted_df['TOTAL_REVENUE'].apply(format_currency)
     formatted_df['AVG_BOOKING_VALUE'] = formatted_df['AVG_BOOKING_VALUE'].apply(format_currency)
     formatted_df['TOTAL_AMENITY_SPEND'] = formatted_df['TOTAL_AMENITY_SPEND'].apply(format_currency)
@@ -155,24 +182,54 @@ with tab1:
         height=600
     )
     
-    # Download button
-    csv = display_df[display_columns].to_csv(index=False)
-    st.download_button(
-        label="📥 Download Guest Data (CSV)",
-        data=csv,
-        file_name=f"guest_360_data_{datetime.now().strftime('%Y%m%d')}.csv",
-        mime="text/csv"
-    )
+    # Page navigation
+    page_number = len(cursors)
+    total_rows = len(filtered_rows)
+    if table_search_ids is not None and len(table_search_ids) > SEARCH_TABLE_LIMIT:
+        total_rows = min(total_rows, SEARCH_TABLE_LIMIT)
+        st.caption(
+            f"Showing the best {SEARCH_TABLE_LIMIT:,} of {len(table_search_ids):,} matching guests - "
+            "refine the search to narrow down"
+        )
+    total_pages = max(1, -(-total_rows // page_size))
+    # Callbacks move the cursor before the rerun the click triggers
+    nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+    with nav_col1:
+        st.button("◀ Previous", disabled=page_number == 1, on_click=cursors.pop)
+    with nav_col2:
+        st.caption(f"Page {page_number} of {total_pages}")
+    with nav_col3:
+        last_page = len(page_df) < page_size or page_number >= total_pages
+        st.button(
+            "Next ▶", disabled=last_page, on_click=cursors.append,
+            args=(None if last_page else guest_page_cursor(page_df, sort_by),)
+        )
+    
+    # Download button - the full filtered list is only sorted and serialized on request
+    if st.checkbox("Prepare full guest list for download"):
+        csv = guest_list_csv(guests_df, filtered_rows, sort_by, descending, display_columns)
+        st.download_button(
+            label="📥 Download Guest Data (CSV)",
+            data=csv,
+            file_name=f"guest_360_data_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv"
+        )
+
+with tab1:
+    guest_table()
 
 with tab2:
     st.markdown("#### Guest Analytics")
     
+    tier_counts, segment_counts, risk_counts, segment_revenue, top_guests_display = guest_analytics(
+        guests_df, guest_index, filtered_rows
+    )
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Loyalty tier distribution
         st.markdown("##### Loyalty Tier Distribution")
-        tier_counts = filtered_df['LOYALTY_TIER'].value_counts()
         fig = px.pie(
             values=tier_counts.values,
             names=tier_counts.index,
@@ -182,7 +239,6 @@ with tab2:
         
         # Customer segment distribution
         st.markdown("##### Customer Segment Distribution")
-        segment_counts = filtered_df['CUSTOMER_SEGMENT'].value_counts()
         fig = px.bar(
             x=segment_counts.index,
             y=segment_counts.values,
@@ -194,7 +250,6 @@ with tab2:
     with col2:
         # Churn risk distribution
         st.markdown("##### Churn Risk Distribution")
-        risk_counts = filtered_df['CHURN_RISK'].value_counts()
         fig = px.pie(
             values=risk_counts.values,
             names=risk_counts.index,
@@ -206,7 +261,6 @@ with tab2:
         
         # Revenue by segment
         st.markdown("##### Revenue by Segment")
-        segment_revenue = filtered_df.groupby('CUSTOMER_SEGMENT')['TOTAL_REVENUE'].sum().sort_values(ascending=False)
         fig = px.bar(
             x=segment_revenue.index,
             y=segment_revenue.values,
@@ -217,32 +271,52 @@ with tab2:
     
     # Top spending guests
     st.markdown("##### 🏆 Top 10 Guests by Revenue")
-    top_guests = filtered_df.nlargest(10, 'TOTAL_REVENUE')[
-        ['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_REVENUE', 'TOTAL_BOOKINGS', 'AVG_AMENITY_SATISFACTION']
-    ]
-    top_guests_display = top_guests.copy()
-    top_guests_display['TOTAL_REVENUE'] = top_guests_display['TOTAL_REVENUE'].apply(format_currency)
-    top_guests_display['AVG_AMENITY_SATISFACTION'] = top_guests_display['AVG_AMENITY_SATISFACTION'].apply(lambda x: f"{x:.1f}/5.0")
-    st.dataframe(top_guests_display.reset_index(drop=True), use_container_width=True)
+    st.dataframe(top_guests_display, use_container_width=True)
 
-with tab3:
+
+def guest_candidates(search):
+    """Up to PICKER_LIMIT filtered guests: best search matches, else highest revenue"""
+    if search:
+        rows = guest_index.positions(search_guest_ids(search))
+        rows = rows[guest_index.contains(selection, rows)][:PICKER_LIMIT]
+    else:
+        rows = guest_index.top_rows('TOTAL_REVENUE', filtered_rows, PICKER_LIMIT)
+    return guests_df.take(rows)[['GUEST_ID', 'FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_REVENUE']]
+
+
+@page_fragment("Guest Profile")
+def guest_profile():
     st.markdown("#### Individual Guest Profile")
     
-    # Guest selector
-    if not filtered_df.empty:
-        guest_options = filtered_df.apply(
-            lambda row: f"{row['FIRST_NAME']} {row['LAST_NAME']} ({row['LOYALTY_TIER']}) - {format_currency(row['TOTAL_REVENUE'])}",
-            axis=1
+    # Only the candidates are labelled and sent to the browser; the full
+    # profile row is fetched for the selected guest alone
+    guest = None
+    if len(filtered_rows):
+        picker_search = st.text_input(
+            "Find a guest", placeholder="Type a name or email...",
+            help=f"Shows the best {PICKER_LIMIT} matches within the current filters"
         )
+        candidates = guest_candidates(picker_search)
         
-        selected_idx = st.selectbox(
-            "Select a guest to view detailed profile:",
-            range(len(filtered_df)),
-            format_func=lambda i: guest_options.iloc[i]
-        )
-        
-        guest = filtered_df.iloc[selected_idx]
-        
+        if candidates.empty:
+            st.info("No guests match that search within the current filters")
+        else:
+            if not picker_search and len(filtered_rows) > PICKER_LIMIT:
+                st.caption(f"Top {PICKER_LIMIT} guests by revenue - type to search all {len(filtered_rows):,}")
+            labels = guest_picker_labels(candidates)
+            selected_id = st.selectbox(
+                "Select a guest to view detailed profile:",
+                list(labels),
+                format_func=labels.get
+            )
+            
+            profile = get_guest_by_id(selected_id)
+            if profile.empty:
+                st.warning("Guest not found - the guest data may have been refreshed")
+            else:
+                guest = profile.iloc[0]
+    
+    if guest is not None:
         st.markdown("---")
         
         # Guest Profile Header
@@ -327,5 +401,8 @@ with tab3:
             st.metric("Avg Pool Duration", f"{guest['AVG_POOL_DURATION']:.0f} min")
             st.metric("Amenity Diversity", f"{guest['AMENITY_DIVERSITY_SCORE']:.0f}/100")
     
-    else:
+    elif not len(filtered_rows):
         st.warning("No guests match the current filters")
+
+with tab3:
+    guest_profile()
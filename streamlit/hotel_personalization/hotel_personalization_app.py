@@ -3,6 +3,14 @@ Hotel Personalization - Pic'N Stays
 Unified Streamlit Application with Multi-Page Navigation
 """
 import streamlit as st
+import sys
+import os
+
+# Add shared modules to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
+from page_registry import run_page
+from render_profiler import render_profile_report
+from telemetry import current_page
 
 # Page configuration
 st.set_page_config(
@@ -68,18 +76,21 @@ AI-powered guest experience management with:
 st.sidebar.markdown("---")
 st.sidebar.caption("© 2026 Hotel Personalization Platform")
 
-# Load the selected page content
+# Load the selected page content (compiled once, recompiled when the file changes)
 if page == "🏠 Executive Overview":
-    exec(open('executive_overview.py').read())
+    run_page('executive_overview.py', globals())
 
 elif page == "👤 Guest 360 View":
-    exec(open('guest_360_dashboard.py').read())
+    run_page('guest_360_dashboard.py', globals())
 
 elif page == "🎯 Personalization Hub":
-    exec(open('personalization_hub.py').read())
+    run_page('personalization_hub.py', globals())
 
 elif page == "🛎️ Amenity Performance":
-    exec(open('amenity_performance.py').read())
+    run_page('amenity_performance.py', globals())
 
 elif page == "💰 Revenue Analytics":
-    exec(open('revenue_analytics.py').read())
+    run_page('revenue_analytics.py', globals())
+
+# Section timings of the page just rendered, when opened with ?profile=1
+render_profile_report(current_page())
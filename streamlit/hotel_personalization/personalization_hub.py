@@ -4,15 +4,22 @@ Target Users: Revenue Managers, Sales Teams, Marketing Managers
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
+from lazy_imports import lazy_import
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 from data_loader import get_personalization_scores, get_guest_360_data
+from page_registry import page_fragment
+from page_transforms import (
+    filter_guests, priority_targets, propensity_scores, segment_summary, churn_summary,
+    PRIORITY_PROPENSITY_SCORE
+)
+from render_profiler import mark_section, profile_section
 from viz_components import (
-    create_kpi_card, format_currency, format_number, format_percentage,
+    create_kpi_card, format_number, format_percentage,
     create_gauge_chart, create_pie_chart, create_bar_chart, create_scatter_plot,
     apply_custom_css
 )
@@ -20,11 +27,15 @@ from viz_components import (
 # Note: set_page_config() is handled by main app
 apply_custom_css()
 
+# Score above which a guest counts as high propensity in the KPI cards
+HIGH_PROPENSITY_SCORE = 70
+
 st.title("🚀 Personalization & Upsell Hub")
 st.markdown("**Revenue Optimization Through AI-Powered Personalization**")
 st.markdown("---")
 
 # Load data
+mark_section("Load data")
 scores_df = get_personalization_scores()
 guests_df = get_guest_360_data()
 
@@ -46,11 +57,10 @@ else:
     merged_df = scores_df.copy()
 
 # Sidebar filters
+mark_section("Filters")
 with st.sidebar:
     st.header("🎯 Filters")
     
-    score_threshold = st.slider("Min Upsell Propensity Score", 0, 100, 70)
-    
     if not merged_df.empty and 'CUSTOMER_SEGMENT' in merged_df.columns:
         segment_options = sorted([x for x in merged_df['CUSTOMER_SEGMENT'].dropna().unique() if x])
         selected_segments = st.multiselect(
@@ -75,19 +85,12 @@ with st.sidebar:
 
 # Apply filters
 if not merged_df.empty:
-    filter_mask = pd.Series([True] * len(merged_df), index=merged_df.index)
-    
-    if selected_segments and 'CUSTOMER_SEGMENT' in merged_df.columns:
-        filter_mask &= merged_df['CUSTOMER_SEGMENT'].isin(selected_segments)
-    
-    if selected_tiers and 'LOYALTY_TIER' in merged_df.columns:
-        filter_mask &= merged_df['LOYALTY_TIER'].isin(selected_tiers)
-    
-    filtered_df = merged_df[filter_mask]
+    filtered_df = filter_guests(merged_df, selected_segments, selected_tiers)
 else:
     filtered_df = pd.DataFrame()
 
 # Summary Metrics
+mark_section("KPI cards")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
@@ -96,7 +99,7 @@ with col2:
     avg_readiness = filtered_df['PERSONALIZATION_READINESS_SCORE'].mean()
     create_kpi_card("Avg Personalization Score", f"{avg_readiness:.1f}")
 with col3:
-    high_spa = len(filtered_df[filtered_df['SPA_UPSELL_PROPENSITY'] > score_threshold])
+    high_spa = len(filtered_df[filtered_df['SPA_UPSELL_PROPENSITY'] > HIGH_PROPENSITY_SCORE])
     create_kpi_card("High Spa Propensity", format_number(high_spa))
 with col4:
     high_churn = len(filtered_df[filtered_df['CHURN_RISK'] == 'High Risk'])
@@ -105,6 +108,7 @@ with col4:
 st.markdown("---")
 
 # Tabs
+mark_section("Tabs")
 tab1, tab2, tab3, tab4 = st.tabs([
     "📊 Opportunity Matrix",
     "🎯 Propensity Analysis",
@@ -112,7 +116,7 @@ tab1, tab2, tab3, tab4 = st.tabs([
     "⚠️ Churn Management"
 ])
 
-with tab1:
+with tab1, profile_section("Opportunity Matrix"):
     st.markdown("## 📊 Upsell Opportunity Matrix")
     
     # Create opportunity matrix (scatter plot)
@@ -125,22 +129,15 @@ with tab1:
         hover_data=['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER'],
         title='Guest Value vs Upsell Propensity (size = personalization readiness)'
     )
-    fig.add_vline(x=70, line_dash="dash", line_color="red", annotation_text="High Propensity")
+    fig.add_vline(x=PRIORITY_PROPENSITY_SCORE, line_dash="dash", line_color="red", annotation_text="High Propensity")
     fig.add_hline(y=filtered_df['TOTAL_REVENUE'].median(), line_dash="dash", line_color="green", annotation_text="Median Value")
     st.plotly_chart(fig, use_container_width=True)
     
     # High priority targets
     st.markdown("### 🎯 Priority Targets")
-    priority_guests = filtered_df[
-        (filtered_df['UPSELL_PROPENSITY_SCORE'] > 70) &
-        (filtered_df['TOTAL_REVENUE'] > filtered_df['TOTAL_REVENUE'].median())
-    ].sort_values('UPSELL_PROPENSITY_SCORE', ascending=False)
+    priority_display, priority_guests = priority_targets(filtered_df)
     
     if not priority_guests.empty:
-        display_cols = ['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'CUSTOMER_SEGMENT', 
-                       'UPSELL_PROPENSITY_SCORE', 'TOTAL_REVENUE']
-        priority_display = priority_guests[display_cols].head(20).copy()
-        priority_display['TOTAL_REVENUE'] = priority_display['TOTAL_REVENUE'].apply(format_currency)
         st.dataframe(priority_display, use_container_width=True)
         
         # Download button
@@ -154,7 +151,9 @@ with tab1:
     else:
         st.info("No priority targets found with current filters")
 
-with tab2:
+# The score threshold only drives this tab, so moving it reruns just the tab
+@page_fragment("Propensity Analysis")
+def propensity_analysis():
     st.markdown("## 🎯 Propensity Score Analysis")
     
     # Debug info
@@ -165,26 +164,14 @@ with tab2:
     # Show data info
     st.info(f"📊 Analyzing {len(filtered_df):,} guests")
     
+    score_threshold = st.slider("Min Upsell Propensity Score", 0, 100, HIGH_PROPENSITY_SCORE)
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Category breakdown
         if not filtered_df.empty:
-            category_scores = pd.DataFrame({
-                'Category': ['Spa', 'Dining', 'Tech', 'Pool'],
-                'Avg Score': [
-                    filtered_df['SPA_UPSELL_PROPENSITY'].mean(),
-                    filtered_df['DINING_UPSELL_PROPENSITY'].mean(),
-                    filtered_df['TECH_UPSELL_PROPENSITY'].mean(),
-                    filtered_df['POOL_SERVICES_UPSELL_PROPENSITY'].mean()
-                ],
-                'High Scorers': [
-                    len(filtered_df[filtered_df['SPA_UPSELL_PROPENSITY'] > score_threshold]),
-                    len(filtered_df[filtered_df['DINING_UPSELL_PROPENSITY'] > score_threshold]),
-                    len(filtered_df[filtered_df['TECH_UPSELL_PROPENSITY'] > score_threshold]),
-                    len(filtered_df[filtered_df['POOL_SERVICES_UPSELL_PROPENSITY'] > score_threshold])
-                ]
-            })
+            category_scores = propensity_scores(filtered_df, score_threshold)
             
             fig = create_bar_chart(category_scores, 'Category', 'Avg Score', 
                                   'Average Propensity Score by Category')
@@ -318,76 +305,53 @@ with tab2:
     else:
         st.error("❌ Filtered dataframe is empty! Please adjust your filters.")
 
-with tab3:
+with tab2, profile_section("Propensity Analysis"):
+    propensity_analysis()
+
+with tab3, profile_section("Segmentation"):
     st.markdown("## 👥 Customer Segmentation Analysis")
+    segment_counts, segment_revenue, segment_metrics_display = segment_summary(filtered_df)
     
     # Segment distribution
     col1, col2 = st.columns(2)
     
     with col1:
-        segment_counts = filtered_df['CUSTOMER_SEGMENT'].value_counts().reset_index()
-        segment_counts.columns = ['Segment', 'Count']
-        
         fig = create_pie_chart(segment_counts, 'Count', 'Segment',
                               'Guest Distribution by Segment')
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Revenue by segment
-        segment_revenue = filtered_df.groupby('CUSTOMER_SEGMENT')['TOTAL_REVENUE'].sum().reset_index()
-        segment_revenue.columns = ['Segment', 'Revenue']
-        
         fig = create_bar_chart(segment_revenue, 'Segment', 'Revenue',
                               'Total Revenue by Segment')
         st.plotly_chart(fig, use_container_width=True)
     
     # Segment performance table
     st.markdown("### Segment Performance Metrics")
-    segment_metrics = filtered_df.groupby('CUSTOMER_SEGMENT').agg({
-        'GUEST_ID': 'count',
-        'TOTAL_REVENUE': 'sum',
-        'UPSELL_PROPENSITY_SCORE': 'mean',
-        'PERSONALIZATION_READINESS_SCORE': 'mean',
-        'LOYALTY_PROPENSITY_SCORE': 'mean'
-    }).round(2)
-    segment_metrics.columns = ['Guest Count', 'Total Revenue', 'Avg Upsell Score', 'Avg Personalization', 'Avg Loyalty']
-    segment_metrics_display = segment_metrics.copy()
-    segment_metrics_display['Total Revenue'] = segment_metrics_display['Total Revenue'].apply(format_currency)
-    segment_metrics_display['Guest Count'] = segment_metrics_display['Guest Count'].apply(format_number)
     st.dataframe(segment_metrics_display, use_container_width=True)
 
-with tab4:
+with tab4, profile_section("Churn Management"):
     st.markdown("## ⚠️ Churn Risk Management")
+    churn_counts, revenue_at_risk, high_risk_display, high_risk = churn_summary(filtered_df)
     
     # Churn distribution
     col1, col2 = st.columns(2)
     
     with col1:
-        churn_counts = filtered_df['CHURN_RISK'].value_counts().reset_index()
-        churn_counts.columns = ['Risk Level', 'Count']
-        
         fig = create_pie_chart(churn_counts, 'Count', 'Risk Level',
                               'Churn Risk Distribution')
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Revenue at risk
-        revenue_at_risk = filtered_df.groupby('CHURN_RISK')['TOTAL_REVENUE'].sum().reset_index()
-        revenue_at_risk.columns = ['Risk Level', 'Revenue']
-        
         fig = create_bar_chart(revenue_at_risk, 'Risk Level', 'Revenue',
                               'Revenue at Risk by Churn Level')
         st.plotly_chart(fig, use_container_width=True)
     
     # High risk guests
     st.markdown("### 🚨 High Risk Guests - Immediate Action Required")
-    high_risk = filtered_df[filtered_df['CHURN_RISK'] == 'High Risk'].sort_values('TOTAL_REVENUE', ascending=False)
     
     if not high_risk.empty:
-        display_cols = ['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_REVENUE',
-                       'PERSONALIZATION_READINESS_SCORE', 'LOYALTY_PROPENSITY_SCORE']
-        high_risk_display = high_risk[display_cols].head(20).copy()
-        high_risk_display['TOTAL_REVENUE'] = high_risk_display['TOTAL_REVENUE'].apply(format_currency)
         st.dataframe(high_risk_display, use_container_width=True)
         
         # Download
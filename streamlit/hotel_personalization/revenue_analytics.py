@@ -4,13 +4,14 @@ Target Users: Revenue Managers, Finance Teams, General Managers
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
-from data_loader import get_guest_360_data
+from lazy_imports import lazy_import
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+from data_loader import get_guest_aggregates, refresh_data
 from viz_components import (
     create_kpi_card, format_currency, format_number, format_percentage,
     create_bar_chart, create_line_chart, apply_custom_css
@@ -25,20 +26,57 @@ st.markdown("**Comprehensive Revenue Performance & Forecasting**")
 # Add cache clear button in sidebar
 with st.sidebar:
     if st.button("🔄 Refresh Data"):
-        st.cache_data.clear()
+        refresh_data()
         st.rerun()
 
 st.markdown("---")
 
-# Load data from GOLD layer (single source of truth)
-guests_df = get_guest_360_data()
+# Revenue percentiles shown in the distribution tab, fetched with the totals
+REVENUE_PERCENTILES = [25, 50, 75, 90, 95]
+
+# Aggregate the GOLD layer (single source of truth) in the warehouse
+guest_totals = get_guest_aggregates((
+    ('TOTAL_GUESTS', 'count', 'GUEST_ID'),
+    ('TOTAL_REVENUE', 'sum', 'TOTAL_REVENUE'),
+    ('AVG_REVENUE', 'avg', 'TOTAL_REVENUE'),
+    ('TOTAL_AMENITY_SPEND', 'sum', 'TOTAL_AMENITY_SPEND'),
+    ('AVG_AMENITY_SPEND', 'avg', 'TOTAL_AMENITY_SPEND'),
+    ('TOTAL_BOOKINGS', 'sum', 'TOTAL_BOOKINGS'),
+    ('AVG_BOOKINGS', 'avg', 'TOTAL_BOOKINGS'),
+    ('AVG_BOOKING_VALUE', 'avg', 'AVG_BOOKING_VALUE'),
+    ('AVG_STAY_LENGTH', 'avg', 'AVG_STAY_LENGTH'),
+    ('TOTAL_SPA_SPEND', 'sum', 'TOTAL_SPA_SPEND'),
+    ('TOTAL_RESTAURANT_SPEND', 'sum', 'TOTAL_RESTAURANT_SPEND'),
+    ('TOTAL_BAR_SPEND', 'sum', 'TOTAL_BAR_SPEND'),
+    ('TOTAL_ROOM_SERVICE_SPEND', 'sum', 'TOTAL_ROOM_SERVICE_SPEND'),
+    ('TOTAL_WIFI_SPEND', 'sum', 'TOTAL_WIFI_SPEND'),
+    ('TOTAL_SMART_TV_SPEND', 'sum', 'TOTAL_SMART_TV_SPEND'),
+    ('TOTAL_POOL_SERVICES_SPEND', 'sum', 'TOTAL_POOL_SERVICES_SPEND'),
+) + tuple(
+    (f'P{p}', f'p{p}', 'TOTAL_REVENUE') for p in REVENUE_PERCENTILES
+)).iloc[0]
+has_guests = guest_totals['TOTAL_GUESTS'] > 0
 
 # Calculate key metrics from GOLD layer
-total_revenue = guests_df['TOTAL_REVENUE'].sum() if not guests_df.empty else 0
-total_amenity_revenue = guests_df['TOTAL_AMENITY_SPEND'].sum() if not guests_df.empty else 0
+total_revenue = guest_totals['TOTAL_REVENUE'] if has_guests else 0
+total_amenity_revenue = guest_totals['TOTAL_AMENITY_SPEND'] if has_guests else 0
 total_room_revenue = total_revenue - total_amenity_revenue  # Room revenue = Total - Amenities
-total_bookings = guests_df['TOTAL_BOOKINGS'].sum() if not guests_df.empty else 0
-avg_booking_value = guests_df['AVG_BOOKING_VALUE'].mean() if not guests_df.empty else 0
+total_bookings = guest_totals['TOTAL_BOOKINGS'] if has_guests else 0
+avg_booking_value = guest_totals['AVG_BOOKING_VALUE'] if has_guests else 0
+
+# Per-segment and per-tier rollups, also computed in the warehouse
+segment_stats = get_guest_aggregates((
+    ('GUESTS', 'count', 'GUEST_ID'),
+    ('TOTAL_REVENUE', 'sum', 'TOTAL_REVENUE'),
+    ('AVG_REVENUE', 'avg', 'TOTAL_REVENUE'),
+    ('TOTAL_BOOKINGS', 'sum', 'TOTAL_BOOKINGS'),
+    ('AVG_BOOKINGS', 'avg', 'TOTAL_BOOKINGS'),
+    ('AVG_BOOKING_VALUE', 'avg', 'AVG_BOOKING_VALUE'),
+    ('AVG_SATISFACTION', 'avg', 'AVG_AMENITY_SATISFACTION'),
+), group_by='CUSTOMER_SEGMENT').dropna(subset=['CUSTOMER_SEGMENT'])
+tier_stats = get_guest_aggregates(
+    (('TOTAL_BOOKINGS', 'sum', 'TOTAL_BOOKINGS'),), group_by='LOYALTY_TIER'
+).dropna(subset=['LOYALTY_TIER'])
 
 # Summary metrics
 col1, col2, col3, col4 = st.columns(4)
@@ -84,17 +122,17 @@ with tab1:
     
     with col2:
         # Amenity revenue breakdown (from GOLD layer aggregated columns)
-        if not guests_df.empty:
+        if has_guests:
             amenity_breakdown = pd.DataFrame({
                 'Category': ['Spa', 'Restaurant', 'Bar', 'Room Service', 'WiFi', 'Smart TV', 'Pool Services'],
                 'Revenue': [
-                    guests_df['TOTAL_SPA_SPEND'].sum(),
-                    guests_df['TOTAL_RESTAURANT_SPEND'].sum(),
-                    guests_df['TOTAL_BAR_SPEND'].sum(),
-                    guests_df['TOTAL_ROOM_SERVICE_SPEND'].sum(),
-                    guests_df['TOTAL_WIFI_SPEND'].sum(),
-                    guests_df['TOTAL_SMART_TV_SPEND'].sum(),
-                    guests_df['TOTAL_POOL_SERVICES_SPEND'].sum()
+                    guest_totals['TOTAL_SPA_SPEND'],
+                    guest_totals['TOTAL_RESTAURANT_SPEND'],
+                    guest_totals['TOTAL_BAR_SPEND'],
+                    guest_totals['TOTAL_ROOM_SERVICE_SPEND'],
+                    guest_totals['TOTAL_WIFI_SPEND'],
+                    guest_totals['TOTAL_SMART_TV_SPEND'],
+                    guest_totals['TOTAL_POOL_SERVICES_SPEND']
                 ]
             })
             amenity_breakdown = amenity_breakdown.sort_values('Revenue', ascending=False)
@@ -105,38 +143,38 @@ with tab1:
     
     # Revenue per guest metrics
     st.markdown("### Revenue Per Guest Metrics")
-    if not guests_df.empty:
+    if has_guests:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            avg_ltv = guests_df['TOTAL_REVENUE'].mean()
+            avg_ltv = guest_totals['AVG_REVENUE']
             create_kpi_card("Avg Lifetime Value", format_currency(avg_ltv))
         
         with col2:
-            avg_booking_rev = guests_df['AVG_BOOKING_VALUE'].mean()
+            avg_booking_rev = guest_totals['AVG_BOOKING_VALUE']
             create_kpi_card("Avg Booking Value", format_currency(avg_booking_rev))
         
         with col3:
-            avg_amenity = guests_df['TOTAL_AMENITY_SPEND'].mean()
+            avg_amenity = guest_totals['AVG_AMENITY_SPEND']
             create_kpi_card("Avg Amenity Spend", format_currency(avg_amenity))
 
 with tab2:
     st.markdown("## 🏨 Booking Analytics")
     
     # Show GOLD layer booking metrics
-    if not guests_df.empty:
+    if has_guests:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_bookings_count = guests_df['TOTAL_BOOKINGS'].sum()
+            total_bookings_count = guest_totals['TOTAL_BOOKINGS']
             create_kpi_card("Total Bookings", format_number(total_bookings_count))
         
         with col2:
-            avg_bookings_per_guest = guests_df['TOTAL_BOOKINGS'].mean()
+            avg_bookings_per_guest = guest_totals['AVG_BOOKINGS']
             create_kpi_card("Avg Bookings/Guest", f"{avg_bookings_per_guest:.1f}")
         
         with col3:
-            avg_stay_length = guests_df['AVG_STAY_LENGTH'].mean()
+            avg_stay_length = guest_totals['AVG_STAY_LENGTH']
             create_kpi_card("Avg Stay Length", f"{avg_stay_length:.1f} nights")
         
         st.markdown("---")
@@ -146,8 +184,8 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            if 'CUSTOMER_SEGMENT' in guests_df.columns:
-                segment_bookings = guests_df.groupby('CUSTOMER_SEGMENT')['TOTAL_BOOKINGS'].sum().reset_index()
+            if not segment_stats.empty:
+                segment_bookings = segment_stats[['CUSTOMER_SEGMENT', 'TOTAL_BOOKINGS']].copy()
                 segment_bookings.columns = ['Segment', 'Total Bookings']
                 segment_bookings = segment_bookings.sort_values('Total Bookings', ascending=False)
                 
@@ -156,8 +194,8 @@ with tab2:
                 st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            if 'LOYALTY_TIER' in guests_df.columns:
-                tier_bookings = guests_df.groupby('LOYALTY_TIER')['TOTAL_BOOKINGS'].sum().reset_index()
+            if not tier_stats.empty:
+                tier_bookings = tier_stats[['LOYALTY_TIER', 'TOTAL_BOOKINGS']].copy()
                 tier_bookings.columns = ['Tier', 'Total Bookings']
                 tier_bookings = tier_bookings.sort_values('Total Bookings', ascending=False)
                 
@@ -167,12 +205,8 @@ with tab2:
         
         # Booking value analysis
         st.markdown("### Booking Value Distribution")
-        booking_value_segments = pd.DataFrame({
-            'Segment': guests_df['CUSTOMER_SEGMENT'],
-            'Avg Booking Value': guests_df['AVG_BOOKING_VALUE'],
-            'Total Bookings': guests_df['TOTAL_BOOKINGS']
-        })
-        avg_by_segment = booking_value_segments.groupby('Segment')['Avg Booking Value'].mean().reset_index()
+        avg_by_segment = segment_stats[['CUSTOMER_SEGMENT', 'AVG_BOOKING_VALUE']].copy()
+        avg_by_segment.columns = ['Segment', 'Avg Booking Value']
         avg_by_segment = avg_by_segment.sort_values('Avg Booking Value', ascending=False)
         avg_by_segment_display = avg_by_segment.copy()
         avg_by_segment_display['Avg Booking Value'] = avg_by_segment_display['Avg Booking Value'].apply(format_currency)
@@ -181,12 +215,12 @@ with tab2:
 with tab3:
     st.markdown("## 👥 Customer Segment Performance")
     
-    if not guests_df.empty and 'CUSTOMER_SEGMENT' in guests_df.columns:
+    if has_guests and not segment_stats.empty:
         col1, col2 = st.columns(2)
         
         with col1:
             # Revenue by segment
-            segment_revenue = guests_df.groupby('CUSTOMER_SEGMENT')['TOTAL_REVENUE'].sum().reset_index()
+            segment_revenue = segment_stats[['CUSTOMER_SEGMENT', 'TOTAL_REVENUE']].copy()
             segment_revenue.columns = ['Segment', 'Revenue']
             segment_revenue = segment_revenue.sort_values('Revenue', ascending=False)
             
@@ -196,7 +230,7 @@ with tab3:
         
         with col2:
             # Guest count by segment
-            segment_counts = guests_df.groupby('CUSTOMER_SEGMENT').size().reset_index()
+            segment_counts = segment_stats[['CUSTOMER_SEGMENT', 'GUESTS']].copy()
             segment_counts.columns = ['Segment', 'Guests']
             
             fig = create_bar_chart(segment_counts, 'Segment', 'Guests',
@@ -205,12 +239,9 @@ with tab3:
         
         # Segment profitability table
         st.markdown("### Segment Profitability Analysis")
-        segment_metrics = guests_df.groupby('CUSTOMER_SEGMENT').agg({
-            'GUEST_ID': 'count',
-            'TOTAL_REVENUE': ['sum', 'mean'],
-            'TOTAL_BOOKINGS': 'mean',
-            'AVG_AMENITY_SATISFACTION': 'mean'
-        }).round(2)
+        segment_metrics = segment_stats.set_index('CUSTOMER_SEGMENT')[[
+            'GUESTS', 'TOTAL_REVENUE', 'AVG_REVENUE', 'AVG_BOOKINGS', 'AVG_SATISFACTION'
+        ]].round(2)
         segment_metrics.columns = ['Guest Count', 'Total Revenue', 'Avg Revenue/Guest', 'Avg Bookings', 'Avg Satisfaction']
         segment_metrics_display = segment_metrics.copy()
         segment_metrics_display['Guest Count'] = segment_metrics_display['Guest Count'].apply(format_number)
@@ -221,7 +252,7 @@ with tab3:
 with tab4:
     st.markdown("## 📈 Revenue Performance Analysis")
     
-    if not guests_df.empty:
+    if has_guests:
         # Revenue distribution analysis
         st.markdown("### Revenue Distribution by Customer Value")
         
@@ -229,17 +260,22 @@ with tab4:
         
         with col1:
             # Revenue quartiles
-            quartiles = guests_df['TOTAL_REVENUE'].quantile([0.25, 0.50, 0.75, 0.90, 0.95]).reset_index()
-            quartiles.columns = ['Percentile', 'Revenue']
-            quartiles['Percentile'] = quartiles['Percentile'].apply(lambda x: f"{int(x*100)}th")
+            quartiles = pd.DataFrame({
+                'Percentile': [f"{p}th" for p in REVENUE_PERCENTILES],
+                'Revenue': [guest_totals[f'P{p}'] for p in REVENUE_PERCENTILES]
+            })
             quartiles['Revenue'] = quartiles['Revenue'].apply(format_currency)
             
             st.markdown("#### Revenue Percentiles")
             st.dataframe(quartiles, use_container_width=True)
             
             # High value guests
-            high_value_count = len(guests_df[guests_df['TOTAL_REVENUE'] > guests_df['TOTAL_REVENUE'].quantile(0.90)])
-            high_value_revenue = guests_df[guests_df['TOTAL_REVENUE'] > guests_df['TOTAL_REVENUE'].quantile(0.90)]['TOTAL_REVENUE'].sum()
+            high_value = get_guest_aggregates(
+                (('GUESTS', 'count', 'GUEST_ID'), ('TOTAL_REVENUE', 'sum', 'TOTAL_REVENUE')),
+                filters=(('TOTAL_REVENUE', '>', float(guest_totals['P90'])),)
+            ).iloc[0]
+            high_value_count = high_value['GUESTS']
+            high_value_revenue = high_value['TOTAL_REVENUE'] if high_value_count > 0 else 0
             high_value_pct = (high_value_revenue / total_revenue * 100) if total_revenue > 0 else 0
             
             st.info(f"💎 **Top 10% of Guests** ({format_number(high_value_count)}): Generate **{format_currency(high_value_revenue)}** ({high_value_pct:.1f}% of total revenue)")
@@ -247,10 +283,7 @@ with tab4:
         with col2:
             # Revenue concentration by segment
             st.markdown("#### Revenue Concentration by Segment")
-            segment_contribution = guests_df.groupby('CUSTOMER_SEGMENT').agg({
-                'GUEST_ID': 'count',
-                'TOTAL_REVENUE': 'sum'
-            }).reset_index()
+            segment_contribution = segment_stats[['CUSTOMER_SEGMENT', 'GUESTS', 'TOTAL_REVENUE']].copy()
             segment_contribution.columns = ['Segment', 'Guests', 'Revenue']
             segment_contribution['% of Total Revenue'] = (segment_contribution['Revenue'] / total_revenue * 100).round(1)
             segment_contribution = segment_contribution.sort_values('Revenue', ascending=False)
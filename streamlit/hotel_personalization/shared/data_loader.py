@@ -1,112 +1,362 @@
 """
 Shared Data Loading Functions for Hotel Personalization Dashboards
 """
-from snowflake.snowpark.context import get_active_session
+from session_provider import get_session
 from snowflake.snowpark import DataFrame
-from snowflake.snowpark.functions import col, sum as sum_, avg, count, max as max_, min as min_
+from snowflake.snowpark.functions import (
+    col, lit, when, sum as sum_, avg, count, count_distinct, max as max_, min as min_,
+    median, approx_percentile, coalesce, contains, lower
+)
 import streamlit as st
+from frame_fetch import fetch_frame
+from freshness_cache import freshness_cached, freshness_key, refresh_watermarks
+from guest_filter import GuestFilterIndex
+from guest_search import GuestSearchIndex, RESULT_COLUMNS as GUEST_SEARCH_COLUMNS
+from telemetry import instrumented
 
-@st.cache_data(ttl=300)
+# Dimensions guest aggregates may be grouped by
+GUEST_AGGREGATE_DIMENSIONS = ('CUSTOMER_SEGMENT', 'LOYALTY_TIER', 'CHURN_RISK')
+
+# Aggregate functions a page may request; 'pNN' percentiles are handled separately
+GUEST_AGGREGATE_FUNCTIONS = {
+    'sum': sum_,
+    'avg': avg,
+    'count': count,
+    'count_distinct': count_distinct,
+    'min': min_,
+    'max': max_,
+    'median': median,
+}
+
+# Columns the Guest 360 table may be sorted (and keyset-paginated) by
+GUEST_PAGE_SORT_COLUMNS = (
+    'TOTAL_REVENUE', 'TOTAL_BOOKINGS', 'LOYALTY_POINTS',
+    'AVG_AMENITY_SATISFACTION', 'TOTAL_AMENITY_SPEND'
+)
+
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
 def get_guest_360_data(limit=None):
     """Load guest 360 view data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("GOLD.GUEST_360_VIEW_ENHANCED")
     if limit:
         df = df.limit(limit)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_guest_360_data")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
 def get_guest_by_id(guest_id):
     """Get detailed guest profile by ID"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("GOLD.GUEST_360_VIEW_ENHANCED") \
         .filter(col("GUEST_ID") == guest_id)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_guest_by_id")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("GOLD.PERSONALIZATION_SCORES_ENHANCED")
 def get_personalization_scores(limit=None):
     """Load personalization scores data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("GOLD.PERSONALIZATION_SCORES_ENHANCED")
     if limit:
         df = df.limit(limit)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_personalization_scores")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("GOLD.AMENITY_ANALYTICS")
 def get_amenity_analytics():
     """Load amenity analytics data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("GOLD.AMENITY_ANALYTICS")
-    return df.to_pandas()
+    return fetch_frame(df, label="get_amenity_analytics")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("SILVER.STAYS_PROCESSED")
 def get_stays_processed(limit=None):
     """Load processed stays data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("SILVER.STAYS_PROCESSED")
     if limit:
         df = df.limit(limit)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_stays_processed")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("SILVER.BOOKINGS_ENRICHED")
 def get_bookings_enriched(limit=None):
     """Load enriched bookings data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("SILVER.BOOKINGS_ENRICHED")
     if limit:
         df = df.limit(limit)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_bookings_enriched")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("SILVER.AMENITY_SPENDING_ENRICHED")
 def get_amenity_spending(guest_id=None):
     """Load amenity spending data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("SILVER.AMENITY_SPENDING_ENRICHED")
     if guest_id:
         df = df.filter(col("GUEST_ID") == guest_id)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_amenity_spending")
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached("SILVER.AMENITY_USAGE_ENRICHED")
 def get_amenity_usage(guest_id=None):
     """Load amenity usage data"""
-    session = get_active_session()
+    session = get_session()
     df = session.table("SILVER.AMENITY_USAGE_ENRICHED")
     if guest_id:
         df = df.filter(col("GUEST_ID") == guest_id)
-    return df.to_pandas()
+    return fetch_frame(df, label="get_amenity_usage")
 
-@st.cache_data(ttl=300)
-def search_guests(search_term):
-    """Search guests by name or email"""
-    session = get_active_session()
-    search_pattern = f"%{search_term}%"
-    df = session.table("GOLD.GUEST_360_VIEW_ENHANCED") \
-        .filter(
-            (col("FIRST_NAME").like(search_pattern)) |
-            (col("LAST_NAME").like(search_pattern)) |
-            (col("EMAIL").like(search_pattern))
-        ) \
-        .select("GUEST_ID", "FIRST_NAME", "LAST_NAME", "EMAIL", "LOYALTY_TIER", "TOTAL_REVENUE") \
-        .limit(50)
-    return df.to_pandas()
-
-@st.cache_data(ttl=600)
+@st.cache_resource(max_entries=2, show_spinner="Building guest search index...")
+def _build_guest_search_index(version):
+    """Build the guest search index for one GUEST_360_VIEW_ENHANCED watermark"""
+    session = get_session()
+    df = session.table("GOLD.GUEST_360_VIEW_ENHANCED").select(*GUEST_SEARCH_COLUMNS)
+    return GuestSearchIndex(fetch_frame(df, label="guest_search_index"))
+
+@instrumented
+def get_guest_search_index():
+    """Shared guest search index, rebuilt when the guest view is refreshed"""
+    return _build_guest_search_index(freshness_key(("GOLD.GUEST_360_VIEW_ENHANCED",)))
+
+@instrumented
+def search_guests(search_term, limit=50):
+    """Search guests by name or email, best matches first"""
+    return get_guest_search_index().search_results(search_term, limit)
+
+@instrumented
+def search_guest_ids(search_term, limit=None):
+    """GUEST_IDs matching a name or email search, best matches first"""
+    return get_guest_search_index().search_ids(search_term, limit)
+
+@st.cache_resource(max_entries=2, show_spinner="Indexing guest filters...")
+def _build_guest_filter_index(version):
+    """Build the guest filter index for one GUEST_360_VIEW_ENHANCED watermark"""
+    return GuestFilterIndex(get_guest_360_data())
+
+@instrumented
+def get_guest_filter_index():
+    """Shared filter index over get_guest_360_data() rows, rebuilt when the guest view is refreshed"""
+    return _build_guest_filter_index(freshness_key(("GOLD.GUEST_360_VIEW_ENHANCED",)))
+
+def _guest_search_expr(search_term):
+    """Case-insensitive substring match on first name, last name or email"""
+    term = lit(search_term.lower())
+    return (
+        contains(lower(col("FIRST_NAME")), term) |
+        contains(lower(col("LAST_NAME")), term) |
+        contains(lower(col("EMAIL")), term)
+    )
+
+def _aggregate_expr(func, column, filters=None):
+    """
+    Build the Snowpark aggregate expression for a measure
+    
+    With filters the column is NULL on rows failing them, so the measure is a
+    conditional aggregate (COUNT_IF, SUM(IFF(...)) and so on) over the same scan.
+    """
+    value = col(column)
+    if filters:
+        value = when(_filters_expr(filters), value)
+    if func in GUEST_AGGREGATE_FUNCTIONS:
+        return GUEST_AGGREGATE_FUNCTIONS[func](value)
+    if func.startswith('p') and func[1:].isdigit() and 0 < int(func[1:]) < 100:
+        return approx_percentile(value, int(func[1:]) / 100)
+    raise ValueError(f"Unsupported aggregate function: {func}")
+
+def _filter_expr(column, op, value=None):
+    """Build a Snowpark predicate from a (column, op, value) filter"""
+    c = col(column)
+    if op == '==':
+        return c == value
+    if op == '!=':
+        return c != value
+    if op == '>':
+        return c > value
+    if op == '>=':
+        return c >= value
+    if op == '<':
+        return c < value
+    if op == '<=':
+        return c <= value
+    if op == 'in':
+        values = list(value)
+        return c.isin(values) if values else lit(False)
+    if op == 'is_null':
+        return c.is_null()
+    if op == 'not_null':
+        return c.is_not_null()
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+def _filters_expr(filters):
+    """AND of a sequence of (column, op, value) filters as one Snowpark predicate"""
+    predicate = None
+    for f in filters:
+        expr = _filter_expr(*f)
+        predicate = expr if predicate is None else predicate & expr
+    return predicate
+
+def _apply_filters(df, filters):
+    """Apply a sequence of (column, op, value) filters to a Snowpark DataFrame"""
+    for f in filters or ():
+        df = df.filter(_filter_expr(*f))
+    return df
+
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
+def get_guest_aggregates(measures, group_by=None, filters=None):
+    """
+    Aggregate the guest 360 view in the warehouse and return only the result
+    
+    Args:
+        measures: Sequence of (alias, func, column) tuples, e.g. ('REVENUE', 'sum', 'TOTAL_REVENUE').
+            func is one of GUEST_AGGREGATE_FUNCTIONS or a percentile such as 'p90'.
+            An optional fourth element of (column, op, value) filters limits that
+            measure alone to matching rows, so several filtered counts share one query
+        group_by: Optional dimension or list of dimensions from GUEST_AGGREGATE_DIMENSIONS
+        filters: Optional sequence of (column, op, value) predicates applied before aggregating
+    
+    Returns:
+        pandas DataFrame with one row per group (a single row when group_by is None)
+    """
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    group_by = list(group_by or [])
+    for dim in group_by:
+        if dim not in GUEST_AGGREGATE_DIMENSIONS:
+            raise ValueError(f"Unsupported aggregate dimension: {dim}")
+    
+    session = get_session()
+    df = _apply_filters(session.table("GOLD.GUEST_360_VIEW_ENHANCED"), filters)
+    exprs = [_aggregate_expr(*measure[1:]).alias(measure[0]) for measure in measures]
+    if group_by:
+        df = df.group_by(*group_by).agg(*exprs).sort(*group_by)
+    else:
+        df = df.agg(*exprs)
+    return fetch_frame(df, label="get_guest_aggregates")
+
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
+def get_top_guests(order_by, n=10, columns=None, filters=None):
+    """Get the top-n guests by a column, fetching only the requested columns"""
+    session = get_session()
+    df = _apply_filters(session.table("GOLD.GUEST_360_VIEW_ENHANCED"), filters)
+    df = df.sort(col(order_by).desc_nulls_last()).limit(n)
+    if columns:
+        df = df.select(*columns)
+    return fetch_frame(df, label="get_top_guests")
+
+def _sort_key_expr(sort_by):
+    """Keyset sort key; NULLs sort as 0 so every row has a comparable cursor value"""
+    return coalesce(col(sort_by), lit(0))
+
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
+def get_guest_page(sort_by, descending=True, after=None, page_size=50, columns=None,
+                   filters=None, search_term=None):
+    """
+    Fetch one page of guests in (sort_by, GUEST_ID) keyset order
+    
+    Each page seeks past the previous page's last row instead of using
+    OFFSET, so fetching page N costs the same as fetching page 1.
+    
+    Args:
+        sort_by: One of GUEST_PAGE_SORT_COLUMNS
+        descending: Sort direction of sort_by; GUEST_ID always breaks ties ascending
+        after: Cursor from guest_page_cursor() for the previous page, or None for the first page
+        page_size: Maximum rows returned
+        columns: Optional columns to fetch; GUEST_ID and sort_by are always included
+        filters: Optional sequence of (column, op, value) predicates
+        search_term: Optional case-insensitive substring of name or email
+    
+    Returns:
+        pandas DataFrame with at most page_size rows
+    """
+    if sort_by not in GUEST_PAGE_SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort_by}")
+    
+    session = get_session()
+    df = _apply_filters(session.table("GOLD.GUEST_360_VIEW_ENHANCED"), filters)
+    if search_term:
+        df = df.filter(_guest_search_expr(search_term))
+    
+    sort_key = _sort_key_expr(sort_by)
+    if after is not None:
+        last_value, last_id = after
+        beyond = sort_key < lit(last_value) if descending else sort_key > lit(last_value)
+        df = df.filter(beyond | ((sort_key == lit(last_value)) & (col("GUEST_ID") > lit(last_id))))
+    
+    df = df.sort(sort_key.desc() if descending else sort_key.asc(), col("GUEST_ID").asc()).limit(page_size)
+    if columns:
+        df = df.select(*dict.fromkeys(["GUEST_ID", sort_by, *columns]))
+    return fetch_frame(df, label="get_guest_page")
+
+def guest_page_cursor(page, sort_by):
+    """Cursor to pass as `after` to fetch the page following `page`"""
+    last = page.iloc[-1]
+    value = last[sort_by]
+    if value is None or value != value:
+        value = 0
+    guest_id = last['GUEST_ID']
+    return (
+        value.item() if hasattr(value, 'item') else value,
+        guest_id.item() if hasattr(guest_id, 'item') else guest_id
+    )
+
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
+def get_guest_value_histogram(column, bin_edges, filters=None):
+    """
+    Count guests per value bin in the warehouse
+    
+    Args:
+        column: Numeric column to bin, e.g. 'TOTAL_REVENUE'
+        bin_edges: Ascending bin edges; bin i covers [edge i, edge i+1) and the
+            last bin is open-ended
+        filters: Optional sequence of (column, op, value) predicates applied before binning
+    
+    Returns:
+        pandas DataFrame with BIN (index into bin_edges) and GUESTS columns
+    """
+    session = get_session()
+    # Highest edge first so each value lands in the last bin whose edge it reaches
+    last = len(bin_edges) - 1
+    bin_expr = when(col(column) >= bin_edges[last], lit(last))
+    for i in range(last - 1, -1, -1):
+        bin_expr = bin_expr.when(col(column) >= bin_edges[i], lit(i))
+    df = _apply_filters(session.table("GOLD.GUEST_360_VIEW_ENHANCED"), filters) \
+        .select(bin_expr.alias("BIN")) \
+        .filter(col("BIN").is_not_null()) \
+        .group_by("BIN").agg(count(lit(1)).alias("GUESTS")) \
+        .sort("BIN")
+    return fetch_frame(df, label="get_guest_value_histogram")
+
+@instrumented
+@freshness_cached("GOLD.GUEST_360_VIEW_ENHANCED")
 def get_summary_metrics():
     """Get high-level summary metrics"""
-    session = get_active_session()
-    
-    # Guest metrics
-    guest_df = session.table("GOLD.GUEST_360_VIEW_ENHANCED")
-    total_guests = guest_df.count()
-    total_revenue = guest_df.select(sum_("TOTAL_REVENUE").alias("total")).to_pandas()['TOTAL'].iloc[0]
-    avg_satisfaction = guest_df.select(avg("AVG_AMENITY_SATISFACTION").alias("avg")).to_pandas()['AVG'].iloc[0]
+    summary = get_guest_aggregates((
+        ('TOTAL_GUESTS', 'count', 'GUEST_ID'),
+        ('TOTAL_REVENUE', 'sum', 'TOTAL_REVENUE'),
+        ('AVG_SATISFACTION', 'avg', 'AVG_AMENITY_SATISFACTION'),
+    ))
     
     return {
-        'total_guests': total_guests,
-        'total_revenue': total_revenue,
-        'avg_satisfaction': avg_satisfaction
+        'total_guests': int(summary['TOTAL_GUESTS'].iloc[0]),
+        'total_revenue': summary['TOTAL_REVENUE'].iloc[0],
+        'avg_satisfaction': summary['AVG_SATISFACTION'].iloc[0]
     }
 
+def refresh_data():
+    """Re-probe Gold/Silver refresh watermarks; only loaders whose tables changed re-query"""
+    refresh_watermarks()
+
 def clear_cache():
     """Clear all cached data"""
     st.cache_data.clear()
+    _build_guest_search_index.clear()
+    _build_guest_filter_index.clear()
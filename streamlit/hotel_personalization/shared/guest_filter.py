@@ -0,0 +1,150 @@
+"""
+Bitmap filter index over the guest frame
+Equality filters on low-cardinality dimensions are answered from per-value
+bitmaps and range filters from a sorted column index, combined with bitwise
+AND, so a filter change never copies the guest frame
+"""
+import numpy as np
+import pandas as pd
+
+# Dimensions filtered by equality, one bitmap per distinct value
+FILTER_DIMENSIONS = ('LOYALTY_TIER', 'CUSTOMER_SEGMENT', 'CHURN_RISK')
+
+# Numeric columns filtered by range, each with a sorted index
+RANGE_COLUMNS = ('TOTAL_REVENUE',)
+
+# Set bits per byte value, for counting selections without unpacking them
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class GuestFilterIndex:
+    """
+    Filter index over a guest frame, addressed by row position
+
+    Each FILTER_DIMENSIONS value has a packed bitmap (one bit per row) and a
+    code array; each RANGE_COLUMNS column has its row order by value, so a
+    range is a contiguous slice found by binary search. A selection is a
+    packed bitmap; rows() turns it into the positions to take from the frame
+    the index was built on, and the aggregate helpers read the code and
+    value arrays directly instead of a filtered copy.
+    """
+
+    def __init__(self, frame, dimensions=FILTER_DIMENSIONS, range_columns=RANGE_COLUMNS):
+        self.size = len(frame)
+        self._all = np.packbits(np.ones(self.size, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+        # column -> (codes per row, distinct values in sorted order, {value: bitmap})
+        self._dimensions = {}
+        for column in dimensions:
+            codes, values = pd.factorize(frame[column], sort=True)
+            values = list(values)
+            bitmaps = {value: np.packbits(codes == code) for code, value in enumerate(values)}
+            self._dimensions[column] = (codes.astype(np.int16), values, bitmaps)
+
+        # column -> (values per row, row order by value, values in that order)
+        self._ranges = {}
+        for column in range_columns:
+            values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+            order = np.argsort(values, kind='stable')
+            self._ranges[column] = (values, order, values[order])
+
+        ids = frame['GUEST_ID'].astype(str).to_numpy()
+        self._id_order = np.argsort(ids, kind='stable')
+        self._sorted_ids = ids[self._id_order]
+
+    def __len__(self):
+        return self.size
+
+    def options(self, column):
+        """Distinct non-null values of a dimension, sorted"""
+        return sorted(self._dimensions[column][1])
+
+    def max_value(self, column):
+        """Largest non-null value of a range column, or 0 when there is none"""
+        values = self._ranges[column][2]
+        values = values[~np.isnan(values)]
+        return values[-1] if len(values) else 0
+
+    def _positions_bitmap(self, rows):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def _range_bitmap(self, column, low, high):
+        _, order, sorted_values = self._ranges[column]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        # NaN sorts last and never falls inside a range
+        end = np.searchsorted(sorted_values, np.inf if high is None else high, side='right')
+        return self._positions_bitmap(order[start:end])
+
+    def positions(self, guest_ids):
+        """Row positions of guest_ids, in the order given; unknown ids are dropped"""
+        guest_ids = np.asarray(guest_ids, dtype=str)
+        found = np.searchsorted(self._sorted_ids, guest_ids)
+        inside = found < self.size
+        found, guest_ids = found[inside], guest_ids[inside]
+        return self._id_order[found[self._sorted_ids[found] == guest_ids]]
+
+    def select(self, equals=None, ranges=None, guest_ids=None):
+        """
+        Bitmap of the rows matching every filter
+
+        Args:
+            equals: {dimension: value}; a value of None is ignored
+            ranges: {column: (low, high)}, inclusive; either bound may be None
+            guest_ids: Optional GUEST_IDs the rows must be among
+
+        Returns:
+            Packed numpy bitmap, one bit per row
+        """
+        selected = self._all.copy()
+        for column, value in (equals or {}).items():
+            if value is None:
+                continue
+            selected &= self._dimensions[column][2].get(value, self._none)
+        for column, (low, high) in (ranges or {}).items():
+            selected &= self._range_bitmap(column, low, high)
+        if guest_ids is not None:
+            selected &= self._positions_bitmap(self.positions(guest_ids))
+        return selected
+
+    def count(self, selected):
+        """Rows in a selection"""
+        return int(_POPCOUNT[selected].sum(dtype=np.int64))
+
+    def contains(self, selected, rows):
+        """Mask of which row positions are in a selection"""
+        return (selected[rows >> 3] >> (7 - (rows & 7)) & 1).astype(bool)
+
+    def rows(self, selected):
+        """Row positions of a selection, ascending"""
+        return np.flatnonzero(np.unpackbits(selected, count=self.size))
+
+    def value_counts(self, column, rows):
+        """Rows per value of a dimension among rows, largest first, zero counts dropped"""
+        codes, values, _ = self._dimensions[column]
+        codes = codes[rows]
+        counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(values)), index=values)
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def sum_by(self, column, value_column, rows):
+        """Sum of a range column per value of a dimension among rows, largest first"""
+        codes, values, _ = self._dimensions[column]
+        codes = codes[rows]
+        amounts = np.nan_to_num(self._ranges[value_column][0][rows])
+        present = codes >= 0
+        sums = np.bincount(codes[present], weights=amounts[present], minlength=len(values))
+        counts = np.bincount(codes[present], minlength=len(values))
+        return pd.Series(sums, index=values)[counts > 0].sort_values(ascending=False)
+
+    def top_rows(self, column, rows, n=10):
+        """Positions of the n rows with the largest values of a range column, largest first"""
+        values = self._ranges[column][0][rows]
+        present = ~np.isnan(values)
+        rows, values = rows[present], values[present]
+        if len(rows) > n:
+            keep = np.argpartition(values, -n)[-n:]
+            rows, values = rows[keep], values[keep]
+        # Largest first, ties in row order
+        return rows[np.lexsort((rows, -values))]
@@ -0,0 +1,291 @@
+"""
+In-memory guest search index
+Prefix lookup over name/email tokens plus trigram postings for substring
+matches, so typeahead search never scans the guest table
+"""
+import numpy as np
+import pandas as pd
+
+# Fields searched, in ranking priority order
+SEARCH_FIELDS = ('FIRST_NAME', 'LAST_NAME', 'EMAIL')
+
+# Extra columns kept for displaying search results without a query
+RESULT_COLUMNS = ('GUEST_ID', 'FIRST_NAME', 'LAST_NAME', 'EMAIL', 'LOYALTY_TIER', 'TOTAL_REVENUE')
+
+# Terms shorter than this match token prefixes only; longer terms also match substrings
+TRIGRAM = 3
+
+# Characters that separate tokens within a name or email
+_TOKEN_SEPARATORS = str.maketrans({c: ' ' for c in "@._+-'"})
+
+
+def _search_terms(query):
+    """Lower-case whitespace-separated terms of a search query"""
+    return [term for term in query.lower().split() if term]
+
+
+def _tokenize(text):
+    """Tokens of a lower-cased name or email"""
+    return text.translate(_TOKEN_SEPARATORS).split()
+
+
+def _trigram_code(gram):
+    """Pack a three-character string into one integer"""
+    return (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+
+
+def _trigram_codes(values):
+    """
+    Packed trigrams of each string
+
+    Returns:
+        (starts, codes): codes[starts[i]:starts[i + 1]] are the distinct
+        trigrams of values[i]
+    """
+    chars = np.asarray(values, dtype=str)
+    width = chars.dtype.itemsize // 4
+    if width < TRIGRAM:
+        return np.zeros(len(chars) + 1, dtype=np.int64), np.empty(0, dtype=np.int64)
+    points = chars.view(np.uint32).reshape(len(chars), width).astype(np.int64)
+    packed = (points[:, :-2] << 42) | (points[:, 1:-1] << 21) | points[:, 2:]
+    packed[points[:, 2:] == 0] = -1
+    packed.sort(axis=1)
+    distinct = packed != -1
+    distinct[:, 1:] &= packed[:, 1:] != packed[:, :-1]
+    starts = np.concatenate(([0], np.cumsum(distinct.sum(axis=1))))
+    return starts, packed[distinct]
+
+
+def _sorted_unique(values):
+    """Sorted distinct values (sort-based; hash-based np.unique is slower here)"""
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] if len(values) else values
+
+
+def _pair_rows(codes, starts, items):
+    """
+    Pair each row with every item of its distinct value
+
+    Args:
+        codes: Distinct-value index per row (from pd.factorize)
+        starts, items: items[starts[u]:starts[u + 1]] belong to value u
+
+    Returns:
+        (rows, items) arrays of equal length
+    """
+    counts = np.diff(starts)[codes]
+    rows = np.repeat(np.arange(len(codes), dtype=np.int32), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, items[np.repeat(starts[:-1][codes], counts) + offsets]
+
+
+def _group(keys, rows, key_count):
+    """Sort distinct (key, row) pairs by key; returns (starts, rows) per key"""
+    width = int(rows.max()) + 1 if len(rows) else 1
+    pairs = _sorted_unique(keys.astype(np.int64) * width + rows)
+    keys, rows = np.divmod(pairs, width)
+    starts = np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=key_count))))
+    return starts, rows.astype(np.int32)
+
+
+class GuestSearchIndex:
+    """
+    Search index over guest names and emails
+
+    The token vocabulary (names and the parts of an email) is one sorted
+    array, which serves as a flattened prefix trie: all tokens sharing a
+    prefix are a contiguous range found by binary search, and their guests
+    are a contiguous slice of token_rows. Trigram postings map every
+    three-character substring of the names and email local part to the
+    guests containing it.
+
+    A guest matches when every query term prefixes one of its tokens or,
+    for terms of three or more characters, is a substring of its names or
+    email local part. Matches are ranked exact token > token prefix >
+    substring. Terms containing a token separator ("jane.doe@example.com",
+    "gmail.com", "@") cannot be looked up token by token, so they are
+    matched as substrings of the whole lower-cased names and email, ranked
+    exact value > value prefix > substring.
+
+    Names repeat heavily, so tokens and trigrams are computed once per
+    distinct value and then fanned out to rows.
+    """
+
+    def __init__(self, frame):
+        frame = frame.reset_index(drop=True)
+        self.results = frame[[c for c in RESULT_COLUMNS if c in frame.columns]]
+        self.guest_ids = self.results['GUEST_ID'].to_numpy()
+
+        # (codes, distinct lower-cased values) per searched field
+        self.fields = []
+        for name in SEARCH_FIELDS:
+            codes, values = pd.factorize(frame[name].astype(object).fillna(''))
+            self.fields.append((codes, np.array([str(v).lower() for v in values], dtype=object)))
+
+        # Token vocabulary: distinct tokens in sorted order
+        field_tokens = [[_tokenize(v) for v in values] for _, values in self.fields]
+        flat = [np.array([t for value_tokens in tokens for t in value_tokens], dtype=object) for tokens in field_tokens]
+        token_ids, vocabulary = pd.factorize(np.concatenate(flat), sort=True)
+        self.vocabulary = np.asarray(vocabulary, dtype=str)
+
+        token_pairs, gram_pairs = [], []
+        offset = 0
+        for (codes, _), tokens, field_flat in zip(self.fields, field_tokens, flat):
+            counts = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+            ids = token_ids[offset:offset + len(field_flat)]
+            offset += len(field_flat)
+            token_pairs.append(_pair_rows(codes, np.concatenate(([0], np.cumsum(counts))), ids))
+
+        # Trigrams of names and the email local part (not the shared domains)
+        gram_values = [self.fields[0][1], self.fields[1][1], [v.split('@')[0] for v in self.fields[2][1]]]
+        for (codes, _), values in zip(self.fields, gram_values):
+            starts, grams = _trigram_codes(values)
+            gram_pairs.append(_pair_rows(codes, starts, grams))
+
+        # token id -> rows, contiguous in vocabulary order
+        rows = np.concatenate([r for r, _ in token_pairs])
+        self.token_starts, self.token_rows = _group(
+            np.concatenate([i for _, i in token_pairs]), rows, len(self.vocabulary)
+        )
+
+        # trigram -> rows
+        grams = np.concatenate([g for _, g in gram_pairs])
+        self.grams = _sorted_unique(grams)
+        self.gram_starts, self.gram_rows = _group(
+            np.searchsorted(self.grams, grams), np.concatenate([r for r, _ in gram_pairs]), len(self.grams)
+        )
+
+    def __len__(self):
+        return len(self.results)
+
+    def _prefix_rows(self, term):
+        """Rows with a token starting with term, and rows with a token equal to it"""
+        lo = np.searchsorted(self.vocabulary, term, side='left')
+        hi = np.searchsorted(self.vocabulary, term + '\uffff', side='left')
+        exact_hi = lo + 1 if lo < len(self.vocabulary) and self.vocabulary[lo] == term else lo
+        starts = self.token_starts
+        return self.token_rows[starts[lo]:starts[hi]], self.token_rows[starts[lo]:starts[exact_hi]]
+
+    def _posting(self, gram):
+        code = _trigram_code(gram)
+        i = np.searchsorted(self.grams, code)
+        if i == len(self.grams) or self.grams[i] != code:
+            return np.empty(0, dtype=np.int32)
+        return self.gram_rows[self.gram_starts[i]:self.gram_starts[i + 1]]
+
+    def _contains(self, rows, term):
+        """Mask of rows whose names or email local part contain term"""
+        (first_codes, first), (last_codes, last), (email_codes, email) = self.fields
+        return np.fromiter(
+            (
+                term in first[f] or term in last[l] or term in email[e].split('@')[0]
+                for f, l, e in zip(first_codes[rows], last_codes[rows], email_codes[rows])
+            ),
+            dtype=bool, count=len(rows)
+        )
+
+    def _value_matches(self, term):
+        """
+        Rows whose names or full email contain term, for terms with separators
+
+        Checked once per distinct value rather than per row.
+
+        Returns:
+            (rows, scores) as _term_matches returns them
+        """
+        best = np.zeros(len(self), dtype=np.int16)
+        for codes, values in self.fields:
+            values = pd.Series(values, dtype=object)
+            score = np.select(
+                [values == term, values.str.startswith(term), values.str.contains(term, regex=False)],
+                [3, 2, 1], default=0
+            ).astype(np.int16)
+            best = np.maximum(best, score[codes])
+        rows = np.flatnonzero(best)
+        return rows, best[rows]
+
+    def _substring_rows(self, term, matched=None):
+        """
+        Rows whose names or email local part contain term (len(term) >= TRIGRAM)
+
+        Rows in matched (already known to match term) may be left out, which
+        spares them the per-row substring check.
+        """
+        postings = sorted(
+            (self._posting(term[i:i + TRIGRAM]) for i in range(len(term) - TRIGRAM + 1)),
+            key=len
+        )
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(term) > TRIGRAM and len(candidates):
+            if matched is not None and len(matched):
+                candidates = candidates[~np.isin(candidates, matched)]
+            candidates = candidates[self._contains(candidates, term)]
+        return candidates
+
+    def _term_matches(self, term):
+        """
+        Rows matching one term and their best match score
+
+        Returns:
+            (rows, scores): ascending distinct rows; 3 exact token, 2 token
+            prefix, 1 substring
+        """
+        if _tokenize(term) != [term]:
+            return self._value_matches(term)
+
+        prefix, exact = self._prefix_rows(term)
+        if len(term) < TRIGRAM and len(exact) == len(prefix):
+            # Only the exact token matched: its rows are already ascending and distinct
+            return exact.astype(np.int64), np.full(len(exact), 3, dtype=np.int16)
+
+        # Sort (row, rank) keys so each row's best match comes first, keep that one
+        parts = [exact, prefix] + ([self._substring_rows(term, prefix)] if len(term) >= TRIGRAM else [])
+        keys = np.sort(np.concatenate([part.astype(np.int64) * 4 + rank for rank, part in enumerate(parts)]))
+        rows = keys >> 2
+        first = np.concatenate(([True], rows[1:] != rows[:-1])) if len(rows) else np.empty(0, dtype=bool)
+        return rows[first], (3 - (keys[first] & 3)).astype(np.int16)
+
+    def search(self, query, limit=50):
+        """
+        Ranked row positions of guests matching every term of query
+
+        Only the rows each term matches are scored, so the cost follows the
+        number of matches rather than the number of guests.
+
+        Args:
+            query: Free-text search, e.g. "jane smi"
+            limit: Maximum rows returned, or None for every match
+
+        Returns:
+            numpy array of row positions into self.results, best first
+        """
+        terms = _search_terms(query)
+        if not terms or not len(self):
+            return np.empty(0, dtype=np.int64)
+
+        # Intersect the smallest match sets first
+        matches = sorted((self._term_matches(term) for term in terms), key=lambda m: len(m[0]))
+        rows, scores = matches[0]
+        for term_rows, term_scores in matches[1:]:
+            if not len(rows):
+                break
+            # Both sides ascending, so sorted-needle binary search is a merge
+            found = np.minimum(np.searchsorted(term_rows, rows), len(term_rows) - 1)
+            keep = term_rows[found] == rows if len(term_rows) else np.zeros(len(rows), dtype=bool)
+            rows, scores = rows[keep], scores[keep] + term_scores[found[keep]]
+
+        # Highest score first; ties keep row order
+        ranked = rows[np.argsort(-scores, kind='stable')]
+        return ranked if limit is None else ranked[:limit]
+
+    def search_results(self, query, limit=50):
+        """Display columns for the ranked matches of query"""
+        return self.results.iloc[self.search(query, limit)].reset_index(drop=True)
+
+    def search_ids(self, query, limit=None):
+        """Ranked GUEST_IDs matching query"""
+        return self.guest_ids[self.search(query, limit)]
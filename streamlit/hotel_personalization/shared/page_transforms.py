@@ -0,0 +1,228 @@
+"""
+Page transformations for the personalization app
+The pandas work behind each page's charts and tables, kept apart from the
+rendering so the pages and the micro-benchmarks run the same code
+"""
+import pandas as pd
+
+from viz_components import format_currency, format_number
+
+# Columns of the Guest 360 guest table and its download
+GUEST_TABLE_COLUMNS = (
+    'GUEST_ID', 'FIRST_NAME', 'LAST_NAME', 'EMAIL',
+    'LOYALTY_TIER', 'CUSTOMER_SEGMENT', 'CHURN_RISK',
+    'TOTAL_BOOKINGS', 'TOTAL_REVENUE', 'AVG_BOOKING_VALUE',
+    'LOYALTY_POINTS', 'TOTAL_AMENITY_SPEND', 'AVG_AMENITY_SATISFACTION'
+)
+
+# Upsell propensity columns compared in the Propensity Analysis tab
+PROPENSITY_CATEGORIES = {
+    'Spa': 'SPA_UPSELL_PROPENSITY',
+    'Dining': 'DINING_UPSELL_PROPENSITY',
+    'Tech': 'TECH_UPSELL_PROPENSITY',
+    'Pool': 'POOL_SERVICES_UPSELL_PROPENSITY',
+}
+
+# Upsell propensity above which a guest above the median revenue is a priority target
+PRIORITY_PROPENSITY_SCORE = 70
+
+
+def _format_satisfaction(value):
+    return f"{value:.1f}/5.0"
+
+
+# =====================================================================
+# Guest 360
+# =====================================================================
+
+def guest_analytics(guests_df, guest_index, rows, top=10):
+    """
+    Distributions and top guests of the Analytics tab
+
+    Args:
+        guests_df: Frame guest_index was built on
+        guest_index: GuestFilterIndex over guests_df
+        rows: Row positions of the filtered guests
+        top: Guests listed by revenue
+
+    Returns:
+        (tier_counts, segment_counts, risk_counts, segment_revenue, top_guests)
+    """
+    tier_counts = guest_index.value_counts('LOYALTY_TIER', rows)
+    segment_counts = guest_index.value_counts('CUSTOMER_SEGMENT', rows)
+    risk_counts = guest_index.value_counts('CHURN_RISK', rows)
+    segment_revenue = guest_index.sum_by('CUSTOMER_SEGMENT', 'TOTAL_REVENUE', rows)
+
+    top_guests = guests_df.take(guest_index.top_rows('TOTAL_REVENUE', rows, top))[
+        ['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_REVENUE', 'TOTAL_BOOKINGS', 'AVG_AMENITY_SATISFACTION']
+    ].copy()
+    top_guests['TOTAL_REVENUE'] = top_guests['TOTAL_REVENUE'].apply(format_currency)
+    top_guests['AVG_AMENITY_SATISFACTION'] = top_guests['AVG_AMENITY_SATISFACTION'].apply(_format_satisfaction)
+    return tier_counts, segment_counts, risk_counts, segment_revenue, top_guests.reset_index(drop=True)
+
+
+def guest_picker_labels(candidates):
+    """Guest Profile picker label per GUEST_ID of the candidate guests"""
+    return {
+        guest_id: f"{first} {last} ({tier}) - {format_currency(revenue)}"
+        for guest_id, first, last, tier, revenue in zip(
+            candidates['GUEST_ID'], candidates['FIRST_NAME'], candidates['LAST_NAME'],
+            candidates['LOYALTY_TIER'], candidates['TOTAL_REVENUE']
+        )
+    }
+
+
+def guest_list_csv(guests_df, rows, sort_by, descending, columns):
+    """CSV of the filtered guests in table order, for the download button"""
+    display_df = guests_df.take(rows).sort_values(by=sort_by, ascending=not descending)
+    return display_df[columns].to_csv(index=False)
+
+
+# =====================================================================
+# Personalization Hub
+# =====================================================================
+
+def filter_guests(df, segments, tiers):
+    """Guests in any of segments and any of tiers; an empty selection or missing column keeps all"""
+    filter_mask = pd.Series([True] * len(df), index=df.index)
+
+    if segments and 'CUSTOMER_SEGMENT' in df.columns:
+        filter_mask &= df['CUSTOMER_SEGMENT'].isin(segments)
+
+    if tiers and 'LOYALTY_TIER' in df.columns:
+        filter_mask &= df['LOYALTY_TIER'].isin(tiers)
+
+    return df[filter_mask]
+
+
+def priority_targets(df, top=20):
+    """
+    High-propensity guests above the median revenue
+
+    Returns:
+        (display, targets): the top rows formatted for the table, and every
+        target for the download
+    """
+    targets = df[
+        (df['UPSELL_PROPENSITY_SCORE'] > PRIORITY_PROPENSITY_SCORE) &
+        (df['TOTAL_REVENUE'] > df['TOTAL_REVENUE'].median())
+    ].sort_values('UPSELL_PROPENSITY_SCORE', ascending=False)
+
+    display_cols = ['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'CUSTOMER_SEGMENT',
+                    'UPSELL_PROPENSITY_SCORE', 'TOTAL_REVENUE']
+    display = targets[display_cols].head(top).copy()
+    display['TOTAL_REVENUE'] = display['TOTAL_REVENUE'].apply(format_currency)
+    return display, targets
+
+
+def propensity_scores(df, threshold):
+    """Average score and guests scoring above threshold per upsell category"""
+    return pd.DataFrame({
+        'Category': list(PROPENSITY_CATEGORIES),
+        'Avg Score': [df[column].mean() for column in PROPENSITY_CATEGORIES.values()],
+        'High Scorers': [int((df[column] > threshold).sum()) for column in PROPENSITY_CATEGORIES.values()],
+    })
+
+
+def segment_summary(df):
+    """
+    Segmentation tab tables
+
+    Returns:
+        (segment_counts, segment_revenue, segment_metrics): metrics formatted for display
+    """
+    segment_counts = df['CUSTOMER_SEGMENT'].value_counts().loc[lambda counts: counts > 0].reset_index()
+    segment_counts.columns = ['Segment', 'Count']
+
+    segment_revenue = df.groupby('CUSTOMER_SEGMENT', observed=True)['TOTAL_REVENUE'].sum().reset_index()
+    segment_revenue.columns = ['Segment', 'Revenue']
+
+    segment_metrics = df.groupby('CUSTOMER_SEGMENT', observed=True).agg({
+        'GUEST_ID': 'count',
+        'TOTAL_REVENUE': 'sum',
+        'UPSELL_PROPENSITY_SCORE': 'mean',
+        'PERSONALIZATION_READINESS_SCORE': 'mean',
+        'LOYALTY_PROPENSITY_SCORE': 'mean'
+    }).round(2)
+    segment_metrics.columns = ['Guest Count', 'Total Revenue', 'Avg Upsell Score', 'Avg Personalization', 'Avg Loyalty']
+    segment_metrics['Total Revenue'] = segment_metrics['Total Revenue'].apply(format_currency)
+    segment_metrics['Guest Count'] = segment_metrics['Guest Count'].apply(format_number)
+    return segment_counts, segment_revenue, segment_metrics
+
+
+def churn_summary(df, top=20):
+    """
+    Churn Management tab tables
+
+    Returns:
+        (churn_counts, revenue_at_risk, high_risk_display, high_risk): the
+        top high-risk guests formatted for the table, and all of them for
+        the download
+    """
+    churn_counts = df['CHURN_RISK'].value_counts().loc[lambda counts: counts > 0].reset_index()
+    churn_counts.columns = ['Risk Level', 'Count']
+
+    revenue_at_risk = df.groupby('CHURN_RISK', observed=True)['TOTAL_REVENUE'].sum().reset_index()
+    revenue_at_risk.columns = ['Risk Level', 'Revenue']
+
+    high_risk = df[df['CHURN_RISK'] == 'High Risk'].sort_values('TOTAL_REVENUE', ascending=False)
+    display_cols = ['FIRST_NAME', 'LAST_NAME', 'LOYALTY_TIER', 'TOTAL_REVENUE',
+                    'PERSONALIZATION_READINESS_SCORE', 'LOYALTY_PROPENSITY_SCORE']
+    high_risk_display = high_risk[display_cols].head(top).copy()
+    high_risk_display['TOTAL_REVENUE'] = high_risk_display['TOTAL_REVENUE'].apply(format_currency)
+    return churn_counts, revenue_at_risk, high_risk_display, high_risk
+
+
+# =====================================================================
+# Amenity Performance
+# =====================================================================
+
+def category_revenue(spending_df):
+    """Amenity revenue per category, highest first"""
+    revenue = spending_df.groupby('AMENITY_CATEGORY', observed=True)['AMOUNT'].sum().reset_index()
+    revenue.columns = ['Category', 'Revenue']
+    return revenue.sort_values('Revenue', ascending=False)
+
+
+def category_volume(spending_df):
+    """Transactions per amenity category, most first"""
+    volume = spending_df.groupby('AMENITY_CATEGORY', observed=True).size().reset_index()
+    volume.columns = ['Category', 'Transactions']
+    return volume.sort_values('Transactions', ascending=False)
+
+
+def top_services(spending_df, top=10):
+    """The top revenue-generating services, revenue formatted for display"""
+    services = spending_df.groupby('AMENITY_TYPE', observed=True)['AMOUNT'].sum().reset_index()
+    services.columns = ['Service', 'Revenue']
+    services = services.sort_values('Revenue', ascending=False).head(top)
+    services['Revenue'] = services['Revenue'].apply(format_currency)
+    return services
+
+
+def satisfaction_by_category(spending_df):
+    """Average guest satisfaction per amenity category, highest first"""
+    satisfaction = spending_df.groupby('AMENITY_CATEGORY', observed=True)['GUEST_SATISFACTION'].mean().reset_index()
+    satisfaction.columns = ['Category', 'Avg Satisfaction']
+    return satisfaction.sort_values('Avg Satisfaction', ascending=False)
+
+
+def usage_sessions(usage_df):
+    """Infrastructure usage sessions per amenity category"""
+    sessions = usage_df.groupby('AMENITY_CATEGORY', observed=True).size().reset_index()
+    sessions.columns = ['Category', 'Sessions']
+    return sessions
+
+
+def usage_duration(usage_df):
+    """Average session duration per amenity category"""
+    duration = usage_df.groupby('AMENITY_CATEGORY', observed=True)['USAGE_DURATION_MINUTES'].mean().reset_index()
+    duration.columns = ['Category', 'Avg Duration (min)']
+    return duration
+
+
+def tech_profile_counts(usage_df):
+    """Usage sessions per guest tech profile"""
+    counts = usage_df.groupby('TECH_PROFILE', observed=True).size().reset_index()
+    counts.columns = ['Tech Profile', 'Users']
+    return counts
@@ -1,10 +1,13 @@
 """
 Shared Visualization Components for Hotel Personalization Dashboards
 """
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 import pandas as pd
+from lazy_imports import lazy_import
+
+# plotly is imported when the first chart is built
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 
 def create_kpi_card(label, value, delta=None, delta_color="normal"):
     """Create a KPI metric card"""
@@ -0,0 +1,68 @@
+"""
+Tests for the in-memory guest search index
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'shared'))
+
+from guest_search import GuestSearchIndex  # noqa: E402
+
+
+def _guests():
+    return pd.DataFrame({
+        'GUEST_ID': ['G1', 'G2', 'G3', 'G4', 'G5'],
+        'FIRST_NAME': ['Jane', 'John', 'Janet', "Liam", 'Mary'],
+        'LAST_NAME': ['Doe', 'Smith', 'Doering', "O'Brien", 'Jones'],
+        'EMAIL': [
+            'jane.doe@example.com', 'jsmith@gmail.com', 'janet.d@example.org',
+            'liam.obrien@example.net', 'mary_jones@gmail.com',
+        ],
+        'LOYALTY_TIER': ['Gold', 'Silver', 'Blue', 'Diamond', 'Gold'],
+        'TOTAL_REVENUE': [1000.0, 2000.0, 3000.0, 4000.0, 5000.0],
+    })
+
+
+def _ids(index, query):
+    return sorted(index.search_ids(query))
+
+
+def test_name_prefix_and_substring():
+    index = GuestSearchIndex(_guests())
+    assert _ids(index, 'jan') == ['G1', 'G3']
+    assert _ids(index, 'jane doe') == ['G1', 'G3']
+    assert _ids(index, 'oeri') == ['G3']
+
+
+def test_full_email():
+    index = GuestSearchIndex(_guests())
+    assert _ids(index, 'jane.doe@example.com') == ['G1']
+    assert _ids(index, 'JSmith@Gmail.com') == ['G2']
+
+
+def test_email_domain():
+    index = GuestSearchIndex(_guests())
+    assert _ids(index, 'gmail.com') == ['G2', 'G5']
+    assert _ids(index, 'example.com') == ['G1']
+    assert _ids(index, '@example') == ['G1', 'G3', 'G4']
+    assert _ids(index, '@') == ['G1', 'G2', 'G3', 'G4', 'G5']
+
+
+def test_partial_email_local_part():
+    index = GuestSearchIndex(_guests())
+    assert _ids(index, 'ne.do') == ['G1']
+    assert _ids(index, 'y_jo') == ['G5']
+    assert _ids(index, 'mary_jones@') == ['G5']
+
+
+def test_name_with_separator():
+    index = GuestSearchIndex(_guests())
+    assert _ids(index, "o'brien") == ['G4']
+
+
+def test_exact_email_ranks_first():
+    index = GuestSearchIndex(_guests())
+    assert list(index.search_ids('janet.d@example.org')) == ['G3']
+    assert list(index.search_ids('jane'))[0] == 'G1'
@@ -4,7 +4,10 @@ Executive dashboard for Summit Hospitality Group portfolio intelligence
 """
 
 import streamlit as st
-from snowflake.snowpark.context import get_active_session
+from shared.data_loader_intel import refresh_data
+from shared.page_registry import run_page
+from shared.render_profiler import render_profile_report
+from shared.telemetry import current_page
 
 # Page configuration
 st.set_page_config(
@@ -14,9 +17,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize Snowpark session
-session = get_active_session()
-
 # Custom CSS for better styling
 st.markdown("""
     <style>
@@ -59,10 +59,10 @@ page = st.sidebar.radio(
 
 st.sidebar.markdown("---")
 
-# Global Refresh Data button
-if st.sidebar.button("🔄 Refresh Data", help="Clear all cached data and reload from database"):
-    st.cache_data.clear()
-    st.cache_resource.clear()
+# Global Refresh Data button - re-checks table refresh watermarks instead of
+# clearing every user's cache; only data whose tables were refreshed reloads
+if st.sidebar.button("🔄 Refresh Data", help="Check for refreshed Gold/Silver tables and reload changed data"):
+    refresh_data()
     st.experimental_rerun()
 
 st.sidebar.markdown("---")
@@ -87,15 +87,18 @@ AI-powered executive intelligence with:
 st.sidebar.markdown("---")
 st.sidebar.caption("© 2026 Hotel Intelligence Hub | Powered by Snowflake ❄️")
 
-# Load the selected page content
+# Load the selected page content (compiled once, recompiled when the file changes)
 if page == "🏠 Intelligence Hub Home":
-    exec(open('pages/home_content.py').read())
+    run_page('pages/home_content.py', globals())
 
 elif page == "📈 Portfolio Overview":
-    exec(open('pages/1_Portfolio_Overview.py').read())
+    run_page('pages/1_Portfolio_Overview.py', globals())
 
 elif page == "🎯 Loyalty Intelligence":
-    exec(open('pages/2_Loyalty_Intelligence.py').read())
+    run_page('pages/2_Loyalty_Intelligence.py', globals())
 
 elif page == "💬 CX & Service Signals":
-    exec(open('pages/3_CX_Service_Signals.py').read())
+    run_page('pages/3_CX_Service_Signals.py', globals())
+
+# Section timings of the page just rendered, when opened with ?profile=1
+render_profile_report(current_page())
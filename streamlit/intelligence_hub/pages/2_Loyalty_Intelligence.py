@@ -5,14 +5,17 @@ Segment-level behavior, spend patterns, and retention opportunities
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 sys.path.append('../shared')
 
-from shared.data_loader_intel import load_loyalty_segments
+from shared.lazy_imports import lazy_import
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+from shared.data_loader_intel import load_loyalty_segments, get_data_version
+from shared.render_profiler import mark_section
 from shared.viz_components_intel import create_kpi_card, create_bar_chart, create_grouped_bar_chart
 from shared.formatters import format_currency, format_percent, format_number
+from shared.page_transforms import member_kpis, tier_ordered, opportunity_table, driver_tables
 
 st.title("🎯 Loyalty Intelligence")
 st.markdown("Deep dive into guest segments, repeat stay drivers, and retention opportunities")
@@ -20,25 +23,25 @@ st.markdown("Deep dive into guest segments, repeat stay drivers, and retention o
 # =====================================================================
 # Load Data
 # =====================================================================
+mark_section("Load Data")
 df_segments = load_loyalty_segments()
 
 if df_segments.empty:
     st.warning("No loyalty segment data available.")
     st.stop()
 
+# Tables and aggregates below depend only on df_segments, which has no
+# filters, so they are memoized on its data version alone
+segments_key = (get_data_version('load_loyalty_segments'), ())
+
 # =====================================================================
 # KPI Cards
 # =====================================================================
+mark_section("KPI Cards")
 st.markdown("### 📊 Loyalty Program KPIs")
 
 # Calculate aggregate metrics (ONLY for actual loyalty program members, not "Non-Member")
-loyalty_segments = df_segments[df_segments['LOYALTY_TIER'] != 'Non-Member']
-total_members = loyalty_segments['ACTIVE_MEMBERS'].sum()
-avg_repeat_rate = (loyalty_segments['REPEAT_RATE_PCT'] * loyalty_segments['ACTIVE_MEMBERS']).sum() / total_members if total_members > 0 else 0
-avg_spend = (loyalty_segments['AVG_SPEND_PER_STAY'] * loyalty_segments['ACTIVE_MEMBERS']).sum() / total_members if total_members > 0 else 0
-high_value_members = loyalty_segments[loyalty_segments['AVG_SPEND_PER_STAY'] > 500]['ACTIVE_MEMBERS'].sum()
-high_value_share = (high_value_members / total_members * 100) if total_members > 0 else 0
-at_risk_count = loyalty_segments[loyalty_segments['REPEAT_RATE_PCT'] < 40]['ACTIVE_MEMBERS'].sum()
+total_members, avg_repeat_rate, avg_spend, high_value_share, at_risk_count = member_kpis(segments_key, df_segments)
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -80,24 +83,19 @@ with col5:
 # =====================================================================
 # Charts
 # =====================================================================
+mark_section("Charts")
 st.markdown("---")
 st.markdown("### 📊 Segment Analysis")
 
+segments_by_tier = tier_ordered(segments_key, df_segments)
+
 chart_col1, chart_col2 = st.columns(2)
 
 with chart_col1:
     # Repeat Rate by Loyalty Tier
     st.markdown("#### Repeat Rate by Loyalty Tier")
-    # Since we have one row per tier, just select and order the data
-    tier_data = df_segments[['LOYALTY_TIER', 'REPEAT_RATE_PCT']].copy()
-    
-    # Define tier order: Blue → Silver → Gold → Diamond → Non-Member (ascending loyalty + non-member last)
-    tier_order_map = {'Blue': 0, 'Silver': 1, 'Gold': 2, 'Diamond': 3, 'Non-Member': 4}
-    tier_data['sort_order'] = tier_data['LOYALTY_TIER'].map(tier_order_map)
-    tier_data = tier_data.sort_values('sort_order').drop('sort_order', axis=1).reset_index(drop=True)
-    
     # Set LOYALTY_TIER as index for simple bar chart
-    tier_data = tier_data.set_index('LOYALTY_TIER')
+    tier_data = segments_by_tier[['LOYALTY_TIER', 'REPEAT_RATE_PCT']].set_index('LOYALTY_TIER')
     
     # Use Streamlit's simple bar chart
     st.bar_chart(tier_data['REPEAT_RATE_PCT'], height=350)
@@ -105,16 +103,8 @@ with chart_col1:
 with chart_col2:
     # Spend by Tier
     st.markdown("#### Avg Spend per Stay by Tier")
-    # Since we have one row per tier, just select and order the data
-    spend_data = df_segments[['LOYALTY_TIER', 'AVG_SPEND_PER_STAY']].copy()
-    
-    # Define tier order: Blue → Silver → Gold → Diamond → Non-Member (ascending loyalty + non-member last)
-    tier_order_map = {'Blue': 0, 'Silver': 1, 'Gold': 2, 'Diamond': 3, 'Non-Member': 4}
-    spend_data['sort_order'] = spend_data['LOYALTY_TIER'].map(tier_order_map)
-    spend_data = spend_data.sort_values('sort_order').drop('sort_order', axis=1).reset_index(drop=True)
-    
     # Set LOYALTY_TIER as index for simple bar chart
-    spend_data = spend_data.set_index('LOYALTY_TIER')
+    spend_data = segments_by_tier[['LOYALTY_TIER', 'AVG_SPEND_PER_STAY']].set_index('LOYALTY_TIER')
     
     # Use Streamlit's simple bar chart (no color param - not supported in Snowflake Streamlit)
     st.bar_chart(spend_data['AVG_SPEND_PER_STAY'], height=350)
@@ -123,13 +113,7 @@ with chart_col2:
 st.markdown("#### Revenue Mix by Loyalty Tier")
 st.caption("Revenue breakdown across tiers (Room dominates ~75-80% for all)")
 
-# Since we have one row per tier, just select and order the data
-spend_mix_data = df_segments[['LOYALTY_TIER', 'ROOM_REVENUE_PCT', 'FB_REVENUE_PCT', 'SPA_REVENUE_PCT', 'OTHER_REVENUE_PCT']].copy()
-
-# Define tier order: Blue → Silver → Gold → Diamond → Non-Member (ascending loyalty + non-member last)
-tier_order_map = {'Blue': 0, 'Silver': 1, 'Gold': 2, 'Diamond': 3, 'Non-Member': 4}
-spend_mix_data['sort_order'] = spend_mix_data['LOYALTY_TIER'].map(tier_order_map)
-spend_mix_data = spend_mix_data.sort_values('sort_order').drop('sort_order', axis=1).reset_index(drop=True)
+spend_mix_data = segments_by_tier[['LOYALTY_TIER', 'ROOM_REVENUE_PCT', 'FB_REVENUE_PCT', 'SPA_REVENUE_PCT', 'OTHER_REVENUE_PCT']]
 
 # Rename columns for display
 spend_mix_display = spend_mix_data.rename(columns={
@@ -154,34 +138,12 @@ st.dataframe(
 # =====================================================================
 # Top Loyalty Opportunities Table
 # =====================================================================
+mark_section("Top Loyalty Opportunities Table")
 st.markdown("---")
 st.markdown("### 🎯 Top Loyalty Opportunities")
 st.caption("Segment-level insights and strategic recommendations")
 
-# Prepare table data with strategic insights per tier
-opportunities_df = df_segments[[
-    'SEGMENT', 'REPEAT_RATE_PCT', 'AVG_SPEND_PER_STAY', 'TOP_FRICTION_DRIVER',
-    'RECOMMENDED_FOCUS', 'EXPERIENCE_AFFINITY', 'UNDERUTILIZED_OPPORTUNITY'
-]].copy()
-
-# Rename columns
-opportunities_df = opportunities_df.rename(columns={
-    'SEGMENT': 'Segment',
-    'REPEAT_RATE_PCT': 'Repeat Rate (%)',
-    'AVG_SPEND_PER_STAY': 'Avg Spend ($)',
-    'TOP_FRICTION_DRIVER': 'Top Friction Point',
-    'RECOMMENDED_FOCUS': 'Focus Area',
-    'EXPERIENCE_AFFINITY': 'Experience Affinity',
-    'UNDERUTILIZED_OPPORTUNITY': 'Growth Opportunity'
-})
-
-# Extract loyalty tier from segment (e.g., "Diamond - Leisure" -> "Diamond")
-opportunities_df['tier_only'] = opportunities_df['Segment'].str.split(' - ').str[0]
-
-# Sort by tier order: Blue → Silver → Gold → Diamond → Non-Member
-tier_order_map = {'Blue': 0, 'Silver': 1, 'Gold': 2, 'Diamond': 3, 'Non-Member': 4}
-opportunities_df['sort_order'] = opportunities_df['tier_only'].map(tier_order_map)
-opportunities_df = opportunities_df.sort_values('sort_order').drop(['sort_order', 'tier_only'], axis=1).reset_index(drop=True)
+opportunities_df = opportunity_table(segments_key, df_segments)
 
 st.caption("💡 **Repeat Rate**: % of guests who made multiple stays | **Top Friction Point**: Most common service issue | **Experience Affinity**: Primary service preference | **Growth Opportunity**: High appeal, low penetration service")
 
@@ -196,12 +158,11 @@ st.dataframe(
 # =====================================================================
 # Experience Drivers Analysis
 # =====================================================================
+mark_section("Experience Drivers Analysis")
 st.markdown("---")
 st.markdown("### 💡 Experience Drivers of Repeat Stays")
 
-# Show experience affinity distribution
-affinity_counts = df_segments['EXPERIENCE_AFFINITY'].value_counts().reset_index()
-affinity_counts.columns = ['Experience Category', 'Segment Count']
+affinity_counts, high_performers, at_risk_segments = driver_tables(segments_key, df_segments)
 
 fig4 = px.pie(
     affinity_counts,
@@ -218,7 +179,6 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("#### ✅ High-Performing Segments")
-    high_performers = df_segments[df_segments['REPEAT_RATE_PCT'] > 50].sort_values('TOTAL_REVENUE', ascending=False)[['SEGMENT', 'REPEAT_RATE_PCT', 'AVG_SPEND_PER_STAY', 'EXPERIENCE_AFFINITY']].head(5)
     if not high_performers.empty:
         st.dataframe(
             high_performers.rename(columns={
@@ -233,7 +193,6 @@ with col1:
 
 with col2:
     st.markdown("#### ⚠️ At-Risk Segments")
-    at_risk_segments = df_segments[df_segments['REPEAT_RATE_PCT'] < 30].sort_values('TOTAL_REVENUE', ascending=False)[['SEGMENT', 'REPEAT_RATE_PCT', 'TOP_FRICTION_DRIVER', 'RECOMMENDED_FOCUS']].head(5)
     if not at_risk_segments.empty:
         st.dataframe(
             at_risk_segments.rename(columns={
@@ -250,6 +209,7 @@ with col2:
 # =====================================================================
 # AI-Powered Analysis Chatbot
 # =====================================================================
+mark_section("AI-Powered Analysis Chatbot")
 st.markdown("---")
 st.markdown("### 🤖 AI-Powered Analysis")
 
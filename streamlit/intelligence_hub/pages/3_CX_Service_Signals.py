@@ -4,20 +4,23 @@ Operational intelligence on service quality, issue drivers, and at-risk guests
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 sys.path.append('../shared')
 
+from shared.lazy_imports import lazy_import
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 from shared.data_loader_intel import (
     load_cx_signals,
     load_future_arrivals,
     get_available_regions,
     get_available_brands
 )
+from shared.prefetch import prefetch
+from shared.render_profiler import mark_section
 from shared.viz_components_intel import create_kpi_card, create_bar_chart, create_heatmap
 from shared.formatters import format_number, format_duration
+from shared.page_transforms import issue_drivers, brand_means, vip_watchlist
 
 st.title("💬 CX & Service Signals")
 st.markdown("Operational intelligence for service quality and guest experience")
@@ -25,24 +28,37 @@ st.markdown("Operational intelligence for service quality and guest experience")
 # =====================================================================
 # Filters
 # =====================================================================
+mark_section("Filters")
 st.markdown("### 🔍 Filters")
 col1, col2 = st.columns(2)
 
-with col1:
-    regions = ['All'] + get_available_regions()
-    selected_region = st.selectbox("Region", regions)
-
-with col2:
-    brands = ['All'] + get_available_brands()
-    selected_brand = st.selectbox("Brand", brands)
+# Filter values are read from session state before the widgets render, so the
+# option lists and the page queries can be fetched concurrently
+selected_region = st.session_state.get('cx_region', 'All')
+selected_brand = st.session_state.get('cx_brand', 'All')
 
 # Apply filters
 region_filter = None if selected_region == 'All' else selected_region
 brand_filter = None if selected_brand == 'All' else selected_brand
 
 # Load data
-df_cx = load_cx_signals(region=region_filter, brand=brand_filter)
-df_vip = load_future_arrivals(days_ahead=7)
+data = prefetch(
+    "CX & Service Signals",
+    regions=get_available_regions,
+    brands=get_available_brands,
+    cx=lambda: load_cx_signals(region=region_filter, brand=brand_filter),
+    vip=lambda: load_future_arrivals(days_ahead=7)
+)
+df_cx = data['cx']
+df_vip = data['vip']
+
+with col1:
+    regions = ['All'] + data['regions']
+    st.selectbox("Region", regions, key='cx_region')
+
+with col2:
+    brands = ['All'] + data['brands']
+    st.selectbox("Brand", brands, key='cx_brand')
 
 if df_cx.empty:
     st.warning("No CX data available for selected filters.")
@@ -51,6 +67,7 @@ if df_cx.empty:
 # =====================================================================
 # KPI Cards
 # =====================================================================
+mark_section("KPI Cards")
 st.markdown("---")
 st.markdown("### 📊 Service Quality KPIs (Last 30 Days)")
 
@@ -101,6 +118,7 @@ with col5:
 # =====================================================================
 # Charts
 # =====================================================================
+mark_section("Charts")
 st.markdown("---")
 st.markdown("### 📊 Service Intelligence Analysis")
 
@@ -109,12 +127,7 @@ st.markdown("#### Top Service Issue Drivers")
 st.caption("Most common service issues across the portfolio")
 
 # Aggregate top issues
-all_issues = []
-for col in ['TOP_ISSUE_DRIVER_1', 'TOP_ISSUE_DRIVER_2', 'TOP_ISSUE_DRIVER_3']:
-    issues = df_cx[col].dropna().value_counts().to_dict()
-    all_issues.extend([(k, v) for k, v in issues.items()])
-
-issue_df = pd.DataFrame(all_issues, columns=['Issue', 'Count']).groupby('Issue')['Count'].sum().reset_index().sort_values('Count', ascending=True).tail(10)
+issue_df = issue_drivers(df_cx)
 
 fig1 = px.bar(
     issue_df,
@@ -134,7 +147,7 @@ chart_col1, chart_col2 = st.columns(2)
 with chart_col1:
     # Issue Heatmap by Brand
     st.markdown("#### Service Case Rate by Brand")
-    brand_cases = df_cx.groupby('BRAND')['SERVICE_CASE_RATE'].mean().reset_index().sort_values('SERVICE_CASE_RATE', ascending=False)
+    brand_cases = brand_means(df_cx, 'SERVICE_CASE_RATE')
     
     fig2 = px.bar(
         brand_cases,
@@ -152,7 +165,7 @@ with chart_col1:
 with chart_col2:
     # Recovery Success by Brand
     st.markdown("#### Recovery Success Rate by Brand")
-    brand_recovery = df_cx.groupby('BRAND')['SERVICE_RECOVERY_SUCCESS_PCT'].mean().reset_index().sort_values('SERVICE_RECOVERY_SUCCESS_PCT', ascending=False)
+    brand_recovery = brand_means(df_cx, 'SERVICE_RECOVERY_SUCCESS_PCT')
     
     fig3 = px.bar(
         brand_recovery,
@@ -170,6 +183,7 @@ with chart_col2:
 # =====================================================================
 # VIP Watchlist Table
 # =====================================================================
+mark_section("VIP Watchlist Table")
 st.markdown("---")
 st.markdown("### 🚨 VIP Watchlist: Upcoming Arrivals (Next 7 Days)")
 st.caption("High-value guests with context for proactive service")
@@ -177,44 +191,8 @@ st.caption("High-value guests with context for proactive service")
 if df_vip.empty:
     st.info("No VIP arrivals with service context in the next 7 days.")
 else:
-    # Prepare VIP table
-    vip_display = df_vip.copy()
-    
-    # Anonymize guest ID
-    vip_display['GUEST_ID_HASH'] = vip_display['GUEST_ID'].str[:8] + '***'
-    
-    # Format preferences
-    vip_display['PREFERENCES'] = vip_display['ROOM_PREFERENCE'].apply(
-        lambda x: str(x) if pd.notna(x) else 'None'
-    )
-    
-    # Map churn risk to color
-    def risk_level(score):
-        if score >= 75:
-            return "🔴 High"
-        elif score >= 50:
-            return "🟡 Medium"
-        else:
-            return "🟢 Low"
-    
-    vip_display['RISK_LEVEL'] = vip_display['CHURN_RISK_SCORE'].apply(risk_level)
-    
-    # Select and rename columns
-    vip_table = vip_display[[
-        'GUEST_ID_HASH', 'TIER_LEVEL', 'CHECK_IN_DATE', 'BRAND', 'CITY',
-        'PRIOR_ISSUE_COUNT', 'PREFERENCES', 'LIFETIME_VALUE', 'CHURN_RISK_SCORE', 'RISK_LEVEL'
-    ]].rename(columns={
-        'GUEST_ID_HASH': 'Guest ID',
-        'TIER_LEVEL': 'Tier',
-        'CHECK_IN_DATE': 'Arrival Date',
-        'BRAND': 'Brand',
-        'CITY': 'Property',
-        'PRIOR_ISSUE_COUNT': 'Past Issues',
-        'PREFERENCES': 'Preference Tags',
-        'LIFETIME_VALUE': 'LTV ($)',
-        'CHURN_RISK_SCORE': 'Churn Risk',
-        'RISK_LEVEL': 'Risk Level'
-    }).sort_values('Churn Risk', ascending=False).head(20)
+    # Anonymized, highest churn risk first
+    vip_table = vip_watchlist(df_vip)
     
     st.caption("💡 **Past Issues**: Service cases in last 90 days (2+ needs attention) | **Preference Tags**: Known guest preferences | **Churn Risk**: Predictive score 0-100 based on history & sentiment | **Risk Level**: 🔴 High (75+), 🟡 Medium (50-74), 🟢 Low (<50)")
     
@@ -239,6 +217,7 @@ else:
 # =====================================================================
 # Proactive Service Recommendations
 # =====================================================================
+mark_section("Proactive Service Recommendations")
 st.markdown("---")
 st.markdown("### 💡 Recommended Actions")
 
@@ -269,6 +248,7 @@ with rec_col2:
 # =====================================================================
 # AI-Powered Analysis Chatbot
 # =====================================================================
+mark_section("AI-Powered Analysis Chatbot")
 st.markdown("---")
 st.markdown("### 🤖 AI-Powered Analysis")
 
@@ -1,17 +1,38 @@
 """
-Debug page to show raw data directly from database (no caching)
+Debug page: live performance console plus raw, uncached data checks
+The performance panel reads the in-process instrumentation buffers; it
+queries the warehouse only for query history compile stats, on request
 """
 
 import streamlit as st
-from snowflake.snowpark.context import get_active_session
+from shared.session_provider import get_session, get_session_stats
+from shared.account_context import get_account_context
+from shared.data_loader_intel import get_cache_footprint, load_query_compile_stats
+from shared.page_registry import get_render_times
+from shared.prefetch import get_prefetch_reports
+from shared.query_builder import get_query_stats
+from shared.telemetry import get_records, get_query_records, export_json, export_csv
 import pandas as pd
 
-st.title("🔍 Debug Data View")
-st.markdown("**This page shows raw data directly from the database with NO caching**")
+# Latency percentiles shown per loader and per page
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# Slowest recent queries listed
+SLOWEST_QUERIES = 10
+
 
-# Get session
-session = get_active_session()
-# Note: USE statements not allowed in Streamlit, using fully qualified table names
+def _percentile_table(df, by, column):
+    """Calls and latency percentiles of column per group"""
+    grouped = df.groupby(by)[column]
+    table = grouped.quantile(list(PERCENTILES)).unstack()
+    table.columns = [f"p{int(q * 100)} ms" for q in PERCENTILES]
+    table.insert(0, 'calls', grouped.size())
+    table['max ms'] = grouped.max()
+    return table
+
+
+st.title("🔍 Debug Data View")
+st.markdown("**Live performance console for this app process, plus raw uncached data checks**")
 
 # Clear ALL caches
 if st.button("🗑️ Clear ALL Caches"):
@@ -20,67 +41,154 @@ if st.button("🗑️ Clear ALL Caches"):
     st.success("All caches cleared! Refresh the page.")
 
 st.markdown("---")
-st.markdown("### 📊 Portfolio KPIs (Last 30 Days) - Raw Query")
-
-# Execute query without any caching
-query = """
-SELECT 
-    COUNT(DISTINCT performance_date) as num_days,
-    COUNT(DISTINCT hotel_id) as num_hotels,
-    SUM(total_revenue) as total_revenue,
-    SUM(total_rooms) as total_room_days,
-    SUM(rooms_occupied) as total_occupied_days,
-    ROUND(SUM(rooms_occupied) * 100.0 / SUM(total_rooms), 2) as calc_occupancy_pct,
-    ROUND(SUM(total_revenue) / NULLIF(SUM(rooms_occupied), 0), 2) as calc_adr,
-    ROUND(SUM(total_revenue) / NULLIF(SUM(total_rooms), 0), 2) as calc_revpar,
-    ROUND(AVG(satisfaction_index), 2) as avg_satisfaction
-FROM HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS
-WHERE performance_date >= DATEADD(day, -30, CURRENT_DATE())
-"""
+st.markdown("### ⚡ Performance")
+
+records = pd.DataFrame(get_records())
+if records.empty:
+    st.info("No loader calls recorded yet in this process - open a dashboard page first")
+else:
+    st.markdown("#### Loader latency")
+    loaders = _percentile_table(records, 'loader', 'wall_ms')
+    loaders['cache hit %'] = records.groupby('loader')['cache'].apply(lambda c: (c == 'hit').mean() * 100)
+    loaders['rows fetched'] = records.groupby('loader')['rows'].sum()
+    loaders['frame MB'] = records.groupby('loader')['frame_bytes'].sum() / 1e6
+    st.dataframe(loaders.sort_values('p95 ms', ascending=False).round(1), use_container_width=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Loader calls", f"{len(records):,}")
+    with col2:
+        st.metric("Cache hit ratio", f"{(records['cache'] == 'hit').mean() * 100:.1f}%")
+    with col3:
+        st.metric("Warehouse queries", f"{int(records['queries'].sum()):,}")
+
+renders = pd.DataFrame(get_render_times())
+if not renders.empty:
+    st.markdown("#### Page render times")
+    # Fragment-only reruns are listed apart from full page renders
+    renders['fragment'] = renders['fragment'].fillna('(full page)')
+    st.dataframe(_percentile_table(renders, ['page', 'fragment'], 'render_ms').round(1), use_container_width=True)
+
+prefetches = pd.DataFrame(get_prefetch_reports())
+if not prefetches.empty:
+    st.markdown("#### Page prefetch")
+    st.caption("Concurrent wall time of each page's prefetched queries vs. running them one after another")
+    prefetch_times = prefetches.groupby('page').agg(
+        prefetches=('wall_ms', 'size'),
+        wall_p50_ms=('wall_ms', 'median'),
+        serial_p50_ms=('serial_ms', 'median'),
+    )
+    prefetch_times['speedup'] = prefetch_times['serial_p50_ms'] / prefetch_times['wall_p50_ms']
+    st.dataframe(prefetch_times.round(1), use_container_width=True)
+
+queries = pd.DataFrame(get_query_records())
+if not queries.empty:
+    st.markdown("#### Slowest recent queries")
+    slowest = queries.nlargest(SLOWEST_QUERIES, 'elapsed_ms').reset_index(drop=True)
+    slowest = slowest.assign(query_ids=slowest['query_ids'].str.join(', '))
+    st.dataframe(
+        slowest[['elapsed_ms', 'loader', 'page', 'rows', 'query_ids', 'sql']],
+        use_container_width=True
+    )
+
+query_shapes = get_query_stats()
+if not query_shapes.empty:
+    st.markdown("#### Bind-variable query reuse")
+    st.caption("Per SQL text: reuse with bind variables vs. what inlined literals would have reused")
+    # Compile time and result cache hits come from query history, so they load on request
+    if st.checkbox("Load compile time and result cache hits from query history"):
+        query_shapes = query_shapes.merge(load_query_compile_stats(), on='sql', how='left')
+    st.dataframe(
+        query_shapes.sort_values('executions', ascending=False).round(1).reset_index(drop=True),
+        use_container_width=True
+    )
+
+st.markdown("#### Cache memory footprint")
+footprint = pd.DataFrame(get_cache_footprint())
+footprint['MB'] = (footprint.pop('bytes') / 1e6).round(2)
+st.dataframe(footprint, use_container_width=True)
+st.caption(f"Total: {footprint['MB'].sum():.1f} MB")
+
+st.markdown("#### Session")
+st.json(get_session_stats())
 
-try:
-    df = session.sql(query).to_pandas()
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("📥 Export loader telemetry (JSON)", export_json(), "loader_telemetry.json", "application/json")
+with col2:
+    st.download_button("📥 Export loader telemetry (CSV)", export_csv(), "loader_telemetry.csv", "text/csv")
+
+st.markdown("---")
+st.markdown("### 🧪 Raw Data Checks")
+
+# Raw checks hit the warehouse, so they only run on request
+if st.checkbox("Run raw uncached queries"):
+    # Note: USE statements not allowed in Streamlit, using fully qualified table names
+    session = get_session()
+
+    st.markdown("### 📊 Portfolio KPIs (Last 30 Days) - Raw Query")
+
+    # Execute query without any caching
+    query = """
+    SELECT 
+        COUNT(DISTINCT performance_date) as num_days,
+        COUNT(DISTINCT hotel_id) as num_hotels,
+        SUM(total_revenue) as total_revenue,
+        SUM(total_rooms) as total_room_days,
+        SUM(rooms_occupied) as total_occupied_days,
+        ROUND(SUM(rooms_occupied) * 100.0 / SUM(total_rooms), 2) as calc_occupancy_pct,
+        ROUND(SUM(total_revenue) / NULLIF(SUM(rooms_occupied), 0), 2) as calc_adr,
+        ROUND(SUM(total_revenue) / NULLIF(SUM(total_rooms), 0), 2) as calc_revpar,
+        ROUND(AVG(satisfaction_index), 2) as avg_satisfaction
+    FROM HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS
+    WHERE performance_date >= DATEADD(day, -30, CURRENT_DATE())
+    """
+
+    try:
+        df = session.sql(query).to_pandas()
     
-    st.success("✅ Query executed successfully (no cache)")
+        st.success("✅ Query executed successfully (no cache)")
     
-    col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4 = st.columns(4)
     
-    with col1:
-        st.metric("Occupancy %", f"{df['CALC_OCCUPANCY_PCT'].iloc[0]:.2f}%")
+        with col1:
+            st.metric("Occupancy %", f"{df['CALC_OCCUPANCY_PCT'].iloc[0]:.2f}%")
     
-    with col2:
-        st.metric("ADR", f"${df['CALC_ADR'].iloc[0]:.0f}")
+        with col2:
+            st.metric("ADR", f"${df['CALC_ADR'].iloc[0]:.0f}")
     
-    with col3:
-        st.metric("RevPAR", f"${df['CALC_REVPAR'].iloc[0]:.0f}")
+        with col3:
+            st.metric("RevPAR", f"${df['CALC_REVPAR'].iloc[0]:.0f}")
     
-    with col4:
-        st.metric("Satisfaction", f"{df['AVG_SATISFACTION'].iloc[0]:.1f}/100")
+        with col4:
+            st.metric("Satisfaction", f"{df['AVG_SATISFACTION'].iloc[0]:.1f}/100")
     
-    st.markdown("---")
-    st.markdown("### 📋 Raw Query Results")
-    st.dataframe(df, use_container_width=False)
+        st.markdown("---")
+        st.markdown("### 📋 Raw Query Results")
+        st.dataframe(df, use_container_width=False)
     
-    st.markdown("---")
-    st.markdown("### 📅 Date Range Check")
-    date_query = """
-    SELECT 
-        MIN(performance_date) as earliest_date,
-        MAX(performance_date) as latest_date,
-        COUNT(DISTINCT performance_date) as total_days,
-        MAX(refreshed_at) as last_refresh
-    FROM HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS
-    WHERE performance_date >= DATEADD(day, -30, CURRENT_DATE())
-    """
-    df_dates = session.sql(date_query).to_pandas()
-    st.dataframe(df_dates, use_container_width=False)
+        st.markdown("---")
+        st.markdown("### 📅 Date Range Check")
+        date_query = """
+        SELECT 
+            MIN(performance_date) as earliest_date,
+            MAX(performance_date) as latest_date,
+            COUNT(DISTINCT performance_date) as total_days,
+            MAX(refreshed_at) as last_refresh
+        FROM HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS
+        WHERE performance_date >= DATEADD(day, -30, CURRENT_DATE())
+        """
+        df_dates = session.sql(date_query).to_pandas()
+        st.dataframe(df_dates, use_container_width=False)
     
-except Exception as e:
-    st.error(f"❌ Error executing query: {str(e)}")
-    st.exception(e)
+    except Exception as e:
+        st.error(f"❌ Error executing query: {str(e)}")
+        st.exception(e)
 
 st.markdown("---")
 st.markdown("### 🔧 Connection Info")
-st.write(f"Current database: {session.sql('SELECT CURRENT_DATABASE()').collect()[0][0]}")
-st.write(f"Current schema: {session.sql('SELECT CURRENT_SCHEMA()').collect()[0][0]}")
-st.write(f"Current role: {session.sql('SELECT CURRENT_ROLE()').collect()[0][0]}")
+context = get_account_context()
+st.write(f"Account: {context['account_name']} ({context['region']})")
+st.write(f"Current database: {context['database']}")
+st.write(f"Current schema: {context['schema']}")
+st.write(f"Current role: {context['role']}")
@@ -0,0 +1,53 @@
+"""
+Account and environment context
+Account, region, role, database and schema are resolved with one query the
+first time they are needed and reused for the life of the process
+"""
+
+import threading
+
+from .session_provider import get_session
+
+CONTEXT_QUERY = """
+SELECT
+    CURRENT_ACCOUNT_NAME() AS account_name,
+    CURRENT_REGION() AS region,
+    CURRENT_ROLE() AS role,
+    CURRENT_DATABASE() AS database,
+    CURRENT_SCHEMA() AS schema
+"""
+
+# (session the context was resolved on, context dict)
+_resolved = (None, None)
+_lock = threading.Lock()
+
+
+def get_account_context():
+    """
+    Current account, region, role, database and schema
+
+    Resolved once per session: the query runs again only if the session
+    manager has since opened a new session. Failures are not memoized.
+
+    Returns:
+        dict with keys account_name, region, role, database, schema
+    """
+    global _resolved
+    session = get_session()
+    with _lock:
+        resolved_on, context = _resolved
+        if resolved_on is session:
+            return dict(context)
+
+    row = session.sql(CONTEXT_QUERY).collect()[0].as_dict()
+    context = {name.lower(): value for name, value in row.items()}
+    with _lock:
+        _resolved = (session, context)
+    return dict(context)
+
+
+def clear_account_context():
+    """Forget the resolved context; the next get_account_context() queries again"""
+    global _resolved
+    with _lock:
+        _resolved = (None, None)
@@ -6,12 +6,9 @@ Shows suggested prompts and a button to open the agent.
 """
 
 import streamlit as st
-from snowflake.snowpark.context import get_active_session
+from .account_context import get_account_context
 from typing import List
 
-# Get Snowpark session
-session = get_active_session()
-
 
 def display_suggested_prompts(prompts: List[str]) -> None:
     """
@@ -35,14 +32,12 @@ def get_snowflake_intelligence_url() -> str:
         str: URL to Snowflake Intelligence
     """
     try:
-        # Get account information
-        account_query = "SELECT CURRENT_ACCOUNT_NAME(), CURRENT_REGION()"
-        result = session.sql(account_query).collect()
+        # Account information, resolved once per process
+        context = get_account_context()
+        account_name = context['account_name']
+        region = context['region']
         
-        if result:
-            account_name = result[0][0]
-            region = result[0][1]
-            
+        if account_name and region:
             # Build Snowflake Intelligence URL
             # Format: https://ai.snowflake.com/<region>/<account>/#/ai
             intelligence_url = f"https://ai.snowflake.com/{region}/{account_name}/#/ai"
@@ -4,20 +4,78 @@ Provides cached data loading functions for all Gold tables
 """
 
 import streamlit as st
-from snowflake.snowpark.context import get_active_session
+from .session_provider import get_session
 import pandas as pd
-
-# Get Snowpark session
-session = get_active_session()
+from datetime import date, timedelta
+from .derived_cache import clear_derived_cache, get_derived_cache_stats
+from .frame_fetch import fetch_frame, get_fetch_reports
+from .freshness_cache import freshness_cached, freshness_key, get_watermarks, refresh_watermarks
+from .incremental_frame import ResidentFrame
+from .outlier_engine import OutlierEngine
+from .query_builder import Query, load_compile_stats, run_query
+from .slice_cache import SliceCache
+from .telemetry import instrumented
 
 # Note: We use fully qualified table names (DATABASE.SCHEMA.TABLE) in all queries
 # since USE statements are not allowed in Streamlit apps
+# Filter values are bound with ? placeholders (see query_builder) rather than
+# interpolated, so each loader issues one SQL text whatever the filters
+
+PORTFOLIO_KPIS_TABLE = 'HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS'
+CX_SIGNALS_TABLE = 'HOTEL_PERSONALIZATION.GOLD.EXPERIENCE_SERVICE_SIGNALS'
+LOYALTY_SEGMENTS_TABLE = 'HOTEL_PERSONALIZATION.GOLD.LOYALTY_SEGMENT_INTELLIGENCE'
+
+# Widest "Days of History" window offered by Portfolio Overview; always held
+# so any narrower window or region/brand filter is a slice, not a query
+PORTFOLIO_SUPERSET_DAYS = 90
+
+@st.cache_resource(show_spinner=False)
+def _portfolio_kpi_rows():
+    """Resident PORTFOLIO_PERFORMANCE_KPIS rows shared by every session"""
+    return ResidentFrame(key_columns=('PERFORMANCE_DATE', 'HOTEL_ID'), date_column='PERFORMANCE_DATE')
+
+@st.cache_resource(show_spinner=False)
+def _portfolio_outliers():
+    """Hotel x day KPI grids following the resident rows, shared by every session"""
+    return OutlierEngine(max_days=PORTFOLIO_SUPERSET_DAYS)
+
+@st.cache_resource(show_spinner=False)
+def _slice_cache():
+    """Superset slices shared by every session"""
+    return SliceCache()
+
+def _synced_portfolio_kpi_rows(start):
+    """Resident portfolio KPI rows, brought up to date for a window starting at start"""
+    def fetch(since, delta):
+        query = Query(f"SELECT * FROM {PORTFOLIO_KPIS_TABLE}").where("performance_date >= ?", since.isoformat())
+        
+        if delta:
+            query.where(
+                "(performance_date < ? OR performance_date > ? OR refreshed_at > TO_TIMESTAMP_LTZ(?))",
+                delta['covered_start'].isoformat(),
+                delta['max_date'].isoformat(),
+                delta['changed_since']
+            )
+        
+        return run_query(get_session(), query, label="load_portfolio_kpis")
+    
+    today = date.today()
+    watermark = (get_watermarks() or {}).get(PORTFOLIO_KPIS_TABLE)
+    
+    resident = _portfolio_kpi_rows()
+    resident.sync(min(start, today - timedelta(days=PORTFOLIO_SUPERSET_DAYS)), watermark, fetch)
+    return resident
 
-@st.cache_data(ttl=0)  # No cache - always fresh data
+@instrumented
 def load_portfolio_kpis(days_back=30, hotel_id=None, region=None, brand=None):
     """
     Load portfolio performance KPIs from Gold table
     
+    All hotels for the last PORTFOLIO_SUPERSET_DAYS are kept resident and
+    topped up with delta queries (dates outside the resident range and rows
+    refreshed since); no query runs while the table watermark is unchanged.
+    The requested window and filters are sliced from the resident rows.
+    
     Args:
         days_back: Number of days to look back (default 30)
         hotel_id: Optional filter by specific hotel
@@ -27,24 +85,97 @@ def load_portfolio_kpis(days_back=30, hotel_id=None, region=None, brand=None):
     Returns:
         pandas DataFrame with portfolio KPIs
     """
-    query = f"""
-    SELECT *
-    FROM HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS
-    WHERE performance_date >= DATEADD(day, -{days_back}, CURRENT_DATE())
+    today = date.today()
+    start = today - timedelta(days=days_back)
+    resident = _synced_portfolio_kpi_rows(start)
+    
+    return _slice_cache().slice(
+        'load_portfolio_kpis',
+        resident.version,
+        lambda: resident.frame.sort_values(['PERFORMANCE_DATE', 'HOTEL_ID'], ascending=[False, True]),
+        (('HOTEL_ID', hotel_id), ('REGION', region), ('BRAND', brand)),
+        start=start,
+        dimensions=('HOTEL_ID', 'REGION', 'BRAND'),
+        date_column='PERFORMANCE_DATE'
+    )
+
+@instrumented
+@freshness_cached(PORTFOLIO_KPIS_TABLE, date_relative=True)
+def load_portfolio_rollup(days_back=30, region=None, brand=None):
+    """
+    Portfolio KPIs rolled up by brand, region, day and brand x region in one query
+    
+    RevPAR, ADR and occupancy are weighted by rooms (revenue / rooms
+    available, revenue / rooms occupied, rooms occupied / rooms available)
+    rather than averaged over hotel-days; satisfaction is the mean index.
+    ROLLUP_LEVEL names the grouping set of each row: 'BRAND', 'REGION',
+    'DATE' or 'BRAND_REGION'.
+    
+    Args:
+        days_back: Number of days to look back (default 30)
+        region: Optional filter by region
+        brand: Optional filter by brand
+    
+    Returns:
+        pandas DataFrame with one row per group, a few hundred rows at most
+    """
+    query = Query(f"""
+        SELECT
+            CASE
+                WHEN GROUPING(performance_date) = 0 THEN 'DATE'
+                WHEN GROUPING(region) = 1 THEN 'BRAND'
+                WHEN GROUPING(brand) = 1 THEN 'REGION'
+                ELSE 'BRAND_REGION'
+            END AS rollup_level,
+            brand,
+            region,
+            performance_date,
+            SUM(total_revenue) / NULLIF(SUM(total_rooms), 0) AS revpar,
+            SUM(total_revenue) / NULLIF(SUM(rooms_occupied), 0) AS adr,
+            SUM(rooms_occupied) * 100.0 / NULLIF(SUM(total_rooms), 0) AS occupancy_pct,
+            AVG(satisfaction_index) AS satisfaction_index,
+            COUNT(*) AS hotel_days
+        FROM {PORTFOLIO_KPIS_TABLE}
+    """).where("performance_date >= DATEADD(day, ?, CURRENT_DATE())", -days_back)
+    query.where_equals("region", region)
+    query.where_equals("brand", brand)
+    query.group_by("GROUPING SETS ((brand), (region), (performance_date), (brand, region))")
+    query.order_by("rollup_level, performance_date, revpar DESC")
+    
+    return run_query(get_session(), query, label="load_portfolio_rollup")
+
+@instrumented
+def load_portfolio_exceptions(days_back=30, region=None, brand=None):
     """
+    Hotels deviating from their brand/region peers, one row per hotel
     
-    if hotel_id:
-        query += f" AND hotel_id = '{hotel_id}'"
-    if region:
-        query += f" AND region = '{region}'"
-    if brand:
-        query += f" AND brand = '{brand}'"
+    Each hotel's KPIs are averaged over the window and scored with robust
+    z-scores against the median/MAD of its brand (RevPAR) and region
+    (satisfaction); see outlier_engine. Baselines span the whole portfolio,
+    region and brand only choose which hotels are listed. Reads the rows
+    resident for load_portfolio_kpis, absorbing only those that changed.
     
-    query += " ORDER BY performance_date DESC, hotel_id"
+    Args:
+        days_back: Number of days to look back (default 30)
+        region: Optional filter by region
+        brand: Optional filter by brand
     
-    return session.sql(query).to_pandas()
+    Returns:
+        pandas DataFrame of exception hotels, highest DEVIATION_SCORE first
+    """
+    today = date.today()
+    start = today - timedelta(days=days_back)
+    
+    resident = _synced_portfolio_kpi_rows(start)
+    with resident.lock:
+        frame, version = resident.frame, resident.version
+    
+    engine = _portfolio_outliers()
+    engine.update(frame, version)
+    return engine.exceptions(start, region=region, brand=brand)
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@instrumented
+@freshness_cached(LOYALTY_SEGMENTS_TABLE)
 def load_loyalty_segments():
     """
     Load loyalty segment intelligence from Gold table
@@ -52,18 +183,28 @@ def load_loyalty_segments():
     Returns:
         pandas DataFrame with loyalty segment data
     """
-    query = """
+    query = f"""
     SELECT *
-    FROM HOTEL_PERSONALIZATION.GOLD.LOYALTY_SEGMENT_INTELLIGENCE
+    FROM {LOYALTY_SEGMENTS_TABLE}
     ORDER BY total_revenue DESC
     """
-    return session.sql(query).to_pandas()
+    return fetch_frame(get_session().sql(query), label="load_loyalty_segments")
+
+def _load_cx_superset():
+    """Fetch every hotel's CX signals in page display order"""
+    query = Query(f"SELECT * FROM {CX_SIGNALS_TABLE}").order_by(
+        "at_risk_high_value_guests_count DESC, vip_watchlist_count DESC"
+    )
+    return run_query(get_session(), query, label="load_cx_signals")
 
-@st.cache_data(ttl=300)
+@instrumented
 def load_cx_signals(region=None, brand=None):
     """
     Load CX and service signals from Gold table
     
+    The whole table is fetched once per refresh watermark and region/brand
+    filters are answered by slicing it in memory.
+    
     Args:
         region: Optional filter by region
         brand: Optional filter by brand
@@ -71,22 +212,16 @@ def load_cx_signals(region=None, brand=None):
     Returns:
         pandas DataFrame with CX signals
     """
-    query = """
-    SELECT *
-    FROM HOTEL_PERSONALIZATION.GOLD.EXPERIENCE_SERVICE_SIGNALS
-    WHERE 1=1
-    """
-    
-    if region:
-        query += f" AND region = '{region}'"
-    if brand:
-        query += f" AND brand = '{brand}'"
-    
-    query += " ORDER BY at_risk_high_value_guests_count DESC, vip_watchlist_count DESC"
-    
-    return session.sql(query).to_pandas()
+    return _slice_cache().slice(
+        'load_cx_signals',
+        freshness_key((CX_SIGNALS_TABLE,)),
+        _load_cx_superset,
+        (('REGION', region), ('BRAND', brand)),
+        dimensions=('REGION', 'BRAND')
+    )
 
-@st.cache_data(ttl=300)
+@instrumented
+@freshness_cached('HOTEL_PERSONALIZATION.SILVER.SERVICE_CASES_ENRICHED', date_relative=True)
 def load_service_cases_enriched(days_back=90, is_vip_only=False):
     """
     Load enriched service cases from Silver table
@@ -98,20 +233,19 @@ def load_service_cases_enriched(days_back=90, is_vip_only=False):
     Returns:
         pandas DataFrame with enriched service cases
     """
-    query = f"""
-    SELECT *
-    FROM HOTEL_PERSONALIZATION.SILVER.SERVICE_CASES_ENRICHED
-    WHERE reported_at >= DATEADD(day, -{days_back}, CURRENT_DATE())
-    """
+    query = Query("SELECT * FROM HOTEL_PERSONALIZATION.SILVER.SERVICE_CASES_ENRICHED").where(
+        "reported_at >= DATEADD(day, ?, CURRENT_DATE())", -days_back
+    )
     
     if is_vip_only:
-        query += " AND is_vip = TRUE"
+        query.where("is_vip = TRUE")
     
-    query += " ORDER BY reported_at DESC"
+    query.order_by("reported_at DESC")
     
-    return session.sql(query).to_pandas()
+    return run_query(get_session(), query, label="load_service_cases_enriched")
 
-@st.cache_data(ttl=300)
+@instrumented
+@st.cache_data(ttl=300)  # Reads Bronze tables, which carry no refresh watermark
 def load_future_arrivals(days_ahead=7):
     """
     Load future bookings for VIP watchlist
@@ -122,7 +256,7 @@ def load_future_arrivals(days_ahead=7):
     Returns:
         pandas DataFrame with future arrivals and guest context
     """
-    query = f"""
+    query = Query("""
     WITH future_arrivals AS (
         SELECT 
             bh.booking_id,
@@ -137,7 +271,7 @@ def load_future_arrivals(days_ahead=7):
             hp.city
         FROM HOTEL_PERSONALIZATION.BRONZE.BOOKING_HISTORY bh
         JOIN HOTEL_PERSONALIZATION.BRONZE.HOTEL_PROPERTIES hp ON bh.hotel_id = hp.hotel_id
-        WHERE bh.check_in_date BETWEEN CURRENT_DATE() AND DATEADD(day, {days_ahead}, CURRENT_DATE())
+        WHERE bh.check_in_date BETWEEN CURRENT_DATE() AND DATEADD(day, ?, CURRENT_DATE())
           AND LOWER(bh.booking_status) = 'confirmed'
     ),
     guest_metrics AS (
@@ -190,21 +324,24 @@ def load_future_arrivals(days_ahead=7):
         END as churn_risk_score
     FROM guest_context
     ORDER BY churn_risk_score DESC, check_in_date
-    """
-    return session.sql(query).to_pandas()
+    """, days_ahead)
+    return run_query(get_session(), query, label="load_future_arrivals")
 
+@instrumented
 @st.cache_data(ttl=600)  # 10-minute cache for list data
 def get_available_regions():
     """Get list of available regions"""
     query = "SELECT DISTINCT region FROM HOTEL_PERSONALIZATION.BRONZE.HOTEL_PROPERTIES ORDER BY region"
-    return session.sql(query).to_pandas()['REGION'].tolist()
+    return fetch_frame(get_session().sql(query), label="get_available_regions")['REGION'].tolist()
 
+@instrumented
 @st.cache_data(ttl=600)
 def get_available_brands():
     """Get list of available brands"""
     query = "SELECT DISTINCT brand FROM HOTEL_PERSONALIZATION.BRONZE.HOTEL_PROPERTIES ORDER BY brand"
-    return session.sql(query).to_pandas()['BRAND'].tolist()
+    return fetch_frame(get_session().sql(query), label="get_available_brands")['BRAND'].tolist()
 
+@instrumented
 @st.cache_data(ttl=600)
 def get_available_hotels():
     """Get list of available hotels with details"""
@@ -213,8 +350,79 @@ def get_available_hotels():
     FROM HOTEL_PERSONALIZATION.BRONZE.HOTEL_PROPERTIES
     ORDER BY hotel_name
     """
-    return session.sql(query).to_pandas()
+    return fetch_frame(get_session().sql(query), label="get_available_hotels")
+
+# Loader -> callable returning the version of the data it serves
+_DATA_VERSIONS = {
+    # Resident rows change on every sync that fetched something; the window
+    # is relative to today
+    'load_portfolio_kpis': lambda: (_portfolio_kpi_rows().version, date.today().isoformat()),
+    'load_loyalty_segments': lambda: freshness_key((LOYALTY_SEGMENTS_TABLE,)),
+    'load_cx_signals': lambda: freshness_key((CX_SIGNALS_TABLE,)),
+}
+
+def get_data_version(loader):
+    """
+    Hashable version of the data a loader currently serves
+    
+    Changes whenever the loader could return different rows for the same
+    arguments; pages key derived frames on it (see derived_cache).
+    
+    Args:
+        loader: Loader name, e.g. 'load_portfolio_kpis'
+    
+    Returns:
+        Hashable tuple
+    """
+    return _DATA_VERSIONS[loader]()
+
+def get_cache_footprint():
+    """
+    Memory held by the loaders' in-process caches, without querying
+
+    Resident rows and slices are measured directly; st.cache_data results
+    are sized from the latest fetch of each loader.
+
+    Returns:
+        list of dicts with cache, entries and bytes
+    """
+    resident = _portfolio_kpi_rows()
+    with resident.lock:
+        frame = resident.frame
+    engine = _portfolio_outliers()
+    slices = _slice_cache().stats()
+    derived = get_derived_cache_stats()
+    footprint = [
+        {
+            'cache': 'Portfolio KPI resident rows',
+            'entries': 0 if frame is None else len(frame),
+            'bytes': 0 if frame is None else int(frame.memory_usage(deep=True, index=True).sum()),
+        },
+        {'cache': 'Portfolio outlier grids', 'entries': engine.hotels, 'bytes': engine.nbytes()},
+        {'cache': 'Superset slices', 'entries': slices['supersets'] + slices['slices'], 'bytes': slices['bytes']},
+        {'cache': 'Derived frames', 'entries': derived['results'], 'bytes': derived['bytes']},
+    ]
+    # Portfolio and CX fetches are held in the resident rows and slice cache above
+    latest = {report['label']: report for report in get_fetch_reports() if report['label']}
+    footprint.extend(
+        {'cache': f"{label} (cached result)", 'entries': report['rows'], 'bytes': report['bytes_after']}
+        for label, report in sorted(latest.items())
+        if label not in ('load_portfolio_kpis', 'load_cx_signals')
+    )
+    return footprint
+
+def load_query_compile_stats():
+    """Warehouse compile time and result cache hits for recent loader queries"""
+    return load_compile_stats(get_session())
+
+def refresh_data():
+    """Re-probe Gold/Silver refresh watermarks; only loaders whose tables changed re-query"""
+    refresh_watermarks()
 
 def clear_all_caches():
     """Clear all cached data"""
     st.cache_data.clear()
+    _portfolio_kpi_rows.clear()
+    _portfolio_outliers.clear()
+    _slice_cache.clear()
+    clear_derived_cache()
@@ -0,0 +1,149 @@
+"""
+Memoized derived frames
+Aggregations a page computes from loader results (groupbys, pivots, ranked
+tables) are cached under the data version and filter state they were
+computed from, so a rerun that changes neither reuses them
+"""
+
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+# Memory budget for all derived results; least recently used are evicted first
+DERIVED_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _result_bytes(result):
+    """Approximate in-memory size of a derived result"""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        usage = result.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(result, pd.DataFrame) else usage)
+    if isinstance(result, dict):
+        return sys.getsizeof(result) + sum(_result_bytes(value) for value in result.values())
+    if isinstance(result, (tuple, list)):
+        return sys.getsizeof(result) + sum(_result_bytes(value) for value in result)
+    return sys.getsizeof(result)
+
+
+def _copy(result):
+    """Copy frames so callers can modify what they get back"""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return result.copy()
+    if isinstance(result, dict):
+        return {name: _copy(value) for name, value in result.items()}
+    if isinstance(result, tuple):
+        return tuple(_copy(value) for value in result)
+    if isinstance(result, list):
+        return [_copy(value) for value in result]
+    return result
+
+
+class DerivedCache:
+    """
+    LRU of derived results keyed on (transformation, key)
+
+    Meant to be held in st.cache_resource so every session shares it. The
+    key is whatever identifies the inputs, normally (data version, filter
+    tuple); the inputs themselves are never hashed. Least recently used
+    results are evicted once the total footprint exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=DERIVED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._results = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, name, key, compute):
+        """
+        Return the result of compute() for (name, key), computing it on a miss
+
+        Args:
+            name: Transformation name
+            key: Hashable identity of the inputs
+            compute: Zero-argument callable producing the result
+
+        Returns:
+            The result, with frames copied
+        """
+        entry = (name, key)
+        with self._lock:
+            held = self._results.get(entry)
+            if held is not None:
+                self._results.move_to_end(entry)
+                self._hits += 1
+                return _copy(held[0])
+            self._misses += 1
+
+        # Computed outside the lock; concurrent misses on one key just compute twice
+        result = compute()
+        size = _result_bytes(result)
+        with self._lock:
+            previous = self._results.pop(entry, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._results[entry] = (result, size)
+            self._bytes += size
+            while len(self._results) > 1 and self._bytes > self.max_bytes:
+                _, (_, evicted) = self._results.popitem(last=False)
+                self._bytes -= evicted
+        return _copy(result)
+
+    def stats(self):
+        """Results held, total bytes, hits and misses"""
+        with self._lock:
+            return {
+                'results': len(self._results),
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def _derived_cache():
+    """Derived results shared by every session"""
+    return DerivedCache()
+
+
+def derived_frame(func):
+    """
+    Memoize a page transformation on an explicit key
+
+    The decorated function is called as func(key, *args, **kwargs), where
+    key identifies its inputs - normally (data version, filter tuple) - and
+    the remaining arguments are passed through unhashed.
+
+    Example:
+        @derived_frame
+        def brand_metrics(df):
+            return df.groupby('BRAND', observed=True)['REVPAR'].mean()
+
+        kpi_key = (get_data_version('load_portfolio_kpis'), (days_back, region, brand))
+        by_brand = brand_metrics(kpi_key, df_kpis)
+    """
+    # Keyed on the defining module's file plus qualname, which keeps
+    # same-named transformations in different modules apart
+    name = f"{func.__code__.co_filename}:{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(key, *args, **kwargs):
+        return _derived_cache().get(name, key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def get_derived_cache_stats():
+    """Derived cache counters (results, bytes, hits, misses)"""
+    return _derived_cache().stats()
+
+
+def clear_derived_cache():
+    """Drop every derived result"""
+    _derived_cache.clear()
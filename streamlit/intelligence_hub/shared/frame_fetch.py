@@ -0,0 +1,190 @@
+"""
+Arrow-batched, dtype-compacted fetch path for the data loaders
+Streams Snowpark result batches and compacts each batch as it arrives
+"""
+import logging
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .session_provider import get_session, invalidating_on_connection_error
+from .telemetry import record_fetch
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality dimension columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = frozenset({
+    'LOYALTY_TIER', 'TIER_LEVEL', 'CUSTOMER_SEGMENT', 'CHURN_RISK',
+    'BRAND', 'REGION', 'SUB_REGION', 'CATEGORY', 'COUNTRY',
+    'GENERATION', 'GENDER', 'NATIONALITY', 'LANGUAGE_PREFERENCE',
+    'TECH_ADOPTION_PROFILE', 'AMENITY_SPENDING_CATEGORY',
+    'AMENITY_CATEGORY', 'USAGE_CATEGORY', 'ENGAGEMENT_LEVEL',
+})
+
+# Frames smaller than this keep plain object columns: categoricals save
+# nothing there and change groupby/value_counts semantics for page code
+CATEGORICAL_MIN_ROWS = 5_000
+
+# Most recent fetch reports, newest last
+_fetch_reports = deque(maxlen=200)
+
+
+def _frame_bytes(df):
+    """Deep memory footprint of a DataFrame in bytes"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _downcast_float(series):
+    """Downcast a float64 column to float32 only when no value changes"""
+    narrowed = series.astype(np.float32)
+    if np.array_equal(narrowed.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+        return narrowed
+    return series
+
+
+def _downcast_integer(series):
+    """
+    Downcast an integer column, but never below 32 bits
+
+    int8/int16 columns overflow or wrap under ordinary page arithmetic
+    (e.g. a count times 1000), so int32 is the narrowest width kept.
+    """
+    narrowed = pd.to_numeric(series, downcast='integer')
+    if narrowed.dtype.itemsize < 4:
+        narrowed = narrowed.astype('Int32' if pd.api.types.is_extension_array_dtype(narrowed.dtype) else np.int32)
+    return narrowed
+
+
+def _is_text(dtype):
+    """True for object/string columns that are not already categorical"""
+    if isinstance(dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+
+def compact_frame(df, categorical_columns=CATEGORICAL_COLUMNS):
+    """
+    Compact a DataFrame's dtypes in place
+
+    Args:
+        df: pandas DataFrame to compact
+        categorical_columns: Column names to convert to categoricals
+
+    Returns:
+        The same DataFrame with categorical dimensions and downcast numerics
+        (integers to no narrower than int32)
+    """
+    for name in df.columns:
+        series = df[name]
+        if name in categorical_columns and _is_text(series.dtype):
+            df[name] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            df[name] = _downcast_integer(series)
+        elif series.dtype == np.float64:
+            df[name] = _downcast_float(series)
+    return df
+
+
+def _concat_batches(frames):
+    """Concatenate compacted batches without widening categoricals to object"""
+    if len(frames) == 1:
+        return frames[0]
+    for name in frames[0].columns:
+        if all(isinstance(f[name].dtype, pd.CategoricalDtype) for f in frames):
+            categories = union_categoricals([f[name] for f in frames]).categories
+            for f in frames:
+                f[name] = f[name].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True, copy=False)
+
+
+def release_small_categoricals(df):
+    """Revert categoricals to object on frames below CATEGORICAL_MIN_ROWS"""
+    if len(df) < CATEGORICAL_MIN_ROWS:
+        for name in df.columns:
+            if isinstance(df[name].dtype, pd.CategoricalDtype):
+                df[name] = df[name].astype(object)
+    return df
+
+
+def concat_frames(frames, categorical_columns=CATEGORICAL_COLUMNS):
+    """
+    Concatenate previously fetched frames into one compact frame
+
+    Used to merge delta fetches into a resident frame. Inputs may disagree on
+    categorical vs object dtypes (small fetches are released to object), so
+    the result is re-compacted as a whole.
+
+    Args:
+        frames: pandas DataFrames with the same columns
+        categorical_columns: Column names to store as categoricals
+
+    Returns:
+        pandas DataFrame with a fresh RangeIndex
+    """
+    frames = [
+        f.astype({name: object for name in f.columns if isinstance(f[name].dtype, pd.CategoricalDtype)})
+        for f in frames
+    ]
+    df = compact_frame(pd.concat(frames, ignore_index=True), categorical_columns)
+    return release_small_categoricals(df)
+
+
+def _query_ids(history, sql):
+    """Ids of the recorded queries that ran sql (other threads may share the history)"""
+    sql = " ".join(sql.split())
+    return [record.query_id for record in history.queries if " ".join(record.sql_text.split()) == sql]
+
+
+def fetch_frame(snowpark_df, label=None, categorical_columns=CATEGORICAL_COLUMNS):
+    """
+    Fetch a Snowpark DataFrame as a compact pandas DataFrame
+
+    Result batches are streamed from Arrow and compacted one at a time, so the
+    full object-dtype frame is never materialized.
+
+    Args:
+        snowpark_df: Snowpark DataFrame (table or session.sql query)
+        label: Name recorded in the fetch report, usually the calling loader
+        categorical_columns: Column names to store as categoricals
+
+    Returns:
+        pandas DataFrame
+    """
+    frames = []
+    bytes_before = 0
+    started = time.perf_counter()
+    with invalidating_on_connection_error(), get_session().query_history() as history:
+        for batch in snowpark_df.to_pandas_batches():
+            bytes_before += _frame_bytes(batch)
+            frames.append(compact_frame(batch, categorical_columns))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not frames:
+        df = pd.DataFrame(columns=[c.strip('"') for c in snowpark_df.columns])
+    else:
+        df = release_small_categoricals(_concat_batches(frames))
+
+    report = {
+        'label': label,
+        'rows': len(df),
+        'batches': len(frames),
+        'bytes_before': bytes_before,
+        'bytes_after': _frame_bytes(df),
+    }
+    _fetch_reports.append(report)
+    sql = snowpark_df.queries['queries'][-1]
+    record_fetch(_query_ids(history, sql), report['rows'], bytes_before, sql=sql, elapsed_ms=round(elapsed_ms, 2))
+    logger.info(
+        "fetch %s: %d rows in %d batches, %.1f MB -> %.1f MB",
+        label, report['rows'], report['batches'],
+        report['bytes_before'] / 1e6, report['bytes_after'] / 1e6
+    )
+    return df
+
+
+def get_fetch_reports():
+    """Return recent fetch memory reports, newest last"""
+    return list(_fetch_reports)
@@ -0,0 +1,119 @@
+"""
+Freshness-aware caching for the data loaders
+Cache entries are keyed on the refresh watermark of the tables they read, so
+they stay valid until 03b_refresh_silver_gold.sql rewrites those tables
+"""
+
+import functools
+import time
+from datetime import date
+
+import streamlit as st
+from .session_provider import get_session, invalidating_on_connection_error
+
+# Refresh watermark column written for each Silver/Gold table by 03b_refresh_silver_gold.sql
+WATERMARK_COLUMNS = {
+    'HOTEL_PERSONALIZATION.GOLD.PORTFOLIO_PERFORMANCE_KPIS': 'REFRESHED_AT',
+    'HOTEL_PERSONALIZATION.GOLD.LOYALTY_SEGMENT_INTELLIGENCE': 'REFRESHED_AT',
+    'HOTEL_PERSONALIZATION.GOLD.EXPERIENCE_SERVICE_SIGNALS': 'REFRESHED_AT',
+    'HOTEL_PERSONALIZATION.SILVER.SERVICE_CASES_ENRICHED': 'REFRESHED_AT',
+}
+
+# How long a watermark probe result is trusted before probing again
+PROBE_TTL_SECONDS = 60
+
+# Bucket width used to expire entries when the probe itself fails
+FALLBACK_TTL_SECONDS = 300
+
+
+@st.cache_data(ttl=PROBE_TTL_SECONDS, show_spinner=False)
+def get_watermarks():
+    """
+    Probe the refresh watermark of every tracked table in one round trip
+
+    MAX() over a column is answered from micro-partition metadata, so the
+    probe does not scan the tables.
+
+    Returns:
+        dict of table name -> watermark string, or None if the probe failed
+    """
+    session = get_session()
+    query = " UNION ALL ".join(
+        f"SELECT '{table}' AS table_name, MAX({column})::STRING AS watermark FROM {table}"
+        for table, column in WATERMARK_COLUMNS.items()
+    )
+    try:
+        with invalidating_on_connection_error():
+            rows = session.sql(query).collect()
+    except Exception:
+        return None
+    return {row['TABLE_NAME']: row['WATERMARK'] for row in rows}
+
+
+def freshness_key(tables, date_relative=False):
+    """
+    Build the cache key component for data read from the given tables
+
+    Args:
+        tables: Table names from WATERMARK_COLUMNS
+        date_relative: True when the query windows on CURRENT_DATE(), so the
+            key also rolls over daily
+
+    Returns:
+        Hashable tuple that changes whenever any of the tables is refreshed
+    """
+    watermarks = get_watermarks()
+    if watermarks is None:
+        key = ('fallback', int(time.time() // FALLBACK_TTL_SECONDS))
+    else:
+        key = tuple(watermarks.get(table) for table in tables)
+    if date_relative:
+        key += (date.today().isoformat(),)
+    return key
+
+
+def freshness_cached(*tables, date_relative=False, max_entries=64):
+    """
+    Cache a loader until the refresh watermark of its tables moves
+
+    Replaces a fixed @st.cache_data(ttl=...) on loaders that read Silver/Gold
+    tables. Entries have no TTL; a new watermark simply produces a new key and
+    superseded entries age out of the LRU.
+
+    Args:
+        tables: Table names from WATERMARK_COLUMNS read by the loader
+        date_relative: True when the loader's query windows on CURRENT_DATE()
+        max_entries: Maximum cached results kept for this loader
+    """
+    for table in tables:
+        if table not in WATERMARK_COLUMNS:
+            raise ValueError(f"No refresh watermark registered for {table}")
+
+    def decorator(func):
+        def cached(key, args, kwargs):
+            return func(*args, **kwargs)
+
+        # Give each loader its own Streamlit cache rather than one shared by every wrapper
+        cached.__module__ = func.__module__
+        cached.__name__ = func.__name__
+        cached.__qualname__ = func.__qualname__
+        cached = st.cache_data(ttl=None, max_entries=max_entries, show_spinner=False)(cached)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached(freshness_key(tables, date_relative), args, kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
+
+
+def refresh_watermarks():
+    """
+    Force the next loader call to re-probe table watermarks
+
+    Only the probe result is dropped; cached data for tables that have not
+    been refreshed stays valid for every user.
+    """
+    get_watermarks.clear()
@@ -0,0 +1,94 @@
+"""
+Incrementally maintained resident frames for date-windowed Gold tables
+Rows already fetched are kept in memory; later calls only query the rows
+that are missing or have been refreshed since
+"""
+
+import threading
+
+import pandas as pd
+
+from .frame_fetch import concat_frames
+
+
+class ResidentFrame:
+    """
+    Rows of a date-windowed table, keyed on (date, entity)
+
+    Tracks the earliest date fetched, the latest date held and the newest
+    refresh timestamp held, which is everything needed to describe the delta
+    that is still missing. `version` increments whenever the rows change.
+    Meant to be held in st.cache_resource so every session shares the rows.
+    """
+
+    def __init__(self, key_columns, date_column, refreshed_column='REFRESHED_AT'):
+        self.key_columns = list(key_columns)
+        self.date_column = date_column
+        self.refreshed_column = refreshed_column
+        self.frame = None
+        self.covered_start = None
+        self.watermark = None
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def _max_date(self):
+        return pd.to_datetime(self.frame[self.date_column]).max().date()
+
+    def _max_refreshed(self):
+        return pd.Timestamp(self.frame[self.refreshed_column].max()).isoformat()
+
+    def _trim(self, start):
+        """Drop rows dated before start; the window has moved past them"""
+        dates = pd.to_datetime(self.frame[self.date_column])
+        expired = (dates < pd.Timestamp(start)).to_numpy()
+        if expired.any():
+            self.frame = self.frame[~expired].reset_index(drop=True)
+            self.version += 1
+        self.covered_start = start
+
+    def sync(self, start, watermark, fetch):
+        """
+        Bring the resident rows up to date for a window starting at `start`
+
+        Rows dated before `start` are dropped, so the frame holds only the
+        window callers still ask for rather than every day ever fetched.
+
+        Args:
+            start: First date (datetime.date) the caller needs
+            watermark: Current table refresh watermark, or None if unknown
+            fetch: Callable(since, delta) -> DataFrame. `delta` is None for a
+                full fetch from `since`, otherwise a dict with covered_start,
+                max_date and changed_since bounding the rows still missing.
+        """
+        with self.lock:
+            if self.frame is not None and start > self.covered_start:
+                self._trim(start)
+
+            if self.frame is None or self.frame.empty:
+                self.frame = fetch(start, None)
+                self.covered_start = start
+                self.watermark = watermark
+                self.version += 1
+                return
+
+            if (
+                watermark is not None
+                and watermark == self.watermark
+                and start >= self.covered_start
+            ):
+                return
+
+            # Delta spans the whole resident range so refreshed rows outside
+            # the requested window are not left stale for a later, wider call
+            since = min(start, self.covered_start)
+            delta = fetch(since, {
+                'covered_start': self.covered_start,
+                'max_date': self._max_date(),
+                'changed_since': self._max_refreshed(),
+            })
+            if not delta.empty:
+                merged = concat_frames([self.frame, delta])
+                self.frame = merged.drop_duplicates(subset=self.key_columns, keep='last').reset_index(drop=True)
+                self.version += 1
+            self.covered_start = since
+            self.watermark = watermark
@@ -0,0 +1,72 @@
+"""
+Deferred imports for heavy modules
+lazy_import() returns a stand-in that imports the real module on first
+attribute access, so plotly is only loaded once a chart is actually built
+"""
+
+import importlib
+import sys
+import threading
+import time
+
+# Module name -> {'import_ms': time to load on first use, 'loaded_at': epoch seconds}
+_loaded = {}
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    already_loaded = self._name in sys.modules
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    if not already_loaded:
+                        _loaded[self._name] = {
+                            'import_ms': (time.perf_counter() - started) * 1000,
+                            'loaded_at': time.time(),
+                        }
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Module name imported on first use
+
+    Args:
+        name: Dotted module name, e.g. 'plotly.express'
+
+    Returns:
+        The module itself if already imported, else a LazyModule for it
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def get_lazy_import_stats():
+    """
+    Deferred imports that have been loaded, with their import cost
+
+    Returns:
+        list of dicts, in load order
+    """
+    with _lock:
+        return [
+            {'module': name, 'import_ms': round(stats['import_ms'], 1), 'loaded_at': stats['loaded_at']}
+            for name, stats in _loaded.items()
+        ]
@@ -0,0 +1,257 @@
+"""
+Hotel-level outlier detection for Portfolio Overview
+Portfolio KPI rows are absorbed into per-metric hotel x day grids that are
+topped up as new or refreshed days arrive. A window is rolled up to one row
+per hotel and scored against its brand/region peers with median/MAD robust
+z-scores, so the exceptions list scales with hotel count, not hotel-days
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Metrics held per hotel-day
+METRICS = (
+    'REVPAR', 'SATISFACTION_INDEX', 'SERVICE_CASE_RATE_PER_1000_STAYS',
+    'PERSONALIZATION_COVERAGE_PCT', 'OCCUPANCY_PCT', 'ADR',
+)
+
+# Metric -> peer group it is scored against
+BASELINES = {
+    'REVPAR': 'BRAND',
+    'SATISFACTION_INDEX': 'REGION',
+}
+
+# Modified z-score (Iglewicz & Hoaglin) beyond which a hotel is an exception
+ROBUST_Z_THRESHOLD = 3.5
+
+# Smallest deviation from the peer median, in percent of it, that can score
+# past ROBUST_Z_THRESHOLD. Window-averaged hotels sit tightly around their
+# peers, so without this floor a 2-3% gap already reads as an outlier
+MIN_DEVIATION_PCT = 10
+
+# Service cases per 1000 stays above which a hotel is always an exception
+SERVICE_CASE_RATE_LIMIT = 100
+
+# 0.6745 = standard normal quantile at 0.75, scaling MAD to a standard deviation
+_MAD_SCALE = 0.6745
+
+# Days held before the newest day; older columns are dropped
+MAX_DAYS = 90
+
+
+def robust_z(values, groups, min_deviation_pct=MIN_DEVIATION_PCT):
+    """
+    Modified z-score of each value against the median and MAD of its group
+
+    The MAD is floored so that a value within min_deviation_pct percent of
+    its group median never scores past ROBUST_Z_THRESHOLD. Groups with no
+    spread and a zero median (e.g. a single hotel with no data) score 0.
+
+    Args:
+        values: pandas Series of numbers
+        groups: pandas Series of group labels aligned with values
+        min_deviation_pct: Smallest deviation, in percent of the median, that
+            can reach ROBUST_Z_THRESHOLD
+
+    Returns:
+        (z, median) pandas Series aligned with values
+    """
+    grouped = values.groupby(groups, observed=True, sort=False)
+    median = grouped.transform('median')
+    mad = (values - median).abs().groupby(groups, observed=True, sort=False).transform('median')
+    floor = median.abs() * (min_deviation_pct / 100) * _MAD_SCALE / ROBUST_Z_THRESHOLD
+    mad = np.maximum(mad, floor)
+    z = _MAD_SCALE * (values - median) / mad.where(mad > 0)
+    return z.fillna(0.0), median
+
+
+class OutlierEngine:
+    """
+    Hotel x day grids of the portfolio KPI metrics
+
+    update() absorbs only the rows of a resident frame that are new since the
+    last call (dates outside the held range, or REFRESHED_AT newer than any
+    row absorbed); a frame without REFRESHED_AT is re-absorbed whole. Window
+    scores are memoized until the grids change. Meant to be held in
+    st.cache_resource next to the resident rows it follows.
+    """
+
+    def __init__(self, metrics=METRICS, max_days=MAX_DAYS):
+        self.metrics = tuple(metrics)
+        self.max_days = max_days
+        self.version = None
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._rows = {}
+        self._attributes = pd.DataFrame(columns=['HOTEL_ID', 'HOTEL_NAME', 'BRAND', 'REGION'])
+        self._origin = None
+        self._grids = {metric: np.empty((0, 0)) for metric in self.metrics}
+        self._refreshed = None
+        self._scores = {}
+
+    @property
+    def hotels(self):
+        """Hotels held"""
+        return len(self._rows)
+
+    @property
+    def days(self):
+        """Days held per hotel"""
+        return next(iter(self._grids.values())).shape[1]
+
+    def nbytes(self):
+        """Memory held by the grids"""
+        return sum(grid.nbytes for grid in self._grids.values())
+
+    def _new_rows(self, frame):
+        """Rows of frame not yet absorbed, or None to re-absorb everything"""
+        if self._origin is None or 'REFRESHED_AT' not in frame.columns or self._refreshed is None:
+            return None
+        dates = pd.to_datetime(frame['PERFORMANCE_DATE']).to_numpy().astype('datetime64[D]')
+        last = self._origin + np.timedelta64(self.days - 1, 'D')
+        # Rows older than the rolling window are never absorbed
+        floor = max(dates.max(), last) - np.timedelta64(self.max_days - 1, 'D')
+        changed = (
+            (dates < self._origin) | (dates > last)
+            | (pd.to_datetime(frame['REFRESHED_AT']) > self._refreshed).to_numpy()
+        )
+        return frame[changed & (dates >= floor)]
+
+    def update(self, frame, version):
+        """
+        Absorb the rows of frame that changed since the previous version
+
+        Args:
+            frame: Portfolio KPI rows, one per (PERFORMANCE_DATE, HOTEL_ID)
+            version: Version of frame; a repeated version is a no-op
+        """
+        with self.lock:
+            if version == self.version or frame is None:
+                return
+            rows = self._new_rows(frame)
+            if rows is None:
+                self._reset()
+                rows = frame
+            if not rows.empty:
+                self._absorb(rows)
+                self._scores.clear()
+            self.version = version
+
+    def _absorb(self, rows):
+        dates = pd.to_datetime(rows['PERFORMANCE_DATE']).to_numpy().astype('datetime64[D]')
+
+        # Widen the day axis to cover the new dates on either side
+        first, last = dates.min(), dates.max()
+        if self._origin is None:
+            self._origin = first
+        before = max(0, int((self._origin - first) / np.timedelta64(1, 'D')))
+        after = max(0, int((last - self._origin) / np.timedelta64(1, 'D')) + 1 - self.days)
+        self._origin = min(self._origin, first)
+
+        # Register new hotels; attributes follow the latest row seen
+        codes, hotel_ids = pd.factorize(rows['HOTEL_ID'])
+        for hotel_id in hotel_ids:
+            self._rows.setdefault(hotel_id, len(self._rows))
+        code_rows = np.array([self._rows[hotel_id] for hotel_id in hotel_ids], dtype=int)
+        latest = pd.Series(dates).groupby(codes).idxmax().to_numpy()
+        attributes = rows.iloc[latest][list(self._attributes.columns)].astype(object)
+        attributes.index = code_rows[codes[latest]]
+        self._attributes = pd.concat([
+            self._attributes.drop(index=attributes.index, errors='ignore'), attributes
+        ]).sort_index()
+        grow = len(self._rows) - next(iter(self._grids.values())).shape[0]
+
+        hotel_rows = code_rows[codes]
+        day_columns = ((dates - self._origin) / np.timedelta64(1, 'D')).astype(int)
+        for metric in self.metrics:
+            grid = np.pad(self._grids[metric], ((0, grow), (before, after)), constant_values=np.nan)
+            if metric in rows.columns:
+                grid[hotel_rows, day_columns] = pd.to_numeric(rows[metric], errors='coerce').to_numpy(dtype=float)
+            self._grids[metric] = grid
+
+        # Roll the oldest days off
+        excess = self.days - self.max_days
+        if excess > 0:
+            self._grids = {metric: grid[:, excess:] for metric, grid in self._grids.items()}
+            self._origin = self._origin + np.timedelta64(excess, 'D')
+
+        if 'REFRESHED_AT' in rows.columns:
+            newest = pd.to_datetime(rows['REFRESHED_AT']).max()
+            self._refreshed = newest if self._refreshed is None else max(self._refreshed, newest)
+
+    def _window(self, start):
+        """One row per hotel with data on or after start, metrics averaged over the window"""
+        offset = 0 if self._origin is None else max(0, int((np.datetime64(start, 'D') - self._origin) / np.timedelta64(1, 'D')))
+        rollup = self._attributes.reset_index(drop=True)
+        days = np.zeros(len(rollup), dtype=int)
+        for metric, grid in self._grids.items():
+            window = grid[:, offset:]
+            held = ~np.isnan(window)
+            counts = held.sum(axis=1)
+            days = np.maximum(days, counts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rollup[metric] = np.where(held, window, 0.0).sum(axis=1) / counts
+        rollup['DAYS'] = days
+        return rollup[rollup['DAYS'] > 0].reset_index(drop=True)
+
+    def _score(self, start):
+        hotels = self._window(start)
+        score = pd.Series(0.0, index=hotels.index)
+        for metric, group in BASELINES.items():
+            z, median = robust_z(hotels[metric], hotels[group])
+            hotels[f'{metric}_BASELINE'] = median
+            hotels[f'{metric}_Z'] = z
+            score = np.maximum(score, z.abs())
+        # No delta against a brand without RevPAR, rather than +/-inf
+        baseline = hotels['REVPAR_BASELINE'].where(hotels['REVPAR_BASELINE'] > 0)
+        hotels['REVPAR_DELTA_PCT'] = (hotels['REVPAR'] - baseline) / baseline * 100
+        hotels['SATISFACTION_DELTA'] = hotels['SATISFACTION_INDEX'] - hotels['SATISFACTION_INDEX_BASELINE']
+        hotels['DEVIATION_SCORE'] = score
+        hotels['IS_EXCEPTION'] = (
+            (score > ROBUST_Z_THRESHOLD)
+            | (hotels['SERVICE_CASE_RATE_PER_1000_STAYS'] > SERVICE_CASE_RATE_LIMIT)
+        )
+        return hotels.sort_values(['DEVIATION_SCORE', 'HOTEL_ID'], ascending=[False, True]).reset_index(drop=True)
+
+    def scores(self, start):
+        """
+        Every hotel with data since start, scored against the whole portfolio
+
+        Args:
+            start: First day of the window (datetime.date)
+
+        Returns:
+            pandas DataFrame, one row per hotel, highest DEVIATION_SCORE first
+        """
+        with self.lock:
+            scored = self._scores.get(start)
+            if scored is None:
+                scored = self._scores[start] = self._score(start)
+            return scored
+
+    def exceptions(self, start, region=None, brand=None):
+        """
+        Ranked exceptions for the window starting at start
+
+        Baselines always span the whole portfolio; region and brand only
+        choose which hotels are listed.
+
+        Args:
+            start: First day of the window (datetime.date)
+            region: Optional region to list
+            brand: Optional brand to list
+
+        Returns:
+            pandas DataFrame of exception hotels, highest DEVIATION_SCORE first
+        """
+        scored = self.scores(start)
+        keep = scored['IS_EXCEPTION'].to_numpy()
+        if region is not None:
+            keep = keep & (scored['REGION'] == region).to_numpy()
+        if brand is not None:
+            keep = keep & (scored['BRAND'] == brand).to_numpy()
+        return scored[keep].drop(columns='IS_EXCEPTION').reset_index(drop=True)
@@ -0,0 +1,159 @@
+"""
+Compiled page registry
+Page scripts are read and compiled once into code objects and re-executed
+on each rerun; a page is recompiled only when its file's mtime changes.
+Parts of a page can be declared fragments that rerun on their own
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+from .render_profiler import profile_section
+from .telemetry import current_page, set_current_page
+
+# Absolute page path -> (mtime_ns, code object)
+_pages = {}
+# Absolute page path -> {'compiles': n, 'cached_runs': n, 'compile_ms': last read + compile}
+_stats = {}
+# Most recent page renders, newest last
+_renders = deque(maxlen=500)
+_lock = threading.Lock()
+
+# Page being executed by run_page on this thread
+_running = threading.local()
+
+# st.fragment, or its experimental name on Streamlit 1.33 - 1.36; None before that
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+
+def _compiled(path):
+    """Code object for the page at path, compiling it if new or modified"""
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        entry = _pages.get(path)
+        if entry is not None and entry[0] == mtime:
+            _stats[path]['cached_runs'] += 1
+            return entry[1]
+
+    started = time.perf_counter()
+    with open(path, encoding='utf-8') as f:
+        code = compile(f.read(), path, 'exec')
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    with _lock:
+        _pages[path] = (mtime, code)
+        stats = _stats.setdefault(path, {'compiles': 0, 'cached_runs': 0, 'compile_ms': 0.0})
+        stats['compiles'] += 1
+        stats['compile_ms'] = compile_ms
+    return code
+
+
+def run_page(path, namespace):
+    """
+    Execute a page script, as exec(open(path).read()) did, from its cached code object
+
+    Args:
+        path: Page script path, relative to the app directory
+        namespace: Globals the page runs in, normally the main script's globals()
+    """
+    page = os.path.basename(path)
+    set_current_page(page)
+    _running.page = page
+    started_at, started = time.time(), time.perf_counter()
+    try:
+        with profile_section(page):
+            exec(_compiled(path), namespace)
+    finally:
+        _running.page = None
+        _record_render(page, None, started_at, started)
+
+
+def _record_render(page, fragment, started_at, started):
+    _renders.append({
+        'page': page,
+        'fragment': fragment,
+        'started_at': started_at,
+        'render_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
+
+
+def page_fragment(name):
+    """
+    Run the decorated function as a Streamlit fragment
+
+    A widget inside the function then reruns only the function instead of
+    the whole page. Reruns of the fragment alone are timed and profiled
+    under the page as section name. On Streamlit without fragments the
+    function runs as part of every full rerun, as before.
+
+    The function must not write to the sidebar or to containers created
+    outside it.
+
+    Example:
+        @page_fragment("Guest Table")
+        def guest_table():
+            sort_by = st.selectbox("Sort by", ...)
+            ...
+
+        with tab1:
+            guest_table()
+    """
+    def decorator(func):
+        if _fragment is None:
+            return func
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            if getattr(_running, 'page', None) is not None:
+                # Part of a full page render, timed there
+                return func(*args, **kwargs)
+            page = current_page()
+            started_at, started = time.time(), time.perf_counter()
+            try:
+                with profile_section(page or name), profile_section(name):
+                    return func(*args, **kwargs)
+            finally:
+                _record_render(page, name, started_at, started)
+
+        return _fragment(run)
+    return decorator
+
+
+def get_page_stats():
+    """
+    Compile statistics per page
+
+    saved_ms is the read + compile time avoided by cached runs, i.e. what
+    re-reading and re-compiling the page on every rerun would have cost.
+
+    Returns:
+        list of dicts, one per page
+    """
+    with _lock:
+        return [
+            {
+                'page': os.path.basename(path),
+                'compiles': stats['compiles'],
+                'cached_runs': stats['cached_runs'],
+                'compile_ms': round(stats['compile_ms'], 2),
+                'saved_ms': round(stats['cached_runs'] * stats['compile_ms'], 1),
+            }
+            for path, stats in sorted(_stats.items())
+        ]
+
+
+def get_render_times():
+    """
+    Recent renders, newest last
+
+    Returns:
+        list of dicts with page, fragment (None for a full page render),
+        started_at and render_ms
+    """
+    return list(_renders)
@@ -0,0 +1,205 @@
+"""
+Page transformations for Hotel Intelligence Hub
+The pandas work behind each page's KPIs and tables, kept apart from the
+rendering so the pages and the micro-benchmarks run the same code
+"""
+
+import pandas as pd
+
+from shared.derived_cache import derived_frame
+
+
+# =====================================================================
+# Portfolio Overview
+# =====================================================================
+
+@derived_frame
+def period_kpis(df):
+    """Recent-half KPIs and their change vs. the prior half"""
+    # Split data into recent (last 50%) and prior (first 50%) periods for trend comparison
+    total_days = (df['PERFORMANCE_DATE'].max() - df['PERFORMANCE_DATE'].min()).days
+    midpoint_date = df['PERFORMANCE_DATE'].min() + pd.Timedelta(days=total_days // 2)
+
+    latest_kpis = df[df['PERFORMANCE_DATE'] >= midpoint_date]
+    prior_kpis = df[df['PERFORMANCE_DATE'] < midpoint_date]
+
+    def weighted(period):
+        """Rooms-weighted metrics of a period, matching load_portfolio_rollup"""
+        rooms = period['TOTAL_ROOMS'].sum()
+        occupied = period['ROOMS_OCCUPIED'].sum()
+        revenue = period['TOTAL_REVENUE'].sum()
+        return {
+            'occupancy': occupied * 100.0 / rooms if rooms > 0 else 0,
+            'adr': revenue / occupied if occupied > 0 else 0,
+            'revpar': revenue / rooms if rooms > 0 else 0,
+            'satisfaction': period['SATISFACTION_INDEX'].mean(),
+        }
+
+    # Latest period metrics; RevPAR, ADR and occupancy come from the same
+    # revenue and room sums as the brand/region/trend charts
+    kpis = weighted(latest_kpis)
+    kpis['repeat_rate'] = latest_kpis['REPEAT_STAY_RATE_PCT'].mean()
+
+    # Prior period metrics for deltas
+    prior = weighted(prior_kpis) if not prior_kpis.empty else kpis
+    for name in ('occupancy', 'adr', 'revpar', 'satisfaction'):
+        kpis[f'delta_{name}'] = ((kpis[name] - prior[name]) / prior[name] * 100) if prior[name] > 0 else 0
+    return kpis
+
+
+# Exception columns shown in the Outliers & Exceptions table, with their display names
+OUTLIER_COLUMNS = {
+    'HOTEL_NAME': 'Hotel',
+    'BRAND': 'BRAND',
+    'REGION': 'REGION',
+    'REVPAR_DELTA_PCT': 'RevPAR Δ vs Brand (%)',
+    'SATISFACTION_DELTA': 'Satisfaction Δ vs Region',
+    'SERVICE_CASE_RATE_PER_1000_STAYS': 'Service Case Rate',
+    'PERSONALIZATION_COVERAGE_PCT': 'Guest Knowledge (%)',
+    'DEVIATION_SCORE': 'Deviation Score'
+}
+
+# Number formats of the Outliers & Exceptions table
+OUTLIER_FORMATS = {
+    'RevPAR Δ vs Brand (%)': '{:+.1f}%',
+    'Satisfaction Δ vs Region': '{:+.2f}',
+    'Service Case Rate': '{:.1f}',
+    'Guest Knowledge (%)': '{:.1f}%',
+    'Deviation Score': '{:.1f}'
+}
+
+
+def outlier_table(exceptions):
+    """Exception hotels with display column names (HOTEL_NAME includes the city)"""
+    return exceptions[list(OUTLIER_COLUMNS)].rename(columns=OUTLIER_COLUMNS)
+
+
+# =====================================================================
+# Loyalty Intelligence
+# =====================================================================
+
+# Tier order: Blue → Silver → Gold → Diamond → Non-Member (ascending loyalty + non-member last)
+TIER_ORDER = {'Blue': 0, 'Silver': 1, 'Gold': 2, 'Diamond': 3, 'Non-Member': 4}
+
+
+@derived_frame
+def member_kpis(df):
+    """Member-weighted program KPIs (loyalty members only, not "Non-Member")"""
+    loyalty_segments = df[df['LOYALTY_TIER'] != 'Non-Member']
+    total_members = loyalty_segments['ACTIVE_MEMBERS'].sum()
+    high_value_members = loyalty_segments[loyalty_segments['AVG_SPEND_PER_STAY'] > 500]['ACTIVE_MEMBERS'].sum()
+    return (
+        total_members,
+        (loyalty_segments['REPEAT_RATE_PCT'] * loyalty_segments['ACTIVE_MEMBERS']).sum() / total_members if total_members > 0 else 0,
+        (loyalty_segments['AVG_SPEND_PER_STAY'] * loyalty_segments['ACTIVE_MEMBERS']).sum() / total_members if total_members > 0 else 0,
+        (high_value_members / total_members * 100) if total_members > 0 else 0,
+        loyalty_segments[loyalty_segments['REPEAT_RATE_PCT'] < 40]['ACTIVE_MEMBERS'].sum(),
+    )
+
+
+@derived_frame
+def tier_ordered(df):
+    """Segments in tier order, shared by the tier charts and the revenue mix table"""
+    # Since we have one row per tier, just order the data
+    return df.assign(sort_order=df['LOYALTY_TIER'].map(TIER_ORDER)).sort_values('sort_order').drop('sort_order', axis=1).reset_index(drop=True)
+
+
+@derived_frame
+def opportunity_table(df):
+    """Strategic insights per segment, in tier order"""
+    # Prepare table data with strategic insights per tier
+    opportunities_df = df[[
+        'SEGMENT', 'REPEAT_RATE_PCT', 'AVG_SPEND_PER_STAY', 'TOP_FRICTION_DRIVER',
+        'RECOMMENDED_FOCUS', 'EXPERIENCE_AFFINITY', 'UNDERUTILIZED_OPPORTUNITY'
+    ]].copy()
+
+    # Rename columns
+    opportunities_df = opportunities_df.rename(columns={
+        'SEGMENT': 'Segment',
+        'REPEAT_RATE_PCT': 'Repeat Rate (%)',
+        'AVG_SPEND_PER_STAY': 'Avg Spend ($)',
+        'TOP_FRICTION_DRIVER': 'Top Friction Point',
+        'RECOMMENDED_FOCUS': 'Focus Area',
+        'EXPERIENCE_AFFINITY': 'Experience Affinity',
+        'UNDERUTILIZED_OPPORTUNITY': 'Growth Opportunity'
+    })
+
+    # Extract loyalty tier from segment (e.g., "Diamond - Leisure" -> "Diamond")
+    opportunities_df['tier_only'] = opportunities_df['Segment'].str.split(' - ').str[0]
+
+    # Sort by tier order: Blue → Silver → Gold → Diamond → Non-Member
+    opportunities_df['sort_order'] = opportunities_df['tier_only'].map(TIER_ORDER)
+    return opportunities_df.sort_values('sort_order').drop(['sort_order', 'tier_only'], axis=1).reset_index(drop=True)
+
+
+@derived_frame
+def driver_tables(df):
+    """Affinity distribution plus the top high-performing and at-risk segments"""
+    # Show experience affinity distribution
+    affinity_counts = df['EXPERIENCE_AFFINITY'].value_counts().reset_index()
+    affinity_counts.columns = ['Experience Category', 'Segment Count']
+    high_performers = df[df['REPEAT_RATE_PCT'] > 50].sort_values('TOTAL_REVENUE', ascending=False)[['SEGMENT', 'REPEAT_RATE_PCT', 'AVG_SPEND_PER_STAY', 'EXPERIENCE_AFFINITY']].head(5)
+    at_risk_segments = df[df['REPEAT_RATE_PCT'] < 30].sort_values('TOTAL_REVENUE', ascending=False)[['SEGMENT', 'REPEAT_RATE_PCT', 'TOP_FRICTION_DRIVER', 'RECOMMENDED_FOCUS']].head(5)
+    return affinity_counts, high_performers, at_risk_segments
+
+
+# =====================================================================
+# CX & Service Signals
+# =====================================================================
+
+def issue_drivers(df, top=10):
+    """The top most common issues across the three issue driver columns, least common first"""
+    all_issues = []
+    for col in ['TOP_ISSUE_DRIVER_1', 'TOP_ISSUE_DRIVER_2', 'TOP_ISSUE_DRIVER_3']:
+        issues = df[col].dropna().value_counts().to_dict()
+        all_issues.extend([(k, v) for k, v in issues.items()])
+
+    return pd.DataFrame(all_issues, columns=['Issue', 'Count']).groupby('Issue')['Count'].sum().reset_index().sort_values('Count', ascending=True).tail(top)
+
+
+def brand_means(df, column):
+    """Mean of column per brand, highest first"""
+    return df.groupby('BRAND', observed=True)[column].mean().reset_index().sort_values(column, ascending=False)
+
+
+def risk_level(score):
+    """Churn risk band of a 0-100 churn risk score"""
+    if score >= 75:
+        return "🔴 High"
+    elif score >= 50:
+        return "🟡 Medium"
+    else:
+        return "🟢 Low"
+
+
+def vip_watchlist(df, top=20):
+    """The top upcoming VIP arrivals by churn risk, with anonymized IDs and display columns"""
+    vip_display = df.copy()
+
+    # Anonymize guest ID
+    vip_display['GUEST_ID_HASH'] = vip_display['GUEST_ID'].str[:8] + '***'
+
+    # Format preferences
+    vip_display['PREFERENCES'] = vip_display['ROOM_PREFERENCE'].apply(
+        lambda x: str(x) if pd.notna(x) else 'None'
+    )
+
+    # Map churn risk to color
+    vip_display['RISK_LEVEL'] = vip_display['CHURN_RISK_SCORE'].apply(risk_level)
+
+    # Select and rename columns
+    return vip_display[[
+        'GUEST_ID_HASH', 'TIER_LEVEL', 'CHECK_IN_DATE', 'BRAND', 'CITY',
+        'PRIOR_ISSUE_COUNT', 'PREFERENCES', 'LIFETIME_VALUE', 'CHURN_RISK_SCORE', 'RISK_LEVEL'
+    ]].rename(columns={
+        'GUEST_ID_HASH': 'Guest ID',
+        'TIER_LEVEL': 'Tier',
+        'CHECK_IN_DATE': 'Arrival Date',
+        'BRAND': 'Brand',
+        'CITY': 'Property',
+        'PRIOR_ISSUE_COUNT': 'Past Issues',
+        'PREFERENCES': 'Preference Tags',
+        'LIFETIME_VALUE': 'LTV ($)',
+        'CHURN_RISK_SCORE': 'Churn Risk',
+        'RISK_LEVEL': 'Risk Level'
+    }).sort_values('Churn Risk', ascending=False).head(top)
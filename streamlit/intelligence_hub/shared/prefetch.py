@@ -0,0 +1,81 @@
+"""
+Concurrent prefetch of a page's independent loader calls
+Queries run on a small thread pool so a page waits only for its slowest one
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # Older Streamlit without the runtime package
+    add_script_run_ctx = get_script_run_ctx = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent queries issued by one page render
+MAX_WORKERS = 4
+
+# Most recent prefetch reports, newest last
+_prefetch_reports = deque(maxlen=100)
+
+
+def prefetch(page, **tasks):
+    """
+    Run a page's independent loader calls concurrently
+
+    Each worker thread is attached to the calling script run, so
+    st.cache_data and friends behave exactly as on the main thread.
+    Exceptions are re-raised in the caller, as if the calls ran serially.
+
+    Args:
+        page: Page name recorded in the prefetch report
+        **tasks: name -> zero-argument callable, e.g. lambda: load_cx_signals(region)
+
+    Returns:
+        dict of name -> result
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    timings = {}
+
+    def timed(name, func):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(tasks), MAX_WORKERS) or 1) as pool:
+        futures = {name: pool.submit(timed, name, func) for name, func in tasks.items()}
+        results = {name: future.result() for name, future in futures.items()}
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    report = {
+        'page': page,
+        'wall_ms': wall_ms,
+        'serial_ms': sum(timings.values()),
+        'tasks': dict(timings),
+    }
+    _prefetch_reports.append(report)
+    logger.info(
+        "prefetch %s: %.0f ms wall vs %.0f ms serial (%s)",
+        page, wall_ms, report['serial_ms'],
+        ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
+    )
+    return results
+
+
+def get_prefetch_reports():
+    """
+    Return recent per-page prefetch reports, newest last
+
+    serial_ms is the sum of the individual call times, i.e. the wall time the
+    page would have taken running them one after another.
+    """
+    return list(_prefetch_reports)
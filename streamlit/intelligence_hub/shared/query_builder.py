@@ -0,0 +1,194 @@
+"""
+Parameterized SQL for the data loaders
+Filter values are passed as bind variables so the SQL text stays identical
+across values, letting Snowflake reuse compiled plans and cached results
+"""
+
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from .frame_fetch import fetch_frame
+
+# Session-scoped query history, used to look up compile time per query id
+QUERY_HISTORY_FUNCTION = 'HOTEL_PERSONALIZATION.INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION'
+
+# Most recent executed query ids with their canonical text, newest last
+_executions = deque(maxlen=500)
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def canonical_sql(sql):
+    """Whitespace-normalized SQL text, identical for every binding of a query"""
+    return " ".join(sql.split())
+
+
+class Query:
+    """
+    SELECT statement with bind-variable (?) placeholders
+
+    Example:
+        Query("SELECT * FROM t").where_equals("region", region).order_by("x DESC")
+    """
+
+    def __init__(self, sql, *params):
+        self._sql = sql.strip()
+        self._params = list(params)
+        self._conditions = []
+        self._group_by = None
+        self._order_by = None
+
+    def where(self, condition, *params):
+        """Add an AND condition; its ? placeholders bind to params in order"""
+        self._conditions.append(condition)
+        self._params.extend(params)
+        return self
+
+    def where_equals(self, column, value):
+        """Add `column = ?` unless value is None"""
+        if value is None:
+            return self
+        return self.where(f"{column} = ?", value)
+
+    def group_by(self, clause):
+        """Set the GROUP BY clause (column list or GROUPING SETS, without the keyword)"""
+        self._group_by = clause
+        return self
+
+    def order_by(self, clause):
+        """Set the ORDER BY clause (column list without the keyword)"""
+        self._order_by = clause
+        return self
+
+    @property
+    def sql(self):
+        sql = self._sql
+        if self._conditions:
+            sql += "\nWHERE " + "\n  AND ".join(self._conditions)
+        if self._group_by:
+            sql += f"\nGROUP BY {self._group_by}"
+        if self._order_by:
+            sql += f"\nORDER BY {self._order_by}"
+        return sql
+
+    @property
+    def params(self):
+        return list(self._params)
+
+    @property
+    def canonical(self):
+        """Canonical SQL text, shared by every execution of this query shape"""
+        return canonical_sql(self.sql)
+
+    def cache_key(self):
+        """Hashable key identifying this query and its bindings"""
+        return (self.canonical, tuple(self._params))
+
+
+def _record(query, elapsed_ms, query_ids):
+    key = query.canonical
+    with _stats_lock:
+        stats = _stats.setdefault(key, {
+            'executions': 0,
+            'bindings': set(),
+            'first_ms': elapsed_ms,
+            'total_ms': 0.0,
+        })
+        stats['executions'] += 1
+        stats['bindings'].add(tuple(query.params))
+        stats['total_ms'] += elapsed_ms
+        for query_id in query_ids:
+            _executions.append((key, query_id))
+
+
+def run_query(session, query, label=None):
+    """
+    Execute a Query through the compact fetch path and record its timing
+
+    Args:
+        session: Snowpark session
+        query: Query to execute
+        label: Name recorded in the fetch report, usually the calling loader
+
+    Returns:
+        pandas DataFrame
+    """
+    started = time.perf_counter()
+    with session.query_history() as history:
+        df = fetch_frame(session.sql(query.sql, params=query.params or None), label=label)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    # Match on text: concurrent loaders (see prefetch) share the session's history
+    query_ids = [
+        record.query_id for record in history.queries
+        if canonical_sql(record.sql_text) == query.canonical
+    ]
+    _record(query, elapsed_ms, query_ids)
+    return df
+
+
+def get_query_stats():
+    """
+    Per-query-shape execution statistics
+
+    text_reuse_pct is the share of executions that reused an already-seen
+    SQL text with bind variables; literal_reuse_pct is what inlining the
+    values as literals would have achieved, for comparison.
+
+    Returns:
+        pandas DataFrame with one row per canonical SQL text
+    """
+    with _stats_lock:
+        rows = [
+            {
+                'sql': key,
+                'executions': stats['executions'],
+                'distinct_bindings': len(stats['bindings']),
+                'text_reuse_pct': (stats['executions'] - 1) * 100.0 / stats['executions'],
+                'literal_reuse_pct': (stats['executions'] - len(stats['bindings'])) * 100.0 / stats['executions'],
+                'first_ms': stats['first_ms'],
+                'avg_ms': stats['total_ms'] / stats['executions'],
+            }
+            for key, stats in _stats.items()
+        ]
+    return pd.DataFrame(rows)
+
+
+def load_compile_stats(session):
+    """
+    Warehouse compile time and result cache hits for recently executed queries
+
+    Reads QUERY_HISTORY_BY_SESSION for the query ids recorded by run_query.
+    A query that scanned no bytes was answered from the result cache.
+
+    Args:
+        session: Snowpark session that executed the queries
+
+    Returns:
+        pandas DataFrame with one row per canonical SQL text
+    """
+    with _stats_lock:
+        executions = list(_executions)
+    if not executions:
+        return pd.DataFrame(columns=['sql', 'queries', 'avg_compile_ms', 'avg_execution_ms', 'result_cache_hit_pct'])
+
+    canonical_by_id = {query_id: key for key, query_id in executions}
+    placeholders = ", ".join("?" for _ in canonical_by_id)
+    history = Query(
+        f"""
+        SELECT query_id, compilation_time, execution_time, bytes_scanned
+        FROM TABLE({QUERY_HISTORY_FUNCTION}(RESULT_LIMIT => 1000))
+        """
+    ).where(f"query_id IN ({placeholders})", *canonical_by_id)
+    df = session.sql(history.sql, params=history.params).to_pandas()
+
+    df['sql'] = df['QUERY_ID'].map(canonical_by_id)
+    df['result_cache_hit'] = df['BYTES_SCANNED'] == 0
+    return df.groupby('sql').agg(
+        queries=('QUERY_ID', 'count'),
+        avg_compile_ms=('COMPILATION_TIME', 'mean'),
+        avg_execution_ms=('EXECUTION_TIME', 'mean'),
+        result_cache_hit_pct=('result_cache_hit', lambda hits: hits.mean() * 100),
+    ).reset_index()
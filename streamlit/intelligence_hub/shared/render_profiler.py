@@ -0,0 +1,286 @@
+"""
+Section-level render profiler
+Times named sections of a page script, optionally with tracemalloc
+allocation counts, across reruns. Enabled per browser session by the
+?profile=1 query parameter (?profile=time skips allocation tracking);
+otherwise every call is a no-op
+
+tracemalloc is process-wide, so allocation figures blur together when
+several sessions are profiled at the same time
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Samples kept per section, oldest dropped first
+SAMPLES_PER_SECTION = 200
+
+# ?profile= values that enable profiling, and whether they track allocations
+PROFILE_MODES = {'1': True, 'true': True, 'all': True, 'memory': True, 'time': False}
+
+# Section path (page, section, ...) -> deque of sample dicts
+_samples = {}
+_samples_lock = threading.Lock()
+
+# Open sections on this thread, outermost first
+_local = threading.local()
+
+# Profiled renders currently tracking allocations; tracemalloc runs while any are open
+_tracing = 0
+_tracing_lock = threading.Lock()
+
+
+def _query_param(name):
+    if hasattr(st, 'query_params'):
+        return st.query_params.get(name)
+    values = st.experimental_get_query_params().get(name)
+    return values[0] if values else None
+
+
+def profile_mode():
+    """
+    Profiling requested by the current session's URL
+
+    Returns:
+        None when off, else a dict with 'allocations' (bool)
+    """
+    value = (_query_param('profile') or '').lower()
+    if value not in PROFILE_MODES:
+        return None
+    return {'allocations': PROFILE_MODES[value]}
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _memory():
+    return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+
+def _open(name, marker=False):
+    stack = _stack()
+    current, peak = _memory()
+    if stack:
+        stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    path = (stack[-1]['path'] if stack else ()) + (name,)
+    with _samples_lock:
+        # Registered on open so summaries list sections in execution order
+        _samples.setdefault(path, deque(maxlen=SAMPLES_PER_SECTION))
+    stack.append({
+        'path': path,
+        'marker': marker,
+        'started': time.perf_counter(),
+        'memory': current,
+        'peak': current,
+        'children_ms': 0.0,
+        'children_bytes': 0,
+    })
+
+
+def _close():
+    stack = _stack()
+    section = stack.pop()
+    wall_ms = (time.perf_counter() - section['started']) * 1000
+    current, peak = _memory()
+    section['peak'] = max(section['peak'], peak)
+    net_bytes = current - section['memory']
+    if stack:
+        parent = stack[-1]
+        parent['peak'] = max(parent['peak'], section['peak'])
+        parent['children_ms'] += wall_ms
+        parent['children_bytes'] += net_bytes
+    sample = {
+        'wall_ms': wall_ms,
+        'self_ms': wall_ms - section['children_ms'],
+        'net_bytes': net_bytes,
+        'self_bytes': net_bytes - section['children_bytes'],
+        'peak_bytes': section['peak'] - section['memory'],
+    }
+    with _samples_lock:
+        _samples[section['path']].append(sample)
+
+
+@contextmanager
+def profile_section(name):
+    """
+    Time the enclosed block as section name, nested under any open section
+
+    Example:
+        with tab1, profile_section("Top opportunities"):
+            ...
+    """
+    stack = _stack()
+    if not stack and profile_mode() is None:
+        yield
+        return
+    if not stack:
+        _start_tracing()
+    _open(name)
+    depth = len(stack)
+    try:
+        yield
+    finally:
+        # Close sequential sections left open inside the block, then the block itself
+        while len(stack) > depth:
+            _close()
+        _close()
+        if not stack:
+            _stop_tracing()
+
+
+def mark_section(name):
+    """
+    Start a sequential section that runs until the next mark_section() call
+    or the end of the enclosing profile_section()
+
+    Lets a page be split at its existing section headers without re-indenting.
+    Ignored outside a profiled section.
+    """
+    stack = _stack()
+    if not stack:
+        return
+    while stack[-1]['marker']:
+        _close()
+    _open(name, marker=True)
+
+
+def _start_tracing():
+    global _tracing
+    mode = profile_mode()
+    if not mode or not mode['allocations']:
+        _local.tracing = False
+        return
+    with _tracing_lock:
+        _tracing += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    _local.tracing = True
+
+
+def _stop_tracing():
+    global _tracing
+    if not getattr(_local, 'tracing', False):
+        return
+    _local.tracing = False
+    with _tracing_lock:
+        _tracing -= 1
+        if _tracing == 0:
+            tracemalloc.stop()
+
+
+def _recorded(page):
+    """(path, samples) of every section with samples, optionally under one page"""
+    with _samples_lock:
+        return [
+            (path, list(samples)) for path, samples in _samples.items()
+            if samples and (page is None or path[0] == page)
+        ]
+
+
+def get_profile(page=None):
+    """
+    Per-section summary across recorded renders
+
+    Args:
+        page: Restrict to sections under this root section (page script name)
+
+    Returns:
+        list of dicts in execution order
+    """
+    rows = []
+    for path, samples in _recorded(page):
+        walls = sorted(s['wall_ms'] for s in samples)
+        rows.append({
+            'path': path,
+            'section': path[-1],
+            'depth': len(path) - 1,
+            'renders': len(samples),
+            'mean_ms': sum(walls) / len(walls),
+            'p95_ms': walls[min(len(walls) - 1, int(len(walls) * 0.95))],
+            'self_ms': sum(s['self_ms'] for s in samples) / len(samples),
+            'net_kb': sum(s['net_bytes'] for s in samples) / len(samples) / 1024,
+            'peak_kb': max(s['peak_bytes'] for s in samples) / 1024,
+        })
+    return rows
+
+
+def clear_profile():
+    """Drop every recorded sample"""
+    with _samples_lock:
+        _samples.clear()
+
+
+def export_speedscope(page=None):
+    """
+    Recorded sections as a speedscope (https://www.speedscope.app) file
+
+    Each section path becomes one stack weighted by its total self time;
+    when allocations were tracked a second profile weights stacks by the
+    bytes each section allocated itself.
+
+    Returns:
+        JSON string
+    """
+    frames, index = [], {}
+    stacks, time_weights, byte_weights = [], [], []
+    for path, samples in _recorded(page):
+        for name in path:
+            if name not in index:
+                index[name] = len(frames)
+                frames.append({'name': name})
+        stacks.append([index[name] for name in path])
+        time_weights.append(round(sum(s['self_ms'] for s in samples), 3))
+        byte_weights.append(max(0, sum(s['self_bytes'] for s in samples)))
+
+    def profile(name, unit, weights):
+        return {
+            'type': 'sampled', 'name': name, 'unit': unit,
+            'startValue': 0, 'endValue': sum(weights),
+            'samples': stacks, 'weights': weights,
+        }
+
+    profiles = [profile(f"{page or 'all pages'} - self time", 'milliseconds', time_weights)]
+    if any(byte_weights):
+        profiles.append(profile(f"{page or 'all pages'} - allocations", 'bytes', byte_weights))
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': page or 'all pages',
+        'exporter': 'render_profiler',
+        'shared': {'frames': frames},
+        'profiles': profiles,
+    })
+
+
+def render_profile_report(page):
+    """Show the section profile of page with a speedscope download; only when profiling is on"""
+    if profile_mode() is None or page is None:
+        return
+    rows = get_profile(page)
+    with st.expander(f"⏱️ Section profile: {page}", expanded=True):
+        if not rows:
+            st.info("No sections recorded yet")
+            return
+        st.text("\n".join(
+            f"{'  ' * row['depth']}{row['section']:<{40 - 2 * row['depth']}} "
+            f"{row['mean_ms']:>9.1f} ms  (p95 {row['p95_ms']:.1f}, self {row['self_ms']:.1f})  "
+            f"net {row['net_kb']:>9.1f} KB  peak {row['peak_kb']:>9.1f} KB  x{row['renders']}"
+            for row in rows
+        ))
+        st.download_button(
+            "📥 Download speedscope profile", export_speedscope(page),
+            f"{page.rsplit('.', 1)[0]}.speedscope.json", "application/json"
+        )
+        if st.button("Reset profile"):
+            clear_profile()
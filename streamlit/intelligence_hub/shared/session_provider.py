@@ -0,0 +1,172 @@
+"""
+Snowpark session manager
+Loaders ask this module for a session instead of calling get_active_session()
+themselves. The session is opened on first use, reused by every caller in
+the worker process, probed periodically and reopened when it has expired or
+broken. A local stand-in engine can be swapped in (see streamlit/benchmarks)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds a reused session may go without a liveness probe
+HEALTH_CHECK_INTERVAL = 300
+
+# Snowflake error numbers meaning the session itself is gone (expired or
+# invalid session/master token), as opposed to a failing statement
+SESSION_GONE_ERRNOS = frozenset({390111, 390112, 390114})
+
+_session_factory = None
+_session = None
+_stale = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_stats = {
+    'connects': 0,
+    'reuses': 0,
+    'health_checks': 0,
+    'health_failures': 0,
+    'invalidations': 0,
+    'connected_at': None,
+}
+
+
+def set_session_factory(factory):
+    """
+    Open sessions with factory from now on
+
+    Args:
+        factory: Zero-argument callable returning a session-like object, or
+            None to restore the active Snowpark session
+    """
+    global _session_factory
+    with _lock:
+        _session_factory = factory
+        _drop()
+
+
+def _drop(broken=False):
+    global _session, _stale
+    if broken and _session is not None:
+        _stale = _session
+    _session = None
+
+
+def _open_snowpark():
+    """
+    The active Snowpark session, or a new one when the last was broken
+
+    get_active_session() keeps handing back a failed session, so a broken
+    one is closed first and Session.builder opens its replacement.
+    """
+    global _stale
+    if _stale is None:
+        from snowflake.snowpark.context import get_active_session
+        return get_active_session()
+    from snowflake.snowpark import Session
+    try:
+        _stale.close()
+    except Exception:
+        pass
+    _stale = None
+    return Session.builder.getOrCreate()
+
+
+def _connect():
+    """Open a session (caller holds _lock)"""
+    global _session, _stale, _checked_at
+    if _session_factory is not None:
+        _session = _session_factory()
+        _stale = None
+    else:
+        _session = _open_snowpark()
+    _checked_at = time.monotonic()
+    _stats['connects'] += 1
+    _stats['connected_at'] = time.time()
+    return _session
+
+
+def _is_healthy(session):
+    """Round-trip a trivial query; any failure means the session is unusable"""
+    try:
+        session.sql("SELECT 1").collect()
+        return True
+    except Exception:
+        return False
+
+
+def get_session():
+    """
+    Return the worker's session, opening or reopening it as needed
+
+    A session older than HEALTH_CHECK_INTERVAL since its last probe is
+    checked with SELECT 1 first and replaced if the probe fails. The probe
+    runs outside the lock, so other callers keep the session meanwhile
+    rather than waiting on the warehouse round trip.
+    """
+    global _checked_at
+    with _lock:
+        if _session is None:
+            return _connect()
+        session = _session
+        if time.monotonic() - _checked_at < HEALTH_CHECK_INTERVAL:
+            _stats['reuses'] += 1
+            return session
+        # Claim the probe so concurrent callers do not repeat it
+        _stats['health_checks'] += 1
+        _checked_at = time.monotonic()
+
+    if _is_healthy(session):
+        with _lock:
+            _stats['reuses'] += 1
+        return session
+
+    with _lock:
+        _stats['health_failures'] += 1
+        if _session is session:
+            _drop(broken=True)
+        return _session if _session is not None else _connect()
+
+
+def invalidate_session():
+    """Discard the current session as broken; the next get_session() opens a new one"""
+    with _lock:
+        if _session is not None:
+            _stats['invalidations'] += 1
+        _drop(broken=True)
+
+
+def is_connection_error(exc):
+    """True when exc means the session is unusable rather than the statement failing"""
+    try:
+        from snowflake.connector.errors import InterfaceError, OperationalError
+        from snowflake.snowpark.exceptions import SnowparkSessionException
+    except ImportError:
+        return False
+    if isinstance(exc, (InterfaceError, OperationalError, SnowparkSessionException)):
+        return True
+    return getattr(exc, 'errno', None) in SESSION_GONE_ERRNOS
+
+
+@contextmanager
+def invalidating_on_connection_error():
+    """Invalidate the session when the wrapped warehouse call fails on the connection"""
+    try:
+        yield
+    except Exception as exc:
+        if is_connection_error(exc):
+            invalidate_session()
+        raise
+
+
+def get_session_stats():
+    """
+    Connection-level counters for this worker
+
+    Returns:
+        dict with connects, reuses, health_checks, health_failures,
+        invalidations, connected_at (epoch seconds) and whether a session is open
+    """
+    with _lock:
+        return dict(_stats, open=_session is not None)
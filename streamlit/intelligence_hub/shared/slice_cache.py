@@ -0,0 +1,161 @@
+"""
+Superset slicing cache for filtered page loads
+One wide result per table is held in memory and every region/brand/date
+filter combination is answered by indexed slicing instead of a new query
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .frame_fetch import release_small_categoricals
+
+# Memory budget for supersets plus cached slices
+SLICE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _frame_bytes(df):
+    """Deep memory footprint of a DataFrame in bytes"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class FrameSlicer:
+    """
+    Row-position index over a superset frame
+
+    Each dimension column maps value -> row positions, so a filter is an
+    intersection of small integer arrays rather than a full-frame mask.
+    """
+
+    def __init__(self, frame, dimensions, date_column=None):
+        self.frame = frame
+        self.date_column = date_column
+        self.index = {
+            name: frame.groupby(name, observed=True, sort=False).indices
+            for name in dimensions
+        }
+        if date_column is not None:
+            self.dates = pd.to_datetime(frame[date_column]).to_numpy()
+
+    def slice(self, filters, start=None):
+        """
+        Rows matching every (column, value) filter, dated on or after start
+
+        Args:
+            filters: Tuple of (column, value) pairs; None values are ignored
+            start: Optional first date (datetime.date) to keep
+
+        Returns:
+            New pandas DataFrame in superset row order
+        """
+        positions = None
+        for name, value in filters:
+            if value is None:
+                continue
+            matches = self.index[name].get(value, np.empty(0, dtype=np.intp))
+            positions = matches if positions is None else np.intersect1d(positions, matches)
+        if positions is None:
+            positions = np.arange(len(self.frame))
+        if start is not None:
+            positions = positions[self.dates[positions] >= np.datetime64(start)]
+
+        result = self.frame.take(np.sort(positions)).reset_index(drop=True)
+        for name in result.columns:
+            if isinstance(result[name].dtype, pd.CategoricalDtype):
+                result[name] = result[name].cat.remove_unused_categories()
+        return release_small_categoricals(result)
+
+
+class SliceCache:
+    """
+    Supersets by name plus an LRU of the slices cut from them
+
+    Meant to be held in st.cache_resource so every session shares it. A
+    superset is rebuilt only when its token (data version) changes, which
+    also drops its slices. Once the total footprint exceeds max_bytes, least
+    recently used slices are evicted first, then least recently used
+    supersets (with their slices); the superset and slice being served are
+    never evicted, so either may leave the cache over budget on its own.
+    """
+
+    def __init__(self, max_bytes=SLICE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._supersets = OrderedDict()
+        self._slices = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop_slices(self, name):
+        for key in [k for k in self._slices if k[0] == name]:
+            self._bytes -= self._slices.pop(key)[1]
+
+    def _drop_superset(self, name):
+        self._bytes -= self._supersets.pop(name)[2]
+        self._drop_slices(name)
+
+    def _evict(self, keep, keep_slice=None):
+        for key in [k for k in self._slices if k != keep_slice]:
+            if self._bytes <= self.max_bytes:
+                return
+            self._bytes -= self._slices.pop(key)[1]
+        for name in [n for n in self._supersets if n != keep]:
+            if self._bytes <= self.max_bytes:
+                break
+            self._drop_superset(name)
+
+    def _slicer(self, name, token, build, dimensions, date_column):
+        held = self._supersets.get(name)
+        if held is not None and held[0] == token:
+            self._supersets.move_to_end(name)
+            return held[1]
+        if held is not None:
+            self._drop_superset(name)
+        frame = build()
+        slicer = FrameSlicer(frame, dimensions, date_column)
+        size = _frame_bytes(frame)
+        self._supersets[name] = (token, slicer, size)
+        self._bytes += size
+        self._evict(keep=name)
+        return slicer
+
+    def slice(self, name, token, build, filters, start=None, dimensions=(), date_column=None):
+        """
+        Return one filtered slice of a named superset
+
+        Args:
+            name: Superset name, e.g. the loader it serves
+            token: Hashable data version; a new token rebuilds the superset
+            build: Callable returning the superset DataFrame
+            filters: Tuple of (column, value) pairs; None values are ignored
+            start: Optional first date to keep (requires date_column)
+            dimensions: Columns to index for filtering
+            date_column: Date column compared against start
+
+        Returns:
+            pandas DataFrame the caller may modify freely
+        """
+        with self._lock:
+            slicer = self._slicer(name, token, build, dimensions, date_column)
+            key = (name, filters, start)
+            held = self._slices.get(key)
+            if held is None:
+                frame = slicer.slice(filters, start)
+                size = _frame_bytes(frame)
+                self._slices[key] = (frame, size)
+                self._bytes += size
+                self._evict(keep=name, keep_slice=key)
+            else:
+                self._slices.move_to_end(key)
+                frame = held[0]
+        return frame.copy()
+
+    def stats(self):
+        """Supersets held, slices held and total bytes"""
+        with self._lock:
+            return {
+                'supersets': len(self._supersets),
+                'slices': len(self._slices),
+                'bytes': self._bytes,
+            }
@@ -0,0 +1,183 @@
+"""
+Loader telemetry
+Every instrumented loader call is recorded with its wall time, the warehouse
+queries it ran, the rows they returned and the in-memory size of the
+resulting frames, whether it was answered
+from cache and the page that called it. Records live in a bounded in-memory
+ring buffer and export as JSON or CSV
+"""
+
+import csv
+import functools
+import io
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Older Streamlit without the runtime package
+    get_script_run_ctx = None
+
+# Loader calls kept, oldest dropped first
+RING_SIZE = 2000
+
+# Individual query executions kept, with their SQL
+QUERY_RING_SIZE = 500
+
+# Browser sessions whose current page is remembered, least recent dropped first
+PAGE_SESSIONS = 500
+
+# Column order of exported records
+RECORD_FIELDS = (
+    'loader', 'page', 'started_at', 'wall_ms', 'cache', 'queries',
+    'query_ids', 'rows', 'frame_bytes', 'error',
+)
+
+_records = deque(maxlen=RING_SIZE)
+_queries = deque(maxlen=QUERY_RING_SIZE)
+_records_lock = threading.Lock()
+
+# Open loader calls on this thread, innermost last
+_calls = threading.local()
+
+# Streamlit session id -> page script currently rendering in that session
+_pages = OrderedDict()
+_pages_lock = threading.Lock()
+
+
+def _session_id():
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return ctx.session_id if ctx is not None else None
+
+
+def set_current_page(page):
+    """Attribute loader calls made by this Streamlit session to page until the next call"""
+    session_id = _session_id()
+    with _pages_lock:
+        _pages[session_id] = page
+        _pages.move_to_end(session_id)
+        while len(_pages) > PAGE_SESSIONS:
+            _pages.popitem(last=False)
+
+
+def current_page():
+    """Page script rendering in the calling Streamlit session, or None"""
+    return _pages.get(_session_id())
+
+
+def _open_calls():
+    stack = getattr(_calls, 'stack', None)
+    if stack is None:
+        stack = _calls.stack = []
+    return stack
+
+
+def record_fetch(query_ids, rows, nbytes, sql=None, elapsed_ms=None):
+    """
+    Attribute a fetched result to every loader call open on this thread
+
+    Called by the fetch path; a loader call that records no fetch was
+    answered from cache.
+
+    Args:
+        query_ids: Warehouse query ids that produced the result
+        rows: Rows returned
+        nbytes: pandas memory_usage(deep=True) of the result as received,
+            not the bytes transferred from the warehouse
+        sql: SQL text that was executed
+        elapsed_ms: Time from issuing the query to the last row received
+    """
+    stack = _open_calls()
+    for call in stack:
+        call['queries'] += 1
+        call['query_ids'].extend(query_ids)
+        call['rows'] += rows
+        call['frame_bytes'] += nbytes
+    with _records_lock:
+        _queries.append({
+            'loader': stack[0]['loader'] if stack else None,
+            'page': current_page(),
+            'started_at': time.time() - (elapsed_ms or 0) / 1000,
+            'elapsed_ms': elapsed_ms,
+            'query_ids': list(query_ids),
+            'rows': rows,
+            'frame_bytes': nbytes,
+            'sql': sql,
+        })
+
+
+def instrumented(func):
+    """
+    Record every call of a loader in the telemetry ring buffer
+
+    Apply outermost, above any caching decorator, so cache hits are recorded too.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        call = {
+            'loader': func.__name__,
+            'page': current_page(),
+            'started_at': time.time(),
+            'queries': 0,
+            'query_ids': [],
+            'rows': 0,
+            'frame_bytes': 0,
+            'error': None,
+        }
+        stack = _open_calls()
+        stack.append(call)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            call['error'] = type(e).__name__
+            raise
+        finally:
+            call['wall_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            call['cache'] = 'miss' if call['queries'] else 'hit'
+            stack.pop()
+            with _records_lock:
+                _records.append(call)
+
+    if hasattr(func, 'clear'):
+        wrapper.clear = func.clear
+    return wrapper
+
+
+def get_records():
+    """Recorded loader calls, oldest first"""
+    with _records_lock:
+        return [dict(record, query_ids=list(record['query_ids'])) for record in _records]
+
+
+def get_query_records():
+    """Recorded query executions with their SQL, oldest first"""
+    with _records_lock:
+        return [dict(record) for record in _queries]
+
+
+def clear_records():
+    """Empty the ring buffers"""
+    with _records_lock:
+        _records.clear()
+        _queries.clear()
+
+
+def export_json():
+    """Recorded loader calls as a JSON array"""
+    return json.dumps(
+        [{field: record.get(field) for field in RECORD_FIELDS} for record in get_records()],
+        indent=2
+    )
+
+
+def export_csv():
+    """Recorded loader calls as CSV, query ids joined with ';'"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=RECORD_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for record in get_records():
+        writer.writerow(dict(record, query_ids=';'.join(record['query_ids'])))
+    return out.getvalue()
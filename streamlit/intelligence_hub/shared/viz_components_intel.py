@@ -3,11 +3,37 @@ Visualization components for Hotel Intelligence Hub
 Reusable chart and KPI card components with tooltips
 """
 
+import numpy as np
+import pandas as pd
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 from .formatters import format_currency, format_percent, format_number, format_delta
 from .kpi_definitions import get_kpi_help
+from .lazy_imports import lazy_import
+
+# plotly is imported when the first chart is built
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+
+# Cell CSS of the five bands of the Color Guide, best first:
+# green = strong, blue = good, yellow = watch, orange = concern, red = critical
+BAND_STYLES = (
+    'background-color: #d4edda; color: #155724',
+    'background-color: #d1ecf1; color: #0c5460',
+    'background-color: #fff3cd; color: #856404',
+    'background-color: #ffe5d0; color: #8b4513',
+    'background-color: #f8d7da; color: #721c24',
+)
+
+# Outliers & Exceptions table: column -> (band edges best first, higher is better).
+# Higher is better: a value at or above the first edge is green, at or above
+# the second blue, and so on; below the last edge is red. Lower is better:
+# at or below the first edge is green, and so on; above the last is red.
+OUTLIER_BANDS = {
+    'RevPAR Δ vs Brand (%)': ((15, 5, -5, -15), True),
+    'Satisfaction Δ vs Region': ((1.0, 0.1, -0.1, -1.0), True),
+    'Service Case Rate': ((20, 50, 100, 150), False),
+    'Guest Knowledge (%)': ((60, 40, 25, 15), True),
+}
 
 def create_kpi_card(title, value, delta=None, kpi_key=None, is_positive_good=True, prefix="", suffix=""):
     """
@@ -215,6 +241,69 @@ def style_dataframe(df, highlight_cols=None):
     
     return styled
 
+def band_indices(values, edges, higher_is_better=True):
+    """
+    Band of every value (0 = best) under a band table, in one vectorized lookup
+    
+    Args:
+        values: Array-like of numbers; anything non-numeric counts as missing
+        edges: Band edges, best first (see OUTLIER_BANDS)
+        higher_is_better: Direction of the edges
+    
+    Returns:
+        numpy int array, -1 where the value is missing
+    """
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    ascending = np.sort(np.asarray(edges, dtype=float))
+    if higher_is_better:
+        bands = len(edges) - np.searchsorted(ascending, values, side='right')
+    else:
+        bands = np.searchsorted(ascending, values, side='left')
+    return np.where(np.isnan(values), -1, bands)
+
+def band_styles(df, bands, styles=BAND_STYLES):
+    """
+    CSS for every cell of df, colored by band for the columns in bands
+    
+    Args:
+        df: DataFrame to style
+        bands: column -> (edges, higher_is_better), e.g. OUTLIER_BANDS
+        styles: CSS per band, best first; one more than the number of edges
+    
+    Returns:
+        DataFrame of CSS strings shaped like df, '' for unbanded or missing cells
+    """
+    css = np.append(np.asarray(styles, dtype=object), '')
+    matrix = pd.DataFrame('', index=df.index, columns=df.columns)
+    for column, (edges, higher_is_better) in bands.items():
+        if column in df.columns:
+            # -1 (missing) indexes the trailing ''
+            matrix[column] = css[band_indices(df[column], edges, higher_is_better)]
+    return matrix
+
+def style_bands(df, bands, formats=None, hide_index=True):
+    """
+    Styler coloring df by band, for st.dataframe
+    
+    The whole style matrix is computed at once by band_styles instead of
+    one Python call per cell.
+    
+    Args:
+        df: DataFrame to style
+        bands: column -> (edges, higher_is_better), e.g. OUTLIER_BANDS
+        formats: Optional column -> format string passed to Styler.format
+        hide_index: Hide the index column
+    
+    Returns:
+        pandas Styler
+    """
+    styled = df.style.apply(band_styles, axis=None, bands=bands)
+    if formats:
+        styled = styled.format(formats, na_rep='n/a')
+    if hide_index:
+        styled = styled.hide(axis='index')
+    return styled
+
 def create_metric_row(metrics_data, columns=5):
     """
     Create a row of KPI metrics
@@ -0,0 +1,92 @@
+"""
+Tests for the portfolio outlier engine
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.outlier_engine import OutlierEngine, ROBUST_Z_THRESHOLD, robust_z  # noqa: E402
+
+START = date(2026, 1, 1)
+DAYS = 30
+
+
+def _portfolio(revpar_offsets, hotels_per_brand=10, seed=0):
+    """
+    Daily KPI rows for two brands of identical hotels, RevPAR around 100
+
+    Args:
+        revpar_offsets: {hotel_id: fraction} added to that hotel's RevPAR every day
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for brand in ('Summit', 'Harbor'):
+        for i in range(hotels_per_brand):
+            hotel_id = f'{brand}-{i}'
+            offset = revpar_offsets.get(hotel_id, 0.0)
+            for day in range(DAYS):
+                rows.append({
+                    'PERFORMANCE_DATE': START + timedelta(days=day),
+                    'HOTEL_ID': hotel_id,
+                    'HOTEL_NAME': hotel_id,
+                    'BRAND': brand,
+                    'REGION': 'AMER',
+                    'REVPAR': 100.0 * (1 + offset) + rng.normal(0, 1.0),
+                    'SATISFACTION_INDEX': 4.2,
+                    'SERVICE_CASE_RATE_PER_1000_STAYS': 10.0,
+                    'PERSONALIZATION_COVERAGE_PCT': 50.0,
+                    'OCCUPANCY_PCT': 70.0,
+                    'ADR': 140.0,
+                })
+    return pd.DataFrame(rows)
+
+
+def _exceptions(frame):
+    engine = OutlierEngine()
+    engine.update(frame, version=1)
+    return engine.exceptions(START)
+
+
+def test_small_consistent_deviation_is_not_flagged():
+    # Window averages are tight, so 3% above the brand is many MADs out
+    frame = _portfolio({'Summit-0': 0.03})
+    hotels = frame.groupby('HOTEL_ID')['REVPAR'].mean()
+    brands = frame.groupby('HOTEL_ID')['BRAND'].first()
+    assert robust_z(hotels, brands, min_deviation_pct=0)[0]['Summit-0'] > ROBUST_Z_THRESHOLD
+
+    assert 'Summit-0' not in set(_exceptions(frame)['HOTEL_ID'])
+
+
+def test_material_deviation_is_flagged():
+    exceptions = _exceptions(_portfolio({'Summit-0': 0.03, 'Harbor-3': -0.30}))
+
+    assert list(exceptions['HOTEL_ID']) == ['Harbor-3']
+    assert exceptions['REVPAR_DELTA_PCT'].iloc[0] < -25
+
+
+def test_deviation_at_the_floor_reaches_the_threshold():
+    values = pd.Series([100.0] * 9 + [110.0])
+    z, median = robust_z(values, pd.Series(['A'] * 10))
+
+    assert median.iloc[0] == 100.0
+    assert np.isclose(z.iloc[-1], ROBUST_Z_THRESHOLD)
+    assert (z.iloc[:-1] == 0).all()
+
+
+def test_brand_without_revpar_has_no_delta():
+    frame = _portfolio({})
+    # One Harbor hotel keeps its RevPAR; the brand median is still 0
+    frame.loc[(frame['BRAND'] == 'Harbor') & (frame['HOTEL_ID'] != 'Harbor-0'), 'REVPAR'] = 0.0
+    engine = OutlierEngine()
+    engine.update(frame, version=1)
+    scores = engine.scores(START).set_index('HOTEL_ID')
+
+    harbor = scores[scores['BRAND'] == 'Harbor']
+    assert harbor['REVPAR_DELTA_PCT'].isna().all()
+    assert not harbor['IS_EXCEPTION'].any()
+    assert np.isfinite(scores.loc[scores['BRAND'] == 'Summit', 'REVPAR_DELTA_PCT']).all()